@@ -1,6 +1,7 @@
 # accounts/admin.py তৈরি করুন
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from core.search import IndexedSearchMixin
 from .models import User, PlayerProfile
 
 class CustomUserAdmin(UserAdmin):
@@ -20,5 +21,13 @@ class CustomUserAdmin(UserAdmin):
             obj.is_player = False
         super().save_model(request, obj, form, change)
 
+class PlayerProfileAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('__str__', 'matches_played', 'matches_won', 'total_goals', 'ranking')
+    # __str__ shows user.username
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
+    search_index = 'player'
+    search_index_field = 'user'
+
 admin.site.register(User, CustomUserAdmin)
-admin.site.register(PlayerProfile)
\ No newline at end of file
+admin.site.register(PlayerProfile, PlayerProfileAdmin)
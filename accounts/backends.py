@@ -0,0 +1,34 @@
+# accounts/backends.py
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from .cache import get_cached_user, set_cached_user
+
+UserModel = get_user_model()
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that keeps the logged-in user, together with its
+    PlayerProfile, in the cache for USER_CACHE_TIMEOUT seconds so that
+    authenticated pages do not reload them on every request.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is None and password is not None:
+            # Stop here: ModelBackend (listed after us for old sessions) would
+            # only hash the same wrong password a second time
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        user = get_cached_user(user_id)
+        if user is None:
+            try:
+                user = UserModel._default_manager.select_related('playerprofile').get(pk=user_id)
+            except UserModel.DoesNotExist:
+                return None
+            set_cached_user(user)
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,20 @@
+# accounts/cache.py
+from django.conf import settings
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return f"accounts:user:{user_id}"
+
+
+def get_cached_user(user_id):
+    return cache.get(user_cache_key(user_id))
+
+
+def set_cached_user(user):
+    cache.set(user_cache_key(user.pk), user, settings.USER_CACHE_TIMEOUT)
+
+
+def invalidate_cached_user(user_id):
+    """Drop the cached user (and its PlayerProfile) after a change"""
+    cache.delete(user_cache_key(user_id))
@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.conf import settings
+from core.taskqueue import enqueue
+from .cache import invalidate_cached_user
 
 class User(AbstractUser):
     """Custom User Model with additional fields"""
@@ -16,6 +18,13 @@ class User(AbstractUser):
             self.is_admin = True
             self.is_player = False
         super().save(*args, **kwargs)
+        invalidate_cached_user(self.pk)
+    
+    def delete(self, *args, **kwargs):
+        user_id = self.pk
+        result = super().delete(*args, **kwargs)
+        invalidate_cached_user(user_id)
+        return result
     
     def __str__(self):
         return self.username
@@ -34,24 +43,13 @@ class PlayerProfile(models.Model):
         if self.user.is_admin:
             # অ্যাডমিনের জন্য র‍্যাংকিং 0 রাখুন
             self.ranking = 0
-        else:
-            # প্লেয়ারদের র‍্যাংকিং: প্রথমে wins, তারপর goals
-            all_profiles = PlayerProfile.objects.exclude(user__is_admin=True)
-            
-            # wins এবং goals এর ভিত্তিতে সাজান
-            sorted_profiles = sorted(
-                all_profiles,
-                key=lambda x: (x.matches_won, x.total_goals),
-                reverse=True
-            )
-            
-            # র‍্যাংকিং সেট করুন
-            for rank, profile in enumerate(sorted_profiles, 1):
-                if profile.id == self.id:
-                    self.ranking = rank
-                    break
         
         super().save(*args, **kwargs)
+        invalidate_cached_user(self.user_id)
+        
+        # প্লেয়ারদের র‍্যাংকিং: প্রথমে wins, তারপর goals (background task)
+        from .tasks import recompute_rankings
+        enqueue(recompute_rankings, unique=True)
     
     def win_percentage(self):
         if self.matches_played > 0:
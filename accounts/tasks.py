@@ -0,0 +1,26 @@
+# accounts/tasks.py
+from core.taskqueue import task
+
+from .cache import invalidate_cached_user
+from .models import PlayerProfile
+
+
+@task
+def recompute_rankings():
+    """Rank every player by wins, then goals (admins stay at 0)"""
+    profiles = PlayerProfile.objects.select_related('user').order_by('-matches_won', '-total_goals', 'id')
+    changed = []
+    rank = 0
+    for profile in profiles:
+        if profile.user.is_admin:
+            ranking = 0
+        else:
+            rank += 1
+            ranking = rank
+        if profile.ranking != ranking:
+            profile.ranking = ranking
+            changed.append(profile)
+    PlayerProfile.objects.bulk_update(changed, ['ranking'], batch_size=500)
+    for profile in changed:
+        invalidate_cached_user(profile.user_id)
+    return {'changed': len(changed)}
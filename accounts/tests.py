@@ -1,3 +1,63 @@
+from unittest import mock
+
+from django.contrib.auth import BACKEND_SESSION_KEY, authenticate
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .cache import get_cached_user
+from .models import PlayerProfile, User
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('striker', 'striker@example.com', 'pass12345')
+        PlayerProfile.objects.create(user=self.user, matches_won=3)
+        self.client.force_login(self.user)
+
+    def count_home_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('home'))
+        return len(queries)
+
+    def test_warm_cache_skips_session_and_user_queries(self):
+        cold = self.count_home_queries()
+        warm = self.count_home_queries()
+        self.assertLessEqual(warm, cold - 2)
+
+    def test_user_is_cached_with_player_profile(self):
+        self.client.get(reverse('home'))
+        cached = get_cached_user(self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(cached.playerprofile.matches_won, 3)
+
+    def test_user_save_invalidates_cache(self):
+        self.client.get(reverse('home'))
+        self.user.gaming_id = 'GF-9'
+        self.user.save()
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+    def test_player_profile_save_invalidates_cache(self):
+        self.client.get(reverse('home'))
+        profile = PlayerProfile.objects.get(user=self.user)
+        profile.total_goals = 7
+        profile.save()
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+    def test_sessions_from_before_the_cached_backend_stay_logged_in(self):
+        session = self.client.session
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session.save()
+        response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['user'], self.user)
 
-# Create your tests here.
+    def test_wrong_password_is_checked_once(self):
+        with mock.patch.object(ModelBackend, 'authenticate', autospec=True,
+                               side_effect=ModelBackend.authenticate) as check:
+            self.assertIsNone(authenticate(username='striker', password='wrong'))
+            self.assertEqual(authenticate(username='striker', password='pass12345'), self.user)
+        self.assertEqual(check.call_count, 2)
@@ -4,6 +4,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from .forms import UserRegistrationForm, UserProfileForm
 from .models import User, PlayerProfile
+from core.thumbnails import schedule_upload_processing
 
 def register_view(request):
     """User registration view"""
@@ -14,6 +15,7 @@ def register_view(request):
         form = UserRegistrationForm(request.POST, request.FILES)
         if form.is_valid():
             user = form.save()
+            schedule_upload_processing(user.profile_picture)
             
             # PlayerProfile তৈরি করার আগে চেক করুন যে ইতিমধ্যে তৈরি হয়েছে কিনা
             if not hasattr(user, 'playerprofile'):
@@ -67,13 +69,18 @@ def profile_view(request):
         messages.warning(request, "Admins don't have player profiles.")
         return redirect('home')
     
-    # PlayerProfile তৈরি করুন যদি না থাকে
-    player_profile, created = PlayerProfile.objects.get_or_create(user=request.user)
+    # PlayerProfile তৈরি করুন যদি না থাকে (the cached user carries it already)
+    try:
+        player_profile = request.user.playerprofile
+    except PlayerProfile.DoesNotExist:
+        player_profile = PlayerProfile.objects.create(user=request.user)
     
     if request.method == 'POST':
         form = UserProfileForm(request.POST, request.FILES, instance=request.user)
         if form.is_valid():
-            form.save()
+            user = form.save()
+            if 'profile_picture' in form.changed_data:
+                schedule_upload_processing(user.profile_picture)
             messages.success(request, "Profile updated successfully!")
             return redirect('profile')
     else:
@@ -1,3 +1,37 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import IdempotencyKey, Notification, Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'started_at', 'finished_at', 'locked_by')
+    list_filter = ('status', 'name')
+    search_fields = ('name',)
+    ordering = ('-id',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at', 'locked_by', 'locked_until', 'result', 'last_error')
+    actions = ['retry_tasks']
+
+    def retry_tasks(self, request, queryset):
+        updated = queryset.filter(status=Task.FAILED).update(status=Task.QUEUED, attempts=0, finished_at=None)
+        self.message_user(request, f'{updated} failed tasks queued again.')
+    retry_tasks.short_description = "Retry failed tasks"
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'kind', 'title', 'created_at', 'read_at', 'emailed_at')
+    list_filter = ('kind',)
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    ordering = ('-id',)
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('id', 'scope', 'user', 'status', 'replays', 'created_at')
+    list_filter = ('scope', 'status')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
+    ordering = ('-id',)
+    readonly_fields = ('key', 'path', 'redirect_to', 'messages', 'created_at')
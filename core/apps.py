@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'core'
\ No newline at end of file
+    name = 'core'
+
+    def ready(self):
+        from . import db  # noqa: F401  (connects the SQLite PRAGMA hook)
+        from . import signals  # noqa: F401  (bumps home page fragment versions)
+        from . import idempotency, notifications, thumbnails  # noqa: F401  (register their tasks)
+        autodiscover_modules('tasks')
@@ -0,0 +1,40 @@
+# core/async_helpers.py
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import render
+
+
+async def get_request_user(request):
+    """Resolve the lazy request.user (session + auth backend) off the event loop"""
+    def load():
+        request.user.is_authenticated  # forces the SimpleLazyObject
+        return request.user
+    return await sync_to_async(load)()
+
+
+async def aget_object_or_404(queryset, **kwargs):
+    try:
+        return await queryset.aget(**kwargs)
+    except queryset.model.DoesNotExist:
+        raise Http404(f"No {queryset.model._meta.object_name} matches the given query.")
+
+
+async def arender(request, template_name, context=None):
+    # Templates are sync-only; lazy querysets left in the context (e.g. for
+    # cached fragments) are evaluated in the same worker thread.
+    return await sync_to_async(render)(request, template_name, context)
+
+
+def async_login_required(view_func):
+    """login_required for coroutine views (Django 4.2's decorator is sync-only)"""
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        user = await get_request_user(request)
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path(), settings.LOGIN_URL)
+        return await view_func(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,150 @@
+# core/autocomplete.py
+import bisect
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from accounts.models import User
+from tournaments.models import Team
+
+logger = logging.getLogger(__name__)
+
+# What each autocomplete kind lists, as (id, label) rows
+AUTOCOMPLETE_SOURCES = {
+    'team': lambda: Team.objects.values_list('id', 'name'),
+    'player': lambda: User.objects.filter(is_admin=False, is_superuser=False).values_list('id', 'username'),
+}
+
+
+class PrefixIndex:
+    """
+    (casefolded label, id, label) entries kept sorted, so a prefix lookup
+    is one bisect plus a short slice. Writers take the lock; readers only
+    slice the list, which is atomic under the GIL.
+    """
+
+    def __init__(self, rows=()):
+        self._lock = threading.Lock()
+        self._entries = sorted((label.casefold(), pk, label) for pk, label in rows)
+        self._by_id = {entry[1]: entry for entry in self._entries}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def search(self, prefix, limit):
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(self._entries, (prefix,))
+        results = []
+        for key, pk, label in self._entries[start:start + limit]:
+            if not key.startswith(prefix):
+                break
+            results.append({'id': pk, 'label': label})
+        return results
+
+    def add(self, pk, label):
+        entry = (label.casefold(), pk, label)
+        with self._lock:
+            self._discard(pk)
+            bisect.insort(self._entries, entry)
+            self._by_id[pk] = entry
+
+    def remove(self, pk):
+        with self._lock:
+            self._discard(pk)
+
+    def _discard(self, pk):
+        entry = self._by_id.pop(pk, None)
+        if entry is not None:
+            del self._entries[bisect.bisect_left(self._entries, entry)]
+
+
+# kind -> (PrefixIndex, built at); changes seen while a build runs are
+# replayed onto the new index once it is ready
+_indexes = {}
+_pending = {}
+_state_lock = threading.Lock()
+
+
+def get_prefix_index(kind):
+    """
+    The in-process index for `kind`, or None while it is cold. The first
+    call starts a build; an index older than AUTOCOMPLETE_INDEX_TTL keeps
+    serving while it is rebuilt, which picks up changes made by other
+    worker processes (signals only reach the process that saved).
+    """
+    entry = _indexes.get(kind)
+    if entry is None or time.monotonic() - entry[1] > settings.AUTOCOMPLETE_INDEX_TTL:
+        _start_build(kind)
+        entry = _indexes.get(kind)
+    return entry[0] if entry else None
+
+
+def _start_build(kind):
+    with _state_lock:
+        if kind in _pending:
+            return
+        _pending[kind] = []
+    if settings.AUTOCOMPLETE_BUILD_IN_BACKGROUND:
+        threading.Thread(target=_build, args=(kind, True), name=f'autocomplete-{kind}', daemon=True).start()
+    else:
+        _build(kind)
+
+
+def _build(kind, own_connection=False):
+    try:
+        index = PrefixIndex(AUTOCOMPLETE_SOURCES[kind]())
+        with _state_lock:
+            for change in _pending[kind]:
+                change(index)
+            _indexes[kind] = (index, time.monotonic())
+    except Exception:
+        logger.exception(f"Building the {kind} autocomplete index failed")
+    finally:
+        with _state_lock:
+            _pending.pop(kind, None)
+        if own_connection:
+            connection.close()
+
+
+def _apply(kind, change):
+    # After commit, so a rolled-back save never shows up in the index
+    transaction.on_commit(lambda: _apply_now(kind, change))
+
+
+def _apply_now(kind, change):
+    with _state_lock:
+        if kind in _pending:
+            _pending[kind].append(change)
+        entry = _indexes.get(kind)
+    if entry is not None:
+        change(entry[0])
+
+
+def reset_prefix_indexes():
+    with _state_lock:
+        _indexes.clear()
+
+
+# -----------------------------------------------------
+# Signal receivers (connected in core.signals)
+# -----------------------------------------------------
+def team_saved(sender, instance, **kwargs):
+    _apply('team', lambda index: index.add(instance.pk, instance.name))
+
+
+def team_deleted(sender, instance, **kwargs):
+    _apply('team', lambda index: index.remove(instance.pk))
+
+
+def user_saved(sender, instance, **kwargs):
+    if instance.is_admin or instance.is_superuser:
+        _apply('player', lambda index: index.remove(instance.pk))
+    else:
+        _apply('player', lambda index: index.add(instance.pk, instance.username))
+
+
+def user_deleted(sender, instance, **kwargs):
+    _apply('player', lambda index: index.remove(instance.pk))
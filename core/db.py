@@ -0,0 +1,74 @@
+# core/db.py
+import functools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# One writer at a time per process when SQLITE_SERIALIZE_WRITES is on
+_write_lock = threading.RLock()
+
+
+def apply_sqlite_pragmas(connection):
+    """Run the configured SQLITE_PRAGMAS on a fresh SQLite connection"""
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if connection.vendor != 'sqlite' or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(connection_created)
+def on_connection_created(sender, connection, **kwargs):
+    apply_sqlite_pragmas(connection)
+
+
+def is_lock_error(exc):
+    """True for SQLite's "database is locked" / "database table is locked" errors"""
+    return isinstance(exc, OperationalError) and 'locked' in str(exc)
+
+
+def run_serialized_write(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Run a short write transaction.
+
+    With SQLITE_SERIALIZE_WRITES enabled, writers in this process queue up
+    on a single lock and lock errors from other processes are retried with
+    exponential backoff. Inside an outer atomic block the function runs
+    as-is, because a failed statement there cannot be retried.
+    """
+    connection = connections[using]
+    if not getattr(settings, 'SQLITE_SERIALIZE_WRITES', False) or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            return func(*args, **kwargs)
+
+    retries = getattr(settings, 'SQLITE_WRITE_RETRIES', 5)
+    backoff = getattr(settings, 'SQLITE_WRITE_BACKOFF', 0.05)
+    attempt = 0
+    while True:
+        try:
+            with _write_lock:
+                with transaction.atomic(using=using):
+                    return func(*args, **kwargs)
+        except OperationalError as exc:
+            if not is_lock_error(exc) or attempt >= retries:
+                raise
+            delay = backoff * (2 ** attempt)
+            attempt += 1
+            logger.warning(f"Database locked, retrying write in {delay:.2f}s (attempt {attempt}/{retries})")
+            time.sleep(delay)
+
+
+def serialized_write(func):
+    """Decorator form of run_serialized_write for the default database"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return run_serialized_write(func, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,191 @@
+# core/exports.py
+import csv
+import datetime
+import re
+import zipfile
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+# (header, values_list lookup) for registration exports
+REGISTRATION_COLUMNS = [
+    ('ID', 'id'),
+    ('Player', 'player__username'),
+    ('Email', 'player__email'),
+    ('Gaming ID', 'player__gaming_id'),
+    ('Tournament', 'tournament__name'),
+    ('Entry fee', 'tournament__entry_fee'),
+    ('Team', 'selected_team__name'),
+    ('Registered', 'registration_date'),
+    ('Status', 'status'),
+    ('Payment method', 'payment_method'),
+    ('Transaction ID', 'transaction_id'),
+    ('Mobile number', 'mobile_number'),
+    ('Payment date', 'payment_date'),
+    ('Confirmed by', 'confirmed_by__username'),
+    ('Confirmed date', 'confirmed_date'),
+]
+
+EXPORT_CHUNK_SIZE = 2000
+# Rows written between two yields of the response body
+ROWS_PER_WRITE = 500
+
+# Spreadsheet apps run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+# ...except plain phone numbers such as +880 1711-111111
+PHONE_NUMBER_RE = re.compile(r'^\+?\d[\d\s-]*$')
+
+
+def registration_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Header, then one tuple per registration, fetched chunk by chunk"""
+    yield tuple(header for header, _ in REGISTRATION_COLUMNS)
+    rows = queryset.order_by('id').values_list(*(lookup for _, lookup in REGISTRATION_COLUMNS))
+    yield from rows.iterator(chunk_size=chunk_size)
+
+
+def _plain(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+class _Echo:
+    """csv.writer target that hands each formatted line straight back"""
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    value = _plain(value)
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) and not PHONE_NUMBER_RE.match(value):
+        return "'" + value
+    return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield '﻿'  # BOM, so Excel reads UTF-8 names correctly
+    batch = []
+    for row in rows:
+        batch.append(writer.writerow([_csv_cell(value) for value in row]))
+        if len(batch) >= ROWS_PER_WRITE:
+            yield ''.join(batch)
+            batch = []
+    if batch:
+        yield ''.join(batch)
+
+
+class _ZipStream:
+    """Write-only, unseekable file for ZipFile; the generator drains it as it fills"""
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+
+
+def _xlsx_cell(value):
+    value = _plain(value)
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c><v>{value}</v></c>'
+    # Drop control characters XML 1.0 cannot carry
+    text = ''.join(ch for ch in str(value) if ch >= ' ' or ch in '\t\n')
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+def stream_xlsx(rows, sheet_name='Sheet1'):
+    """
+    Minimal single-sheet XLSX written row by row into a streamed zip
+    (inline strings, no shared-string table), so memory stays flat.
+    """
+    buffer = _ZipStream()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', XLSX_WORKBOOK.format(name=escape(sheet_name[:31])))
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            for index, row in enumerate(rows, 1):
+                sheet.write(('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>').encode())
+                if index % ROWS_PER_WRITE == 0:
+                    yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (stream_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+
+def registrations_export_response(queryset, export_format='csv'):
+    """StreamingHttpResponse that starts sending before the query is exhausted"""
+    writer, content_type = EXPORT_FORMATS[export_format]
+    filename = f"registrations-{timezone.localtime():%Y%m%d-%H%M}.{export_format}"
+    response = StreamingHttpResponse(writer(registration_rows(queryset)), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
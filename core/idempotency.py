@@ -0,0 +1,140 @@
+# core/idempotency.py
+import functools
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib import messages
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.http import HttpResponseBadRequest, HttpResponseRedirect
+from django.shortcuts import redirect
+from django.utils import timezone
+
+from .db import run_serialized_write
+from .models import IdempotencyKey
+from .taskqueue import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+# Name of the hidden input rendered by {% idempotency_field %}
+IDEMPOTENCY_FIELD = 'idempotency_key'
+# How often a repeat re-reads a token whose first submission is still running
+PENDING_POLL_INTERVAL = 0.1
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def _claim(key, user, scope, path):
+    """Insert the token as pending; False when it was submitted before"""
+    try:
+        # Own savepoint, so a duplicate does not break an outer transaction
+        with transaction.atomic():
+            IdempotencyKey.objects.create(key=key, user=user, scope=scope, path=path)
+    except IntegrityError:
+        return False
+    enqueue(purge_idempotency_keys, delay=settings.IDEMPOTENCY_KEY_TTL, unique=True)
+    return True
+
+
+def _record(key, response, request):
+    """Keep where the first submission went and the messages it queued"""
+    queued = getattr(getattr(request, '_messages', None), '_queued_messages', [])
+    IdempotencyKey.objects.filter(key=key).update(
+        status=IdempotencyKey.DONE,
+        redirect_to=response['Location'],
+        messages=[[message.level, str(message.message)] for message in queued],
+    )
+
+
+def _release(key):
+    IdempotencyKey.objects.filter(key=key).delete()
+
+
+def _replay(request, key):
+    row = IdempotencyKey.objects.filter(key=key).first()
+    if row is None or row.user_id != request.user.pk or row.path != request.path:
+        # Purged meanwhile, or a token lifted from another form
+        return HttpResponseBadRequest("This form has expired. Please reload the page and try again.")
+    run_serialized_write(IdempotencyKey.objects.filter(pk=row.pk).update, replays=F('replays') + 1)
+    logger.info(f"Absorbed repeated submission of {row.path} by user {row.user_id}")
+    if row.status == IdempotencyKey.PENDING:
+        row = _wait_for_first_submission(row)
+    if row is None:
+        # The first submission failed and released the token
+        messages.error(request, "Your previous submission did not go through. Please try again.")
+        return HttpResponseRedirect(request.path)
+    if row.status == IdempotencyKey.PENDING:
+        # Still running: send the player to the home page, which shows the
+        # registration's status, not back to a form they may no longer need
+        messages.info(request, "Your previous submission is still being processed. Its status is shown below.")
+        return redirect('home')
+    for level, text in row.messages:
+        messages.add_message(request, level, text)
+    return HttpResponseRedirect(row.redirect_to)
+
+
+def _wait_for_first_submission(row):
+    """
+    Re-read a pending token for up to IDEMPOTENCY_PENDING_WAIT seconds; a
+    double tap usually arrives while the first request is finishing.
+    Returns the row (done or still pending) or None if it was released.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_PENDING_WAIT
+    while row is not None and row.status == IdempotencyKey.PENDING and time.monotonic() < deadline:
+        time.sleep(PENDING_POLL_INTERVAL)
+        row = IdempotencyKey.objects.filter(pk=row.pk).first()
+    return row
+
+
+def idempotent_post(view):
+    """
+    Process a POST at most once per {% idempotency_field %} token.
+
+    The first submission claims the token with a unique INSERT and runs the
+    view; if that ends in a redirect, the target and its flash messages are
+    stored. Repeats (double taps, resubmits) are answered from that row
+    without running the view, so they never touch the registration tables.
+    A view that errors or re-renders the form releases the token for a
+    retry. POSTs without a token run as before.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.POST.get(IDEMPOTENCY_FIELD, '').strip() if request.method == 'POST' else ''
+        if not key or not request.user.is_authenticated:
+            return view(request, *args, **kwargs)
+        key = key[:64]
+        scope = request.resolver_match.view_name if request.resolver_match else view.__name__
+        if not run_serialized_write(_claim, key, request.user, scope, request.path):
+            return _replay(request, key)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            run_serialized_write(_release, key)
+            raise
+        if isinstance(response, HttpResponseRedirect):
+            run_serialized_write(_record, key, response, request)
+        else:
+            run_serialized_write(_release, key)
+        return response
+
+    return wrapper
+
+
+@task
+def purge_idempotency_keys():
+    """Forget tokens older than IDEMPOTENCY_KEY_TTL"""
+    cutoff = timezone.now() - timezone.timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=cutoff).delete()
+    return {'deleted': deleted}
+
+
+def duplicate_stats(since):
+    """Forms submitted and repeats absorbed since `since`, per view"""
+    return list(IdempotencyKey.objects.filter(created_at__gte=since).values('scope').annotate(
+        forms=Count('id'), duplicates=Sum('replays'),
+    ).order_by('scope'))
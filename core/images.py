@@ -0,0 +1,128 @@
+# core/images.py
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from PIL import Image
+
+MANIFEST_NAME = 'manifest.json'
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Pillow format name -> (file extension, save options)
+VARIANT_FORMATS = {
+    'AVIF': ('avif', {'quality': 55}),
+    'WEBP': ('webp', {'quality': 80, 'method': 6}),
+    'PNG': ('png', {'optimize': True}),
+}
+
+
+def available_formats():
+    """Variant formats this Pillow build can write (AVIF needs a plugin)"""
+    Image.init()
+    return [name for name in VARIANT_FORMATS if name in Image.SAVE]
+
+
+def file_hash(path, chunk_size=64 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def find_source_images(source_dir, prefix='images'):
+    """Yield (path, static name) for every image below source_dir"""
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.lower().endswith(SOURCE_EXTENSIONS):
+                path = os.path.join(root, filename)
+                relative = os.path.relpath(path, source_dir).replace(os.sep, '/')
+                yield path, f"{prefix}/{relative}"
+
+
+def target_widths(width, widths):
+    """Requested widths below the original, plus one variant capped at the largest"""
+    targets = {w for w in widths if w < width}
+    targets.add(min(width, max(widths)))
+    return sorted(targets)
+
+
+def build_variants(source, name, out_dir, widths, formats):
+    """Write resized variants of one image; returns its manifest entry"""
+    stem = os.path.splitext(name.split('/', 1)[-1])[0]
+    with Image.open(source) as image:
+        image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        width, height = image.size
+        variants = []
+        for target in target_widths(width, widths):
+            if target == width:
+                resized = image
+            else:
+                resized = image.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+            for format_name in formats:
+                extension, options = VARIANT_FORMATS[format_name]
+                relative = f"{stem}-{target}w.{extension}"
+                path = os.path.join(out_dir, relative)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                resized.save(path, format_name, **options)
+                variants.append({'format': extension, 'width': target, 'name': relative})
+    return {
+        'hash': file_hash(source),
+        'width': width,
+        'height': height,
+        'variants': variants,
+    }
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME)) as handle:
+            return json.load(handle)
+    except (FileNotFoundError, ValueError):
+        return {'images': {}}
+
+
+def _is_current(entry, source, out_dir):
+    if not entry or entry['hash'] != file_hash(source):
+        return False
+    return all(os.path.exists(os.path.join(out_dir, v['name'])) for v in entry['variants'])
+
+
+def build_images(sources, out_dir, widths=None, workers=None, force=False):
+    """
+    Build variants for (path, name) pairs in a process pool.
+
+    Images whose content hash matches the manifest are skipped.
+    Returns (built names, skipped names).
+    """
+    widths = widths or settings.IMAGE_VARIANT_WIDTHS
+    formats = available_formats()
+    manifest = load_manifest(out_dir)
+    images = manifest.setdefault('images', {})
+
+    pending, skipped = [], []
+    for source, name in sources:
+        if not force and _is_current(images.get(name), source, out_dir):
+            skipped.append(name)
+        else:
+            pending.append((source, name))
+
+    if workers == 1:
+        results = [build_variants(source, name, out_dir, widths, formats) for source, name in pending]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(build_variants, source, name, out_dir, widths, formats) for source, name in pending]
+            results = [future.result() for future in futures]
+
+    for (source, name), entry in zip(pending, results):
+        images[name] = entry
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w') as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    return [name for _, name in pending], skipped
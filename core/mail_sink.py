@@ -0,0 +1,78 @@
+# core/mail_sink.py
+import socketserver
+import threading
+import time
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: every message is accepted and kept"""
+
+    def reply(self, line):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 localhost sink")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('ascii', 'replace').strip().upper()
+            if command.startswith('EHLO'):
+                self.reply("250-localhost\r\n250 8BITMIME")
+            elif command.startswith(('HELO', 'NOOP')):
+                self.reply("250 OK")
+            elif command.startswith(('MAIL FROM', 'RSET')):
+                recipients = []
+                self.reply("250 OK")
+            elif command.startswith('RCPT TO'):
+                recipients.append(command[8:].strip(' <>').lower())
+                self.reply("250 OK")
+            elif command == 'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                for data in iter(self.rfile.readline, b''):
+                    if data == b".\r\n":
+                        break
+                    body.append(data)
+                with self.server.lock:
+                    self.server.messages.append((recipients, b"".join(body)))
+                recipients = []
+                self.reply("250 OK queued")
+            elif command == 'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class LocalSMTPSink(socketserver.ThreadingTCPServer):
+    """
+    Debugging SMTP server on 127.0.0.1 (a free port unless given) that
+    stores messages in memory; `latency` (seconds) delays every reply, like
+    the round trip to a real mail server. Use as a context manager:
+
+        with LocalSMTPSink() as sink:
+            ... EMAIL_HOST='127.0.0.1', EMAIL_PORT=sink.port ...
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0, latency=0):
+        super().__init__(('127.0.0.1', port), _SMTPHandler)
+        self.latency = latency
+        self.port = self.server_address[1]
+        self.messages = []
+        self.connections = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, name='smtp-sink', daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,129 @@
+# core/management/commands/bench_async.py
+import asyncio
+import importlib
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.urls import clear_url_caches, reverse
+
+from accounts.models import User
+from tournaments.models import Team, Tournament
+
+URLCONF_MODULES = ('tournaments.urls', 'core.urls', settings.ROOT_URLCONF)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync views behind a threaded WSGI handler with the async "
+        "views on one event loop (as under uvicorn) at the same concurrency"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per page and mode')
+        parser.add_argument('--concurrency', type=int, default=16, help='Requests in flight at once')
+        parser.add_argument('--username', help='Benchmark logged-in pages as this user')
+
+    def handle(self, *args, **options):
+        self.user = None
+        if options['username']:
+            try:
+                self.user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['username']}' does not exist")
+
+        count, concurrency = options['requests'], options['concurrency']
+        self.stdout.write(f"{count} requests per page, {concurrency} in flight")
+        # AsyncClient always sends Host: testserver in Django 4.2
+        allowed_hosts = settings.ALLOWED_HOSTS + ['testserver']
+        for async_views in (False, True):
+            with override_settings(ASYNC_VIEWS=async_views, ALLOWED_HOSTS=allowed_hosts):
+                self.reload_urls()
+                mode = 'asgi/async' if async_views else 'wsgi/sync'
+                for label, url, headers, logged_in, overrides in self.pages():
+                    with override_settings(**overrides):
+                        cache.clear()
+                        if async_views:
+                            latencies, elapsed = asyncio.run(self.run_async(url, headers, logged_in, count, concurrency))
+                        else:
+                            latencies, elapsed = self.run_sync(url, headers, logged_in, count, concurrency)
+                    self.report(mode, label, latencies, elapsed)
+        self.reload_urls()
+
+    def reload_urls(self):
+        # The URLconfs pick sync or async views when they are imported
+        for module in URLCONF_MODULES:
+            importlib.reload(importlib.import_module(module))
+        clear_url_caches()
+
+    def pages(self):
+        # The anonymous page is measured as rendered and as served from the page cache
+        pages = [
+            ('home (anon, render)', reverse('home'), {}, False, {'ANON_PAGE_CACHE_TIMEOUT': 0}),
+            ('home (anon, cached)', reverse('home'), {}, False, {}),
+        ]
+        if self.user:
+            pages.append(('home (logged in)', reverse('home'), {}, True, {}))
+            tournament = Tournament.objects.filter(is_active=True).first()
+            team = Team.objects.first()
+            if tournament and team:
+                pages.append((
+                    'check team',
+                    f"{reverse('check_team_availability', args=[tournament.id])}?team_id={team.id}",
+                    {'X-Requested-With': 'XMLHttpRequest'},
+                    True,
+                    {},
+                ))
+        return pages
+
+    def client(self, client_class, logged_in):
+        client = client_class()
+        if logged_in:
+            client.force_login(self.user)
+        return client
+
+    def run_sync(self, url, headers, logged_in, count, concurrency):
+        """A pool of worker threads, like a threaded WSGI server"""
+        local = threading.local()
+
+        def fetch(_):
+            if not hasattr(local, 'client'):
+                local.client = self.client(Client, logged_in)
+            started = time.perf_counter()
+            local.client.get(url, headers=headers)
+            return time.perf_counter() - started
+
+        self.client(Client, logged_in).get(url, headers=headers)  # warm up
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            latencies = list(pool.map(fetch, range(count)))
+        return latencies, time.perf_counter() - started
+
+    async def run_async(self, url, headers, logged_in, count, concurrency):
+        """Many requests in flight on one event loop"""
+        client = await asyncio.to_thread(self.client, AsyncClient, logged_in)
+        limit = asyncio.Semaphore(concurrency)
+
+        async def fetch():
+            async with limit:
+                started = time.perf_counter()
+                await client.get(url, headers=headers)
+                return time.perf_counter() - started
+
+        await client.get(url, headers=headers)  # warm up
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(fetch() for _ in range(count)))
+        return latencies, time.perf_counter() - started
+
+    def report(self, mode, label, latencies, elapsed):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+        self.stdout.write(
+            f"{mode:<11} {label:<20} {len(latencies) / elapsed:8.1f} req/s  "
+            f"p50={statistics.median(latencies) * 1000:.1f}ms  p95={p95 * 1000:.1f}ms"
+        )
@@ -0,0 +1,55 @@
+# core/management/commands/bench_autocomplete.py
+import random
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.autocomplete import AUTOCOMPLETE_SOURCES, PrefixIndex
+from core.views import database_autocomplete_results
+
+
+class Command(BaseCommand):
+    help = "Time player autocomplete lookups: in-process prefix index against the database fallback"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lookups', type=int, default=2000, help='Prefix lookups per path')
+        parser.add_argument('--limit', type=int, default=10)
+
+    def handle(self, *args, **options):
+        rows = list(AUTOCOMPLETE_SOURCES['player']())
+        if not rows:
+            raise CommandError("No players to index (bench_search --populate N adds some)")
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        index = PrefixIndex(rows)
+        build = time.perf_counter() - started
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.stdout.write(f"{len(index)} players indexed in {build * 1000:.0f}ms, ~{memory / 2 ** 20:.1f} MB")
+
+        labels = [label for _, label in rows]
+        prefixes = [label[:random.randint(1, 4)] for label in random.choices(labels, k=options['lookups'])]
+        limit = options['limit']
+
+        indexed = self.time_lookups(lambda prefix: index.search(prefix, limit), prefixes)
+        # What the view does while the index is cold
+        database = self.time_lookups(
+            lambda prefix: database_autocomplete_results('player', prefix, limit), prefixes[:200]
+        )
+
+        for label, timings in (('prefix index', indexed), ('database', database)):
+            self.stdout.write(
+                f"  {label:<13} median={statistics.median(timings) * 1e6:9.1f}us  "
+                f"p99={sorted(timings)[int(len(timings) * 0.99) - 1] * 1e6:9.1f}us  ({len(timings)} lookups)"
+            )
+
+    def time_lookups(self, lookup, prefixes):
+        timings = []
+        for prefix in prefixes:
+            started = time.perf_counter()
+            lookup(prefix)
+            timings.append(time.perf_counter() - started)
+        return timings
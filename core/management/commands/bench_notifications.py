@@ -0,0 +1,70 @@
+# core/management/commands/bench_notifications.py
+import time
+
+from django.core.mail import send_mail
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from accounts.models import User
+from core.mail_sink import LocalSMTPSink
+from core.models import Notification, Task
+from core.notifications import deliver_notification_emails, notify
+
+BENCH_PREFIX = 'notify_bench_'
+
+
+class Command(BaseCommand):
+    help = (
+        "Email N players through a local debugging SMTP server: one connection "
+        "per message (the naive way) against the batched notification delivery"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=2000)
+        parser.add_argument('--naive', type=int, default=300, help='Messages sent one connection each')
+        parser.add_argument('--connections', type=int, default=1, help='NOTIFICATION_SMTP_CONNECTIONS')
+        parser.add_argument('--latency', type=float, default=0, help='Milliseconds the sink waits before each reply')
+
+    def handle(self, *args, **options):
+        players = self.bench_players(options['players'])
+        with LocalSMTPSink(latency=options['latency'] / 1000) as sink, override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=sink.port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='', TASKS_EAGER=False,
+            NOTIFICATION_SMTP_CONNECTIONS=options['connections'],
+        ):
+            started = time.perf_counter()
+            for player in players[:options['naive']]:
+                send_mail("Payment confirmed for Bench Cup", "You're now officially in the tournament!",
+                          None, [player.email])
+            self.report('one connection each', options['naive'], time.perf_counter() - started, sink)
+
+            sink.messages.clear()
+            sink.connections = 0
+            started = time.perf_counter()
+            notify([player.pk for player in players], 'bench', "Payment confirmed for Bench Cup")
+            written = time.perf_counter() - started
+            # Two events for the same players coalesce into one email each
+            notify([player.pk for player in players], 'bench', "Bench Cup: round 1 is scheduled")
+            result = deliver_notification_emails()
+            total = time.perf_counter() - started
+            self.stdout.write(f"  in-app rows: {len(players) * 2} written in {written * 2 * 1000:.0f}ms")
+            self.report(f"batched ({result['notifications']} notices)", result['emails'], total, sink)
+
+        Notification.objects.filter(kind='bench').delete()
+        Task.objects.filter(name=deliver_notification_emails.task_name, status=Task.QUEUED).delete()
+
+    def report(self, label, count, elapsed, sink):
+        self.stdout.write(
+            f"  {label:<28} {count:>6} emails  {elapsed:7.2f}s  {count / elapsed:8.0f} emails/s  "
+            f"{sink.connections} SMTP connections, {len(sink.messages)} received"
+        )
+
+    def bench_players(self, count):
+        existing = User.objects.filter(username__startswith=BENCH_PREFIX).count()
+        if existing < count:
+            User.objects.bulk_create([
+                User(username=f"{BENCH_PREFIX}{index}", email=f"{BENCH_PREFIX}{index}@example.com", password='!')
+                for index in range(existing, count)
+            ], batch_size=1000)
+        return list(User.objects.filter(username__startswith=BENCH_PREFIX).order_by('id')[:count])
@@ -0,0 +1,73 @@
+# core/management/commands/bench_pages.py
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from accounts.models import User
+from tournaments.models import Tournament
+
+
+class Command(BaseCommand):
+    help = "Render the main pages repeatedly and report latency for the current settings profile"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=100, help='Requests per page')
+        parser.add_argument('--username', help='Also benchmark authenticated pages as this user')
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else 'localhost'
+        if host.startswith('.') or host == '*':
+            host = 'localhost'
+
+        pages = [
+            ('home (anonymous)', Client(HTTP_HOST=host), reverse('home')),
+            ('login', Client(HTTP_HOST=host), reverse('login')),
+            ('register', Client(HTTP_HOST=host), reverse('register')),
+        ]
+
+        if options['username']:
+            try:
+                user = User.objects.get(username=options['username'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['username']}' does not exist")
+            client = Client(HTTP_HOST=host)
+            client.force_login(user)
+            pages.append(('home (logged in)', client, reverse('home')))
+            tournament = Tournament.objects.filter(is_active=True).first()
+            if tournament and not user.is_admin:
+                pages.append((
+                    'tournament register',
+                    client,
+                    reverse('tournament_register', args=[tournament.id]),
+                ))
+
+        self.stdout.write(
+            f"Profile: {settings.GOAL_FEVER_ENV} (DEBUG={settings.DEBUG}, "
+            f"CONN_MAX_AGE={settings.DATABASES['default'].get('CONN_MAX_AGE')})"
+        )
+        for label, client, url in pages:
+            # Warm up once so the first compile is not counted
+            client.get(url)
+            queries = []
+            with connection.execute_wrapper(self._count_query(queries)):
+                response = client.get(url)
+            started = time.perf_counter()
+            for _ in range(count):
+                client.get(url)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label:<22} status={response.status_code} queries={len(queries):<3} "
+                f"mean={elapsed / count * 1000:.2f}ms  {count / elapsed:.1f} req/s"
+            )
+
+    @staticmethod
+    def _count_query(queries):
+        def wrapper(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+        return wrapper
@@ -0,0 +1,93 @@
+# core/management/commands/bench_search.py
+import random
+import statistics
+import string
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+from core.search import FTS5SearchBackend, LikeSearchBackend
+from tournaments.models import Team, Tournament, TournamentRegistration, recount_registrations
+
+BENCH_TOURNAMENT = 'Search bench'
+BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the registration admin search (COUNT + first page) through the "
+        "LIKE path and through the FTS5 index"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--populate', type=int, default=0,
+                            help=f"First add this many players registered to a '{BENCH_TOURNAMENT}' tournament")
+        parser.add_argument('--repeat', type=int, default=20, help='Runs per search term and backend')
+        parser.add_argument('terms', nargs='*', help='Search terms (default: a few sampled from the data)')
+
+    def handle(self, *args, **options):
+        fts = FTS5SearchBackend()
+        if not fts.is_ready('default'):
+            raise CommandError("No FTS5 search tables on this database (run migrate on SQLite with FTS5)")
+        if options['populate']:
+            self.populate(options['populate'])
+
+        registrations = TournamentRegistration.objects.all()
+        total = registrations.count()
+        terms = options['terms'] or self.sample_terms()
+        self.stdout.write(f"{total} registrations, {options['repeat']} runs per term")
+        for term in terms:
+            for label, backend in (('like', LikeSearchBackend()), ('fts5', fts)):
+                timings = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    results = backend.filter(registrations, 'registration', term)
+                    found = results.count()
+                    list(results.order_by('-id')[:100])
+                    timings.append(time.perf_counter() - started)
+                self.stdout.write(
+                    f"  {term!r:<16} {label:<5} {found:>7} found  "
+                    f"median={statistics.median(timings) * 1000:8.2f}ms  max={max(timings) * 1000:8.2f}ms"
+                )
+
+    def sample_terms(self):
+        sample = TournamentRegistration.objects.select_related('player').order_by('?').first()
+        if sample is None:
+            raise CommandError("No registrations to search; pass --populate N")
+        return [sample.player.username[:6], sample.transaction_id[-5:] or 'TX', 'bench', 'zzzq']
+
+    def populate(self, count):
+        now = timezone.now()
+        tournament, _ = Tournament.objects.get_or_create(
+            name=BENCH_TOURNAMENT,
+            defaults={
+                'description': 'Synthetic rows for bench_search', 'start_date': now,
+                'end_date': now + timedelta(days=30), 'registration_deadline': now,
+                'entry_fee': 0, 'max_teams': 1_000_000, 'status': 'completed', 'is_active': False,
+            },
+        )
+        teams = list(Team.objects.all()[:32]) or [Team.objects.create(name='Bench FC', country='Bench')]
+        offset = User.objects.filter(username__startswith='bench_').count()
+        letters = string.ascii_lowercase
+        self.stdout.write(f"Adding {count} players and registrations...")
+        for start in range(offset, offset + count, BATCH_SIZE):
+            stop = min(start + BATCH_SIZE, offset + count)
+            with transaction.atomic():
+                players = User.objects.bulk_create([
+                    User(username=f"bench_{''.join(random.choices(letters, k=5))}{index}", password='!')
+                    for index in range(start, stop)
+                ])
+                TournamentRegistration.objects.bulk_create([
+                    TournamentRegistration(
+                        player=player, tournament=tournament, selected_team=random.choice(teams),
+                        status=TournamentRegistration.SUBMITTED, payment_method='bkash',
+                        transaction_id=''.join(random.choices(string.ascii_uppercase + string.digits, k=10)),
+                        mobile_number=f"017{random.randrange(10 ** 8):08d}",
+                    )
+                    for player in players
+                ])
+        recount_registrations([tournament.pk])
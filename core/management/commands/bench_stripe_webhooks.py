@@ -0,0 +1,55 @@
+# core/management/commands/bench_stripe_webhooks.py
+import json
+import time
+
+import stripe
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from payments.tasks import process_stripe_events
+from payments.views import stripe_webhook
+
+SECRET = 'whsec_bench'
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the Stripe webhook (signature check + inbox insert) for new and "
+        "duplicate events, then the worker draining the inbox (rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = options['events']
+        factory = RequestFactory()
+        timestamp = int(time.time())
+        requests = []
+        for index in range(count):
+            payload = json.dumps({
+                'id': f'evt_bench_{timestamp}_{index}', 'object': 'event', 'type': 'checkout.session.completed',
+                'data': {'object': {'id': f'cs_bench_{index}', 'payment_status': 'paid'}},
+            })
+            signature = stripe.WebhookSignature._compute_signature(f"{timestamp}.{payload}", SECRET)
+            requests.append(factory.post(
+                '/payments/stripe/webhook/', payload, content_type='application/json',
+                headers={'Stripe-Signature': f"t={timestamp},v1={signature}"},
+            ))
+
+        with override_settings(STRIPE_WEBHOOK_SECRET=SECRET, TASKS_EAGER=False), transaction.atomic():
+            for label in ('new', 'duplicate'):
+                started = time.perf_counter()
+                for request in requests:
+                    stripe_webhook(request)
+                self.report(f'webhook, {label} events', count, time.perf_counter() - started)
+            started = time.perf_counter()
+            result = process_stripe_events()
+            self.report(f"worker ({result['handled']} handled)", count, time.perf_counter() - started)
+            transaction.set_rollback(True)
+
+    def report(self, label, count, elapsed):
+        self.stdout.write(f"  {label:<28} {count:>6} in {elapsed:6.2f}s  {count / elapsed:8.0f}/s  "
+                          f"{elapsed / count * 1e6:7.0f}us each")
@@ -0,0 +1,75 @@
+# core/management/commands/bench_verification.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from payments.mock_provider import MockPaymentProvider
+from payments.verification import verify_payments
+from tournaments.models import Team, Tournament, TournamentRegistration, recount_registrations
+
+BENCH_PREFIX = 'verify_bench_'
+
+
+class Command(BaseCommand):
+    help = (
+        "Verify N submitted bKash payments against a local mock provider at "
+        "several concurrency limits (every run is rolled back)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payments', type=int, default=3000)
+        parser.add_argument('--latency', type=float, default=20, help='Milliseconds the provider takes per lookup')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50, 100])
+
+    def handle(self, *args, **options):
+        count = options['payments']
+        with MockPaymentProvider(latency=options['latency'] / 1000) as provider:
+            self.stdout.write(f"{count} pending payments, provider latency {options['latency']:.0f}ms")
+            for concurrency in options['concurrency']:
+                if concurrency == 1 and count * options['latency'] > 120_000:
+                    self.stdout.write("  concurrency    1: skipped (over two minutes)")
+                    continue
+                verification = {
+                    **settings.PAYMENT_VERIFICATION, 'CONCURRENCY': concurrency,
+                    'CLIENT': 'payments.http.StdlibHTTPClient', 'PROVIDERS': {'bKash': {'URL': provider.url, 'TOKEN': ''}},
+                }
+                with override_settings(PAYMENT_VERIFICATION=verification, TASKS_EAGER=False), transaction.atomic():
+                    self.populate(count, provider)
+                    counts = verify_payments()
+                    transaction.set_rollback(True)
+                self.stdout.write(
+                    f"  concurrency {concurrency:>4}: lookups {counts['lookup_seconds']:7.2f}s "
+                    f"({count / counts['lookup_seconds']:7.0f}/s), with confirmations {counts['seconds']:7.2f}s  "
+                    f"{counts['connections']} connections, {counts.get('verified', 0)} verified"
+                )
+
+    def populate(self, count, provider):
+        now = timezone.now()
+        tournament = Tournament.objects.create(
+            name=f'{BENCH_PREFIX}{now.timestamp()}', description='', start_date=now,
+            end_date=now + timedelta(days=30), registration_deadline=now + timedelta(days=1),
+            entry_fee=150, max_teams=count, is_active=False,
+        )
+        players = User.objects.bulk_create([
+            User(username=f'{BENCH_PREFIX}{index}', password='!') for index in range(count)
+        ])
+        teams = Team.objects.bulk_create([
+            Team(name=f'{BENCH_PREFIX}{index}', country='Bench') for index in range(count)
+        ])
+        TournamentRegistration.objects.bulk_create([
+            TournamentRegistration(
+                player=player, tournament=tournament, selected_team=team,
+                status=TournamentRegistration.SUBMITTED, payment_method='bKash',
+                transaction_id=f'TX{index:08d}', mobile_number=f'017{index:08d}', payment_date=now,
+            )
+            for index, (player, team) in enumerate(zip(players, teams))
+        ])
+        recount_registrations([tournament.pk])
+        provider.transactions.clear()
+        for index in range(count):
+            provider.add(f'TX{index:08d}', 150, f'+88017{index:08d}')
@@ -0,0 +1,43 @@
+# core/management/commands/bootstrap_tournament.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tournaments.models import Tournament
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the default tournament the home page advertises, unless one with "
+        "that name exists. Safe to run on every deploy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--name', default='WORLD CUP 2026')
+        parser.add_argument('--description', default='International Football Tournament 2026')
+        parser.add_argument('--max-teams', type=int, default=32)
+        parser.add_argument('--entry-fee', default='150.00')
+        parser.add_argument('--starts-in-days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        start = now + timedelta(days=options['starts_in_days'])
+        # unique_tournament_name makes concurrent runs end up with one row
+        tournament, created = Tournament.objects.get_or_create(
+            name=options['name'],
+            defaults={
+                'description': options['description'],
+                'start_date': start,
+                'end_date': start + timedelta(days=30),
+                'registration_deadline': start - timedelta(days=15),
+                'max_teams': options['max_teams'],
+                'entry_fee': options['entry_fee'],
+                'status': 'upcoming',
+                'is_active': True,
+            },
+        )
+        if created:
+            self.stdout.write(self.style.SUCCESS(f"Created {tournament.name} (#{tournament.pk})"))
+        else:
+            self.stdout.write(f"{tournament.name} (#{tournament.pk}) already exists")
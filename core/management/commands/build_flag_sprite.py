@@ -0,0 +1,31 @@
+# core/management/commands/build_flag_sprite.py
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments.flags import build_sprite, fetch_flag, sprite_codes
+
+
+class Command(BaseCommand):
+    help = "Download team flags once and pack them into a local static sprite sheet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', default=None,
+            help='URL template with {code} or a directory of <code>.png files (default: FLAG_SOURCE)',
+        )
+        parser.add_argument('--out', default=None, help='Output directory (default: FLAG_SPRITE_DIR)')
+
+    def handle(self, *args, **options):
+        source = options['source'] or settings.FLAG_SOURCE
+        images = {}
+        for code in sprite_codes():
+            try:
+                images[code] = fetch_flag(source, code)
+            except OSError as e:
+                self.stderr.write(f"  missing {code}: {e}")
+        if not images:
+            raise CommandError(f"No flags could be fetched from {source}")
+
+        manifest = build_sprite(images, options['out'] or settings.FLAG_SPRITE_DIR, tuple(settings.FLAG_CELL_SIZE))
+        width, height = manifest['size']
+        self.stdout.write(self.style.SUCCESS(f"{len(images)} flags packed into {width}x{height} sprite"))
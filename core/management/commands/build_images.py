@@ -0,0 +1,29 @@
+# core/management/commands/build_images.py
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.images import available_formats, build_images, find_source_images
+
+
+class Command(BaseCommand):
+    help = "Build resized WebP/AVIF/PNG variants of static/images for the responsive_image tag"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true', help='Rebuild images even if unchanged')
+
+    def handle(self, *args, **options):
+        source_dir = os.path.join(settings.BASE_DIR, 'static', 'images')
+        sources = list(find_source_images(source_dir))
+        built, skipped = build_images(
+            sources,
+            settings.IMAGE_BUILD_DIR,
+            workers=options['workers'],
+            force=options['force'],
+        )
+        self.stdout.write(f"Formats: {', '.join(available_formats())}")
+        for name in built:
+            self.stdout.write(f"  built   {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(built)} built, {len(skipped)} unchanged"))
@@ -0,0 +1,47 @@
+# core/management/commands/dedupe_media.py
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.storage import (
+    file_field_references,
+    is_blob_name,
+    is_content_addressed,
+    repoint_media_references,
+)
+
+
+class Command(BaseCommand):
+    help = "Move existing media into content-addressed storage, storing duplicate files once"
+
+    def handle(self, *args, **options):
+        if not is_content_addressed(default_storage):
+            raise CommandError("The default storage is not content addressed")
+
+        names = set()
+        for model, field_name in file_field_references():
+            names.update(
+                model._default_manager.exclude(**{field_name: ''}).exclude(**{field_name: None})
+                .values_list(field_name, flat=True).distinct()
+            )
+
+        legacy = sorted(name for name in names if not is_blob_name(name) and default_storage.exists(name))
+        before = after = 0
+        blobs = set()
+        for name in legacy:
+            before += default_storage.size(name)
+            with default_storage.open(name, 'rb') as handle:
+                new_name = default_storage.save(name, File(handle))
+            with transaction.atomic():
+                rows = repoint_media_references(name, new_name)
+            default_storage.delete_blob(name)
+            if new_name not in blobs:
+                blobs.add(new_name)
+                after += default_storage.size(new_name)
+            self.stdout.write(f"  {name} -> {new_name} ({rows} rows)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Migrated {len(legacy)} files into {len(blobs)} blobs: "
+            f"{before / 1024:.1f} KB -> {after / 1024:.1f} KB"
+        ))
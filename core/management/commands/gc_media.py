@@ -0,0 +1,68 @@
+# core/management/commands/gc_media.py
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.storage import is_blob_name, is_content_addressed, media_reference_counts
+from core.thumbnails import thumbnail_name
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed media blobs that no row references any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+        parser.add_argument(
+            '--grace', type=int, default=settings.MEDIA_GC_GRACE_SECONDS,
+            help='Keep unreferenced blobs younger than this many seconds (in-flight uploads)',
+        )
+
+    def handle(self, *args, **options):
+        if not is_content_addressed(default_storage):
+            raise CommandError("The default storage is not content addressed")
+
+        counts = media_reference_counts()
+        cutoff = time.time() - options['grace']
+        kept = deleted = freed = 0
+
+        for name in self.stored_files():
+            path = default_storage.path(name)
+            if name.startswith('tmp/'):
+                # Leftovers of interrupted uploads
+                if os.path.getmtime(path) < cutoff:
+                    freed += self.remove(name, path, options['dry_run'])
+                continue
+            if not is_blob_name(name):
+                continue
+            if counts[name] or os.path.getmtime(path) >= cutoff:
+                kept += 1
+                continue
+            deleted += 1
+            freed += self.remove(name, path, options['dry_run'])
+            for size in settings.THUMBNAIL_SIZES.values():
+                thumb = thumbnail_name(name, size)
+                if default_storage.exists(thumb):
+                    freed += self.remove(thumb, default_storage.path(thumb), options['dry_run'])
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {deleted} unreferenced blobs ({freed / 1024:.1f} KB), kept {kept} "
+            f"({sum(counts.values())} references)"
+        ))
+
+    def stored_files(self):
+        root = default_storage.location
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                yield os.path.relpath(os.path.join(directory, filename), root).replace(os.sep, '/')
+
+    def remove(self, name, path, dry_run):
+        size = os.path.getsize(path)
+        if dry_run:
+            self.stdout.write(f"  would delete {name}")
+        else:
+            default_storage.delete_blob(name)
+        return size
@@ -0,0 +1,63 @@
+# core/management/commands/process_media.py
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from accounts.models import User
+from core.thumbnails import process_upload, thumbnail_name
+from tournaments.models import Match
+
+
+def _process(name):
+    try:
+        process_upload(name)
+        return name, None
+    except Exception as exc:
+        return name, str(exc)
+
+
+class Command(BaseCommand):
+    help = "Strip EXIF, cap dimensions and build thumbnails for existing profile pictures and match screenshots"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--force', action='store_true', help='Reprocess images that already have thumbnails')
+
+    def handle(self, *args, **options):
+        names = set(
+            User.objects.exclude(profile_picture='').exclude(profile_picture=None)
+            .values_list('profile_picture', flat=True)
+        )
+        names |= set(
+            Match.objects.exclude(screenshot='').exclude(screenshot=None)
+            .values_list('screenshot', flat=True)
+        )
+        pending = sorted(
+            name for name in names
+            if default_storage.exists(name) and (options['force'] or not self._has_thumbnails(name))
+        )
+        self.stdout.write(f"{len(pending)} of {len(names)} images need processing")
+
+        failed = 0
+        # Forked workers write (repoint_media_references) and must open their
+        # own connections rather than share the parent's SQLite handle
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            for future in as_completed([pool.submit(_process, name) for name in pending]):
+                name, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f"  failed  {name}: {error}")
+                else:
+                    self.stdout.write(f"  done    {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(pending) - failed} processed, {failed} failed"))
+
+    @staticmethod
+    def _has_thumbnails(name):
+        return all(
+            default_storage.exists(thumbnail_name(name, size))
+            for size in settings.THUMBNAIL_SIZES.values()
+        )
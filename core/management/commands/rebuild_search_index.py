@@ -0,0 +1,23 @@
+# core/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from core.search import get_search_backend, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Refill the FTS5 search tables from teams, players and registrations"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options['database']
+        backend = get_search_backend()
+        if not hasattr(backend, 'is_ready') or not backend.is_ready(using):
+            raise CommandError("No FTS5 search tables on this database (run migrate on SQLite with FTS5)")
+        with transaction.atomic(using=using):
+            counts = rebuild_search_index(using)
+        for index, rows in counts.items():
+            self.stdout.write(f"  {index}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt"))
@@ -0,0 +1,18 @@
+# core/management/commands/reconcile_counters.py
+from django.core.management.base import BaseCommand
+
+from tournaments.models import recount_registrations
+
+
+class Command(BaseCommand):
+    help = "Recompute Tournament registration counters from TournamentRegistration and fix any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament_ids', nargs='*', type=int, help='Only these tournaments (default: all)')
+
+    def handle(self, *args, **options):
+        drifted = recount_registrations(options['tournament_ids'] or None)
+        for tournament, diff in drifted:
+            changes = ', '.join(f"{column} {stored} -> {actual}" for column, (stored, actual) in diff.items())
+            self.stdout.write(f"  {tournament.name} (#{tournament.pk}): {changes}")
+        self.stdout.write(self.style.SUCCESS(f"{len(drifted)} tournament(s) reconciled"))
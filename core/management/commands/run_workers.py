@@ -0,0 +1,44 @@
+# core/management/commands/run_workers.py
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.taskqueue import release_expired_leases, start_workers
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background task workers (core.Task) in threads. For more CPU, "
+        "start the command once per core; workers never claim the same task."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=2, help='Worker threads in this process')
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when idle')
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        released = release_expired_leases()
+        if released:
+            self.stdout.write(f"Re-queued {released} task(s) with expired leases")
+
+        started = time.perf_counter()
+        threads, stop_event = start_workers(
+            options['threads'], options['poll_interval'], options['burst'], prefix=prefix,
+        )
+        self.stdout.write(f"{len(threads)} worker thread(s) running as {prefix}")
+
+        def stop(signum, frame):
+            self.stdout.write("Stopping after the running tasks finish...")
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGTERM, stop)
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(0.5)
+        self.stdout.write(self.style.SUCCESS(f"Workers stopped after {time.perf_counter() - started:.1f}s"))
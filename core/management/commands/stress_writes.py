@@ -0,0 +1,94 @@
+# core/management/commands/stress_writes.py
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.utils import timezone
+
+from accounts.models import User
+from core.db import is_lock_error, run_serialized_write
+from tournaments.models import Team, Tournament, TournamentRegistration
+
+STRESS_PREFIX = '__stress__'
+
+
+class Command(BaseCommand):
+    help = "Hammer the database with concurrent registration writes and count lock errors"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--rate', type=int, default=200, help='Target writes per second (all threads)')
+        parser.add_argument('--seconds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        per_thread_interval = threads / options['rate']
+        deadline = time.monotonic() + options['seconds']
+
+        tournament, team, players = self._setup(threads)
+        stats = {'writes': 0, 'lock_errors': 0, 'other_errors': 0}
+        stats_lock = threading.Lock()
+
+        def worker(player):
+            try:
+                next_at = time.monotonic()
+                while time.monotonic() < deadline:
+                    try:
+                        registration = run_serialized_write(
+                            TournamentRegistration.objects.create,
+                            player=player, tournament=tournament, selected_team=team,
+                        )
+                        run_serialized_write(registration.delete)
+                        key = 'writes'
+                    except OperationalError as exc:
+                        key = 'lock_errors' if is_lock_error(exc) else 'other_errors'
+                    with stats_lock:
+                        stats[key] += 1
+                    next_at += per_thread_interval
+                    time.sleep(max(0, next_at - time.monotonic()))
+            finally:
+                connection.close()
+
+        self.stdout.write(
+            f"{threads} threads, target {options['rate']} writes/s for {options['seconds']}s "
+            f"(SQLITE_SERIALIZE_WRITES={settings.SQLITE_SERIALIZE_WRITES})"
+        )
+        started = time.monotonic()
+        pool = [threading.Thread(target=worker, args=(player,)) for player in players]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        self._cleanup()
+        self.stdout.write(
+            f"writes={stats['writes']} ({stats['writes'] / elapsed:.1f}/s) "
+            f"lock_errors={stats['lock_errors']} other_errors={stats['other_errors']}"
+        )
+
+    def _setup(self, threads):
+        self._cleanup()
+        now = timezone.now()
+        tournament = Tournament.objects.create(
+            name=STRESS_PREFIX,
+            description='Temporary tournament for stress_writes',
+            start_date=now,
+            end_date=now,
+            registration_deadline=now,
+            entry_fee=0,
+            is_active=False,
+        )
+        team = Team.objects.create(name=STRESS_PREFIX, country=STRESS_PREFIX)
+        players = [
+            User.objects.create(username=f"{STRESS_PREFIX}{index}", is_player=True)
+            for index in range(threads)
+        ]
+        return tournament, team, players
+
+    def _cleanup(self):
+        Tournament.objects.filter(name=STRESS_PREFIX).delete()
+        Team.objects.filter(name=STRESS_PREFIX).delete()
+        User.objects.filter(username__startswith=STRESS_PREFIX).delete()
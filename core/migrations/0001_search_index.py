@@ -0,0 +1,38 @@
+# Generated by Django 4.2 on 2026-10-19 10:05
+
+from django.db import OperationalError, migrations
+
+from core.search import drop_search_schema_sql, rebuild_search_index, search_schema_sql
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return  # other databases keep the LIKE search
+    try:
+        for statement in search_schema_sql():
+            schema_editor.execute(statement)
+    except OperationalError:
+        # SQLite built without FTS5 or older than 3.34 (no trigram tokenizer)
+        for statement in drop_search_schema_sql():
+            schema_editor.execute(statement)
+        return
+    rebuild_search_index(connection.alias)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in drop_search_schema_sql():
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_alter_user_is_player'),
+        ('tournaments', '0007_tournament_unique_name'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
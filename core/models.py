@@ -1,3 +1,108 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class Task(models.Model):
+    """A unit of background work, run by `manage.py run_workers` (see core.taskqueue)"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # Not before this time; retries move it forward with a backoff
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # A running task whose lease ran out (crashed worker) is queued again
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            # The claim query: oldest due task first
+            models.Index(fields=['run_at', 'id'], condition=models.Q(status='queued'), name='task_due_idx'),
+            models.Index(fields=['locked_until'], condition=models.Q(status='running'), name='task_lease_idx'),
+            models.Index(fields=['name', '-finished_at'], name='task_latency_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+    @property
+    def queue_latency(self):
+        """Seconds between becoming due and being picked up"""
+        if self.started_at:
+            return (self.started_at - self.run_at).total_seconds()
+        return None
+
+    @property
+    def run_time(self):
+        if self.started_at and self.finished_at:
+            return (self.finished_at - self.started_at).total_seconds()
+        return None
+
+
+class Notification(models.Model):
+    """In-app notice for a player; emailed in coalesced batches (see core.notifications)"""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=50)
+    title = models.CharField(max_length=200)
+    body = models.TextField(blank=True)
+    link = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+    # Set once the email batch carrying it went out (or the user has no address)
+    emailed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_user_idx'),
+            models.Index(fields=['id'], condition=models.Q(emailed_at__isnull=True), name='notification_unsent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.user_id}: {self.title}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    The one-off token of a submitted form and where its first submission
+    ended up, so a double tap replays that outcome (see core.idempotency)
+    """
+    PENDING = 'pending'
+    DONE = 'done'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (DONE, 'Done')]
+
+    key = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    # View name, for the duplicate counts
+    scope = models.CharField(max_length=100)
+    # The path the form was posted to; a token only replays there
+    path = models.CharField(max_length=200)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    redirect_to = models.TextField(blank=True)
+    # [level, text] pairs of the flash messages the first submission queued
+    messages = models.JSONField(default=list, blank=True)
+    # Repeated submissions absorbed
+    replays = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.scope} by {self.user_id} ({self.status}, {self.replays} replays)"
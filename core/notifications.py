@@ -0,0 +1,98 @@
+# core/notifications.py
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import Notification
+from .taskqueue import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+
+def notify(user_ids, kind, title, body='', link=''):
+    """
+    Write an in-app notification for every user (one INSERT per batch) and
+    schedule the email delivery. Deliveries are coalesced: everything that
+    arrives within NOTIFICATION_COALESCE_SECONDS goes out in one run, with
+    one email per user however many notices they got.
+    """
+    notifications = Notification.objects.bulk_create(
+        [Notification(user_id=user_id, kind=kind, title=title, body=body, link=link) for user_id in set(user_ids)]
+    )
+    if notifications:
+        enqueue(deliver_notification_emails, delay=settings.NOTIFICATION_COALESCE_SECONDS, unique=True)
+    return len(notifications)
+
+
+def notification_email(user, notifications):
+    if len(notifications) == 1:
+        subject = notifications[0].title
+    else:
+        subject = f"{len(notifications)} updates from Goal Fever"
+    lines = [f"Hi {user.username},", ""]
+    for notification in notifications:
+        lines.append(f"* {notification.title}")
+        if notification.body:
+            lines.append(f"  {notification.body}")
+        if notification.link:
+            lines.append(f"  {settings.SITE_URL}{notification.link}")
+    return EmailMessage(subject, "\n".join(lines), to=[user.email])
+
+
+@task(singleton=True)
+def deliver_notification_emails():
+    """
+    Email every unsent notification over NOTIFICATION_SMTP_CONNECTIONS
+    reused SMTP connections (one by default), in batches of
+    NOTIFICATION_EMAIL_BATCH_SIZE users. Each batch is marked sent once
+    send_messages returns, so a retry after a failure resends at most one batch.
+    A singleton: a run queued while a long one is sending waits for it
+    instead of emailing the same unsent rows again.
+    """
+    started = time.perf_counter()
+    sent = delivered = 0
+    connections = [get_connection() for _ in range(settings.NOTIFICATION_SMTP_CONNECTIONS)]
+    pool = ThreadPoolExecutor(len(connections)) if len(connections) > 1 else None
+    try:
+        for connection in connections:
+            connection.open()
+        while True:
+            unsent = Notification.objects.filter(emailed_at__isnull=True)
+            # Whole users per batch, so nobody's notices are split over two emails
+            user_ids = list(unsent.order_by('user_id').values_list('user_id', flat=True).distinct()[
+                :settings.NOTIFICATION_EMAIL_BATCH_SIZE
+            ])
+            if not user_ids:
+                break
+            pending = list(unsent.filter(user_id__in=user_ids).select_related('user').order_by('user_id', 'id'))
+            messages = []
+            for _, group in groupby(pending, key=lambda notification: notification.user_id):
+                group = list(group)
+                if group[0].user.email:
+                    messages.append(notification_email(group[0].user, group))
+            if pool is None:
+                sent += connections[0].send_messages(messages) or 0
+            else:
+                # SMTP waits a round trip per command; several connections overlap them
+                shares = [messages[index::len(connections)] for index in range(len(connections))]
+                sent += sum(count or 0 for count in pool.map(
+                    lambda connection, share: connection.send_messages(share), connections, shares
+                ))
+            Notification.objects.filter(pk__in=[notification.pk for notification in pending]).update(
+                emailed_at=timezone.now()
+            )
+            delivered += len(pending)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        for connection in connections:
+            connection.close()
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"Emailed {delivered} notifications as {sent} messages in {elapsed:.2f}s")
+    return {'notifications': delivered, 'emails': sent, 'seconds': round(elapsed, 3)}
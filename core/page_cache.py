@@ -0,0 +1,111 @@
+# core/page_cache.py
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.translation import get_language
+
+from .versions import aget_data_versions, get_data_versions
+
+PAGE_CACHE_KEY_PREFIX = 'anon_page:'
+# The only headers replayed from a cached page; cookies never are
+REPLAYED_HEADERS = ('Content-Type', 'Content-Language')
+
+
+def _cacheable_request(request):
+    """
+    A request without a session or flash-message cookie is an anonymous
+    visitor with nothing personal to show, so it can share a cached page.
+    Checked on the cookies alone: a hit never loads the session.
+    Query strings bypass the cache, so ?x=1, ?x=2, ... cannot fill the
+    cache shared with sessions and users and evict them.
+    """
+    if request.method not in ('GET', 'HEAD') or not settings.ANON_PAGE_CACHE_TIMEOUT:
+        return False
+    if request.META.get('QUERY_STRING'):
+        return False
+    return settings.SESSION_COOKIE_NAME not in request.COOKIES and CookieStorage.cookie_name not in request.COOKIES
+
+
+def _cacheable_response(request, response):
+    # A page that used the CSRF token or set a cookie belongs to one visitor
+    return (
+        request.method == 'GET'
+        and response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def _cache_key(request, versions):
+    # Host and path only; the varied header (Accept-Language) is get_language()
+    url = hashlib.md5(f"{request.scheme}://{request.get_host()}{request.path}".encode()).hexdigest()
+    stamp = '.'.join(str(versions[name]) for name in sorted(versions))
+    return f"{PAGE_CACHE_KEY_PREFIX}{url}:{get_language()}:{stamp}"
+
+
+def _replay(entry):
+    content, headers = entry
+    response = HttpResponse(content)
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+def _entry(response):
+    headers = {header: response[header] for header in REPLAYED_HEADERS if response.has_header(header)}
+    return response.content, headers
+
+
+def _finish(response):
+    # Shared caches must key on the cookies too, or a logged-in page could
+    # be served to anonymous visitors (and the other way around)
+    patch_vary_headers(response, ('Cookie', 'Accept-Language'))
+    patch_cache_control(response, max_age=settings.ANON_PAGE_CACHE_TIMEOUT)
+    return response
+
+
+def cache_anonymous_page(*version_names):
+    """
+    Cache the whole response for anonymous visitors for
+    ANON_PAGE_CACHE_TIMEOUT seconds. Bumping any of the named data versions
+    (see core.signals) makes the next request render a fresh page.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if not _cacheable_request(request):
+                    return await view_func(request, *args, **kwargs)
+                key = _cache_key(request, await aget_data_versions(*version_names))
+                entry = await cache.aget(key)
+                if entry is not None:
+                    return _finish(_replay(entry))
+                response = await view_func(request, *args, **kwargs)
+                if _cacheable_response(request, response):
+                    await cache.aset(key, _entry(response), settings.ANON_PAGE_CACHE_TIMEOUT)
+                    _finish(response)
+                return response
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+            key = _cache_key(request, get_data_versions(*version_names))
+            entry = cache.get(key)
+            if entry is not None:
+                return _finish(_replay(entry))
+            response = view_func(request, *args, **kwargs)
+            if _cacheable_response(request, response):
+                cache.set(key, _entry(response), settings.ANON_PAGE_CACHE_TIMEOUT)
+                _finish(response)
+            return response
+        return wrapper
+    return decorator
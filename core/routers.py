@@ -0,0 +1,127 @@
+# core/routers.py
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+# Set by @read_from_replica for the duration of a read-only view
+_replica_reads = ContextVar('replica_reads', default=False)
+# Set by ReplicaPinningMiddleware when this session wrote recently
+_pinned_to_primary = ContextVar('pinned_to_primary', default=False)
+# Set by the router whenever the current request writes
+_request_wrote = ContextVar('request_wrote', default=False)
+
+REPLICA_PIN_SESSION_KEY = '_replica_pinned_until'
+
+
+def replica_alias():
+    """Alias of the read replica, or None when no replica is configured"""
+    return getattr(settings, 'READ_REPLICA_ALIAS', None)
+
+
+class ReplicaRouter:
+    """
+    Send reads from views marked with @read_from_replica to the replica.
+
+    Everything else, and every write, goes to the primary database.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = replica_alias()
+        if alias and _replica_reads.get() and not _pinned_to_primary.get():
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _request_wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of the primary, so rows from either may be related
+        allowed = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in allowed and obj2._state.db in allowed:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema through replication
+        if db == replica_alias():
+            return False
+        return None
+
+
+def read_from_replica(view_func):
+    """Run the ORM reads of a read-only view against the replica"""
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            # The async ORM copies this context into its worker thread
+            token = _replica_reads.set(True)
+            try:
+                return await view_func(request, *args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        token = _replica_reads.set(True)
+        try:
+            return view_func(request, *args, **kwargs)
+        finally:
+            _replica_reads.reset(token)
+    return wrapper
+
+
+class ReplicaPinningMiddleware:
+    """
+    Read-your-writes stickiness: after a request writes, the session reads
+    from the primary for REPLICA_PIN_SECONDS so replication lag is never
+    visible to the user who made the change.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replica_alias():
+            return self.get_response(request)
+
+        pinned = request.session.get(REPLICA_PIN_SESSION_KEY, 0) > time.time()
+        pinned_token = _pinned_to_primary.set(pinned)
+        wrote_token = _request_wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _request_wrote.get():
+                request.session[REPLICA_PIN_SESSION_KEY] = time.time() + settings.REPLICA_PIN_SECONDS
+        finally:
+            _pinned_to_primary.reset(pinned_token)
+            _request_wrote.reset(wrote_token)
+        return response
+
+    async def __acall__(self, request):
+        if not replica_alias():
+            return await self.get_response(request)
+
+        # Loading the session may hit the database
+        pinned_until = await sync_to_async(request.session.get)(REPLICA_PIN_SESSION_KEY, 0)
+        pinned_token = _pinned_to_primary.set(pinned_until > time.time())
+        wrote_token = _request_wrote.set(False)
+        try:
+            response = await self.get_response(request)
+            if _request_wrote.get():
+                request.session[REPLICA_PIN_SESSION_KEY] = time.time() + settings.REPLICA_PIN_SECONDS
+        finally:
+            _pinned_to_primary.reset(pinned_token)
+            _request_wrote.reset(wrote_token)
+        return response
@@ -0,0 +1,215 @@
+# core/search.py
+import re
+from collections import namedtuple
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+from django.utils.text import smart_split, unescape_string_literal
+
+# table: FTS5 table (rowid = primary key of the source row)
+# columns: FTS5 columns, the first one is matched for prefix lookups
+# lookups: the same fields as ORM lookups, for the LIKE backend
+# select / source: where the columns are copied from, row id first
+SearchIndex = namedtuple('SearchIndex', 'table columns lookups select source')
+
+SEARCH_INDEXES = {
+    'team': SearchIndex(
+        'search_team',
+        ('name', 'country'),
+        ('name', 'country'),
+        ('id', 'name', 'country'),
+        'tournaments_team',
+    ),
+    'player': SearchIndex(
+        'search_player',
+        ('username', 'gaming_id'),
+        ('username', 'gaming_id'),
+        ('id', 'username', "COALESCE(gaming_id, '')"),
+        'accounts_user',
+    ),
+    'registration': SearchIndex(
+        'search_registration',
+        ('username', 'transaction_id', 'mobile_number', 'team'),
+        ('player__username', 'transaction_id', 'mobile_number', 'selected_team__name'),
+        ('r.id', 'u.username', "COALESCE(r.transaction_id, '')", "COALESCE(r.mobile_number, '')", 't.name'),
+        'tournaments_tournamentregistration r '
+        'JOIN accounts_user u ON u.id = r.player_id '
+        'JOIN tournaments_team t ON t.id = r.selected_team_id',
+    ),
+}
+
+# Keep the FTS tables in step with their source rows, including queryset
+# .update() calls and renames of the users/teams a registration shows.
+# (trigger name, table, event, index, WHERE on the source SELECT)
+SEARCH_TRIGGERS = [
+    ('search_team_ins', 'tournaments_team', 'INSERT', 'team', 'WHERE id = NEW.id'),
+    ('search_team_upd', 'tournaments_team', 'UPDATE OF name, country', 'team', 'WHERE id = NEW.id'),
+    ('search_player_ins', 'accounts_user', 'INSERT', 'player', 'WHERE id = NEW.id'),
+    ('search_player_upd', 'accounts_user', 'UPDATE OF username, gaming_id', 'player', 'WHERE id = NEW.id'),
+    ('search_registration_ins', 'tournaments_tournamentregistration', 'INSERT', 'registration',
+     'WHERE r.id = NEW.id'),
+    ('search_registration_upd', 'tournaments_tournamentregistration',
+     'UPDATE OF player_id, selected_team_id, transaction_id, mobile_number', 'registration', 'WHERE r.id = NEW.id'),
+    ('search_registration_team', 'tournaments_team', 'UPDATE OF name', 'registration',
+     'WHERE r.selected_team_id = NEW.id'),
+    ('search_registration_player', 'accounts_user', 'UPDATE OF username', 'registration',
+     'WHERE r.player_id = NEW.id'),
+]
+SEARCH_DELETE_TRIGGERS = [
+    ('search_team_del', 'tournaments_team', 'team'),
+    ('search_player_del', 'accounts_user', 'player'),
+    ('search_registration_del', 'tournaments_tournamentregistration', 'registration'),
+]
+
+# Shortest term the trigram tokenizer can look up
+MIN_INDEXED_TERM = 3
+
+
+def _copy_sql(spec, where=''):
+    return (
+        f"INSERT INTO {spec.table} (rowid, {', '.join(spec.columns)}) "
+        f"SELECT {', '.join(spec.select)} FROM {spec.source} {where}"
+    )
+
+
+def _refresh_sql(index, where):
+    """Statements that re-copy the source rows matched by `where` into the index"""
+    spec = SEARCH_INDEXES[index]
+    return [
+        f"DELETE FROM {spec.table} WHERE rowid IN (SELECT {spec.select[0]} FROM {spec.source} {where});",
+        _copy_sql(spec, where) + ';',
+    ]
+
+
+def search_schema_sql():
+    """CREATE statements for the FTS5 tables and their triggers"""
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {spec.table} USING fts5({', '.join(spec.columns)}, tokenize='trigram')"
+        for spec in SEARCH_INDEXES.values()
+    ]
+    for name, table, event, index, where in SEARCH_TRIGGERS:
+        body = ' '.join(_refresh_sql(index, where))
+        statements.append(f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN {body} END")
+    for name, table, index in SEARCH_DELETE_TRIGGERS:
+        statements.append(
+            f"CREATE TRIGGER IF NOT EXISTS {name} AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM {SEARCH_INDEXES[index].table} WHERE rowid = OLD.id; END"
+        )
+    return statements
+
+
+def drop_search_schema_sql():
+    names = [trigger[0] for trigger in SEARCH_TRIGGERS + SEARCH_DELETE_TRIGGERS]
+    return [f"DROP TRIGGER IF EXISTS {name}" for name in names] + [
+        f"DROP TABLE IF EXISTS {spec.table}" for spec in SEARCH_INDEXES.values()
+    ]
+
+
+def rebuild_search_index(using='default'):
+    """Refill every FTS table from its source rows; returns {index: rows}"""
+    counts = {}
+    with connections[using].cursor() as cursor:
+        for index, spec in SEARCH_INDEXES.items():
+            cursor.execute(f"DELETE FROM {spec.table}")
+            cursor.execute(_copy_sql(spec))
+            counts[index] = cursor.rowcount
+    return counts
+
+
+def search_terms(search_term):
+    """Split like the admin does: words, or "quoted phrases" """
+    terms = []
+    for bit in smart_split(search_term):
+        if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+            bit = unescape_string_literal(bit)
+        if bit:
+            terms.append(bit)
+    return terms
+
+
+# -----------------------------------------------------
+# Backends
+# -----------------------------------------------------
+class LikeSearchBackend:
+    """icontains / istartswith over the model fields; works on every database"""
+
+    def filter(self, queryset, index, search_term, prefix=False, field='pk'):
+        lookups = SEARCH_INDEXES[index].lookups
+        if field != 'pk':
+            lookups = [f'{field}__{lookup}' for lookup in lookups]
+        if prefix:
+            return queryset.filter(**{f'{lookups[0]}__istartswith': search_term.strip()})
+        terms = search_terms(search_term)
+        if not terms:
+            return queryset
+        return queryset.filter(reduce(and_, (
+            reduce(or_, (Q(**{f'{lookup}__icontains': term}) for lookup in lookups))
+            for term in terms
+        )))
+
+
+class FTS5SearchBackend(LikeSearchBackend):
+    """
+    Trigram FTS5 tables (see SEARCH_INDEXES) on SQLite: same substring
+    semantics as icontains, but answered from the index instead of scanning
+    every joined row. Terms shorter than three characters, and databases
+    without the tables, fall back to LIKE.
+    """
+
+    def __init__(self):
+        self._ready = {}
+
+    def is_ready(self, using):
+        if using not in self._ready:
+            connection = connections[using]
+            tables = connection.introspection.table_names() if connection.vendor == 'sqlite' else []
+            self._ready[using] = all(spec.table in tables for spec in SEARCH_INDEXES.values())
+        return self._ready[using]
+
+    def filter(self, queryset, index, search_term, prefix=False, field='pk'):
+        spec = SEARCH_INDEXES[index]
+        terms = [search_term.strip()] if prefix else search_terms(search_term)
+        if not terms or not self.is_ready(queryset.db) or any(len(term) < MIN_INDEXED_TERM for term in terms):
+            return super().filter(queryset, index, search_term, prefix, field)
+
+        if prefix:
+            if re.search(r'[%_\\]', terms[0]):
+                return super().filter(queryset, index, search_term, prefix, field)
+            sql = f"SELECT rowid FROM {spec.table} WHERE {spec.columns[0]} LIKE %s"
+            params = [terms[0] + '%']
+        else:
+            # Every term somewhere in the row, each one quoted as a literal string
+            sql = f"SELECT rowid FROM {spec.table} WHERE {spec.table} MATCH %s"
+            params = [' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)]
+        return queryset.filter(**{f'{field}__in': RawSQL(sql, params)})
+
+
+_backends = {}
+
+
+def get_search_backend():
+    path = settings.SEARCH_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
+
+
+class IndexedSearchMixin:
+    """
+    ModelAdmin mixin: the changelist search box goes through the search
+    backend. `search_index` names an entry of SEARCH_INDEXES and
+    `search_index_field` the relation to the indexed model ('pk' for itself).
+    """
+    search_index = None
+    search_index_field = 'pk'
+
+    def get_search_results(self, request, queryset, search_term):
+        if not self.search_index or not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        backend = get_search_backend()
+        return backend.filter(queryset, self.search_index, search_term, field=self.search_index_field), False
@@ -0,0 +1,39 @@
+# core/signals.py
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+from accounts.models import PlayerProfile
+from tournaments.models import Match, Schedule, Team, Tournament, TournamentRegistration
+from . import autocomplete
+from .versions import bump_data_version
+
+# Which home page fragments show data from which model; 'landing' is the
+# whole page as cached for anonymous visitors
+FRAGMENT_SOURCES = {
+    PlayerProfile: ('leaderboard',),
+    settings.AUTH_USER_MODEL: ('leaderboard', 'registrations'),
+    TournamentRegistration: ('registrations', 'landing'),
+    Team: ('registrations', 'landing'),
+    Tournament: ('schedules', 'landing'),
+    Schedule: ('schedules',),
+    Match: ('landing',),
+}
+
+
+def _bumper(names):
+    def bump(sender, **kwargs):
+        bump_data_version(*names)
+    return bump
+
+
+for model, names in FRAGMENT_SOURCES.items():
+    receiver = _bumper(names)
+    post_save.connect(receiver, sender=model, weak=False)
+    post_delete.connect(receiver, sender=model, weak=False)
+
+
+# Incremental updates of the in-process autocomplete indexes
+post_save.connect(autocomplete.team_saved, sender=Team)
+post_delete.connect(autocomplete.team_deleted, sender=Team)
+post_save.connect(autocomplete.user_saved, sender=settings.AUTH_USER_MODEL)
+post_delete.connect(autocomplete.user_deleted, sender=settings.AUTH_USER_MODEL)
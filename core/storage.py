@@ -0,0 +1,173 @@
+# core/storage.py
+import gzip
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+from collections import Counter
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip siblings are written without it
+    brotli = None
+
+# profile_pics/3f/3fa1...e9.jpg as written by ContentAddressedStorage
+BLOB_NAME_RE = re.compile(r'(^|/)([0-9a-f]{2})/\2[0-9a-f]{62}(\.\w+)?$')
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.txt', '.html', '.xml')
+
+
+class ManifestStaticStorage(ManifestStaticFilesStorage):
+    """Content-hashed static file names that fall back to the plain name for unknown files"""
+    manifest_strict = False
+
+
+class CompressedManifestStaticStorage(ManifestStaticStorage):
+    """
+    Also write .gz and .br siblings of compressible files during
+    collectstatic, for core.middleware.StaticFilesMiddleware to serve.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        # Templates only ever reference the hashed names
+        for name in sorted(set(self.hashed_files.values())):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                self.write_compressed(name)
+
+    def write_compressed(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as handle:
+            content = handle.read()
+        variants = [('.gz', gzip.compress(content, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', brotli.compress(content, quality=11)))
+        for suffix, compressed in variants:
+            # Skip variants that do not save at least 5%
+            if len(compressed) < len(content) * 0.95:
+                with open(path + suffix, 'wb') as handle:
+                    handle.write(compressed)
+            elif os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Media storage that names every upload after the SHA-256 of its content,
+    e.g. profile_pics/3f/3fa1...e9.jpg, so identical files are stored once.
+
+    Uploads are hashed in chunks while being written to a temporary file,
+    so memory use does not grow with the file size. Files in a thumbs/
+    directory are derived from an already hashed name and are stored
+    under the name they are given.
+
+    delete() is a no-op because a blob may be shared by many rows;
+    unreferenced blobs are removed by `manage.py gc_media`.
+    """
+    content_addressed = True
+    chunk_size = 64 * 1024
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is decided by the content in _save()
+        return name
+
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name)
+        if posixpath.basename(directory) == 'thumbs':
+            if self.exists(name):
+                os.remove(self.path(name))
+            return super()._save(name, content)
+
+        extension = posixpath.splitext(filename)[1].lower()
+        blob = BLOB_NAME_RE.search(name)
+        if blob:
+            # Re-saving a blob (e.g. a cleaned image): back to the upload_to root
+            directory = name[:blob.start()]
+        temp_dir = self.path('tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        handle, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks(self.chunk_size):
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+            hexdigest = digest.hexdigest()
+            final_name = posixpath.join(directory, hexdigest[:2], hexdigest + extension)
+            final_path = self.path(final_name)
+            if os.path.exists(final_path):
+                os.remove(temp_path)  # already stored: dedupe
+                # Fresh mtime: gc_media's grace period now covers the new row's commit
+                os.utime(final_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.chmod(temp_path, self.file_permissions_mode or 0o644)
+                os.replace(temp_path, final_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return final_name
+
+    def delete(self, name):
+        pass
+
+    def delete_blob(self, name):
+        """Remove a blob for real; only the garbage collector should call this"""
+        super().delete(name)
+
+
+def is_content_addressed(storage):
+    return getattr(storage, 'content_addressed', False)
+
+
+def is_blob_name(name):
+    return bool(BLOB_NAME_RE.search(name))
+
+
+def file_field_references():
+    """(model, field name) for every FileField/ImageField of installed models"""
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, models.FileField):
+                yield model, field.name
+
+
+def media_reference_counts():
+    """Counter of stored file name -> number of rows pointing at it"""
+    counts = Counter()
+    for model, field_name in file_field_references():
+        rows = (
+            model._default_manager.exclude(**{field_name: ''}).exclude(**{field_name: None})
+            .values(field_name).order_by().annotate(refs=models.Count('pk'))
+        )
+        for row in rows:
+            counts[row[field_name]] += row['refs']
+    return counts
+
+
+def repoint_media_references(old_name, new_name):
+    """Point every row that stores old_name at new_name instead"""
+    from accounts.cache import invalidate_cached_user
+
+    user_model = get_user_model()
+    updated = 0
+    for model, field_name in file_field_references():
+        rows = model._default_manager.filter(**{field_name: old_name})
+        # update() skips save(), which is what drops cached users
+        user_ids = list(rows.values_list('pk', flat=True)) if model is user_model else []
+        updated += rows.update(**{field_name: new_name})
+        for user_id in user_ids:
+            invalidate_cached_user(user_id)
+    return updated
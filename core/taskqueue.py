@@ -0,0 +1,188 @@
+# core/taskqueue.py
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from .db import run_serialized_write
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# name -> function, filled by @task as the apps' tasks modules are imported
+_registry = {}
+# Names of tasks that never run twice at the same time
+_singletons = set()
+# Due tasks looked at per claim attempt on databases without SKIP LOCKED
+CLAIM_CANDIDATES = 5
+
+
+def task(func=None, *, max_attempts=None, singleton=False):
+    """
+    Register a function as a task; call it later with enqueue(func, ...).
+    A singleton task is not claimed while another run of it is in progress,
+    so a run queued meanwhile starts after that one finishes.
+    """
+    def register(func):
+        func.task_name = f"{func.__module__}.{func.__name__}"
+        func.max_attempts = max_attempts or settings.TASK_MAX_ATTEMPTS
+        _registry[func.task_name] = func
+        if singleton:
+            _singletons.add(func.task_name)
+        return func
+    return register(func) if func else register
+
+
+def enqueue(func, args=(), kwargs=None, run_at=None, delay=None, unique=False):
+    """
+    Store a task (in the caller's transaction, so it only exists if that
+    commits). `delay` is a timedelta or seconds; `unique` skips it when the
+    same call is already queued. With TASKS_EAGER it runs right after commit.
+    """
+    kwargs = kwargs or {}
+    if settings.TASKS_EAGER:
+        transaction.on_commit(lambda: func(*args, **kwargs))
+        return None
+    if delay is not None:
+        run_at = timezone.now() + (delay if isinstance(delay, timedelta) else timedelta(seconds=delay))
+    if unique:
+        queued = Task.objects.filter(name=func.task_name, args=list(args), kwargs=kwargs, status=Task.QUEUED).first()
+        if queued:
+            return queued
+    return Task.objects.create(
+        name=func.task_name,
+        args=list(args),
+        kwargs=kwargs,
+        max_attempts=func.max_attempts,
+        run_at=run_at or timezone.now(),
+    )
+
+
+# -----------------------------------------------------
+# Worker side
+# -----------------------------------------------------
+def _due_tasks():
+    due = Task.objects.filter(status=Task.QUEUED, run_at__lte=timezone.now())
+    if _singletons:
+        running = Task.objects.filter(status=Task.RUNNING, name__in=_singletons).values('name')
+        due = due.exclude(name__in=running)
+    return due.order_by('run_at', 'id')
+
+
+def _running_fields(worker_id):
+    now = timezone.now()
+    return {
+        'status': Task.RUNNING,
+        'locked_by': worker_id,
+        'started_at': now,
+        'locked_until': now + timedelta(seconds=settings.TASK_LEASE_SECONDS),
+    }
+
+
+def claim_task(worker_id):
+    """
+    Take the oldest due task, or return None. SELECT ... FOR UPDATE SKIP
+    LOCKED where the database has it; on SQLite, whose writes are already
+    serialized, a conditional UPDATE on status is the claim.
+    """
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            claimed = _due_tasks().select_for_update(skip_locked=True).first()
+            if claimed is None:
+                return None
+            fields = _running_fields(worker_id)
+            Task.objects.filter(pk=claimed.pk).update(attempts=claimed.attempts + 1, **fields)
+    else:
+        claimed = None
+        for candidate, attempts in _due_tasks().values_list('id', 'attempts')[:CLAIM_CANDIDATES]:
+            fields = _running_fields(worker_id)
+            updated = run_serialized_write(
+                _due_tasks().filter(pk=candidate).update, attempts=attempts + 1, **fields
+            )
+            if updated:
+                claimed = Task(pk=candidate)
+                break
+        if claimed is None:
+            return None
+    claimed.refresh_from_db()
+    return claimed
+
+
+def release_expired_leases():
+    """Queue again the tasks of workers that died mid-run"""
+    return run_serialized_write(
+        Task.objects.filter(status=Task.RUNNING, locked_until__lt=timezone.now()).update,
+        status=Task.QUEUED, locked_by='', locked_until=None,
+    )
+
+
+def run_task(claimed):
+    """Run a claimed task and record the outcome; returns True on success"""
+    func = _registry.get(claimed.name)
+    try:
+        if func is None:
+            raise LookupError(f"Unknown task {claimed.name}")
+        result = func(*claimed.args, **claimed.kwargs)
+    except Exception:
+        logger.exception(f"Task {claimed} failed (attempt {claimed.attempts}/{claimed.max_attempts})")
+        fields = {'last_error': traceback.format_exc(), 'locked_by': '', 'locked_until': None}
+        if claimed.attempts < claimed.max_attempts and func is not None:
+            backoff = settings.TASK_RETRY_BACKOFF * 2 ** (claimed.attempts - 1)
+            fields.update(status=Task.QUEUED, run_at=timezone.now() + timedelta(seconds=backoff))
+        else:
+            fields.update(status=Task.FAILED, finished_at=timezone.now())
+        run_serialized_write(Task.objects.filter(pk=claimed.pk).update, **fields)
+        return False
+
+    run_serialized_write(
+        Task.objects.filter(pk=claimed.pk).update,
+        status=Task.DONE, finished_at=timezone.now(), result=result, locked_by='', locked_until=None,
+    )
+    return True
+
+
+def work(worker_id, stop_event, poll_interval=1.0, burst=False):
+    """
+    Worker loop: claim, run, repeat; sleep poll_interval when nothing is
+    due. `burst` returns once the queue is empty. Returns tasks processed.
+    """
+    processed = 0
+    try:
+        while not stop_event.is_set():
+            try:
+                claimed = claim_task(worker_id)
+            except DatabaseError:
+                # e.g. a lock held too long by another writer; try again shortly
+                logger.exception(f"{worker_id} could not claim a task")
+                stop_event.wait(poll_interval)
+                continue
+            if claimed is None:
+                if burst:
+                    break
+                release_expired_leases()
+                stop_event.wait(poll_interval)
+                continue
+            run_task(claimed)
+            processed += 1
+    finally:
+        connection.close()  # each worker thread has its own connection
+    return processed
+
+
+def start_workers(count, poll_interval=1.0, burst=False, prefix='worker'):
+    """Start `count` worker threads; returns (threads, stop_event)"""
+    stop_event = threading.Event()
+    threads = [
+        threading.Thread(
+            target=work, args=(f"{prefix}-{index}", stop_event, poll_interval, burst),
+            name=f"{prefix}-{index}", daemon=True,
+        )
+        for index in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads, stop_event
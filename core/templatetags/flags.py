@@ -0,0 +1,53 @@
+# core/templatetags/flags.py
+import os
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from tournaments.flags import SPRITE_MANIFEST_NAME, flag_cdn_url, load_sprite_manifest
+
+register = template.Library()
+
+# Sprite manifest cache, reloaded when build_flag_sprite rewrites the file
+_sprite = {'mtime': None, 'manifest': {}}
+
+
+def get_sprite_manifest():
+    path = os.path.join(settings.FLAG_SPRITE_DIR, SPRITE_MANIFEST_NAME)
+    try:
+        mtime = (path, os.path.getmtime(path))
+    except OSError:
+        return {}
+    if mtime != _sprite['mtime']:
+        _sprite['manifest'] = load_sprite_manifest()
+        _sprite['mtime'] = mtime
+    return _sprite['manifest']
+
+
+@register.simple_tag
+def team_flag(code, url='', alt=''):
+    """
+    Render a team flag as a cell of the local sprite sheet, so a page of
+    teams costs one image request. Custom flag URLs and flags missing from
+    the sprite fall back to a lazily loaded <img>.
+
+    Usage: {% team_flag team.flag_code team.flag_url alt=team.country %}
+    """
+    manifest = get_sprite_manifest()
+    position = manifest.get('positions', {}).get(code) if code else None
+    if position is None:
+        return format_html(
+            '<img src="{}" alt="{}" class="img-fluid rounded" loading="lazy" '
+            'style="width: 80px; height: 50px; object-fit: cover;">',
+            url or flag_cdn_url(code), alt,
+        )
+
+    width, height = manifest['cell']
+    sprite_url = static(f"{settings.FLAG_SPRITE_URL_PREFIX}/{manifest['sprite']}")
+    return format_html(
+        '<span class="flag-sprite rounded" role="img" aria-label="{}" style="width: {}px; height: {}px; '
+        'background: url({}) -{}px -{}px no-repeat;"></span>',
+        alt, width, height, sprite_url, position[0], position[1],
+    )
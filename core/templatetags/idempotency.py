@@ -0,0 +1,19 @@
+# core/templatetags/idempotency.py
+from django import template
+from django.utils.html import format_html
+
+from core.idempotency import IDEMPOTENCY_FIELD, new_key
+
+register = template.Library()
+
+
+@register.simple_tag
+def idempotency_field():
+    """
+    Hidden one-off token for a form whose view is wrapped in
+    core.idempotency.idempotent_post; a second submit of the same rendered
+    form replays the first outcome instead of running again.
+
+    Usage: {% idempotency_field %} next to {% csrf_token %}
+    """
+    return format_html('<input type="hidden" name="{}" value="{}">', IDEMPOTENCY_FIELD, new_key())
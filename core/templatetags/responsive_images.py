@@ -0,0 +1,74 @@
+# core/templatetags/responsive_images.py
+import os
+
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+
+from core.images import MANIFEST_NAME, load_manifest
+
+register = template.Library()
+
+# Manifest cache, reloaded when build_images rewrites the file
+_manifest = {'mtime': None, 'images': {}}
+
+SOURCE_TYPES = (('avif', 'image/avif'), ('webp', 'image/webp'))
+
+
+def get_image_entry(name):
+    path = os.path.join(settings.IMAGE_BUILD_DIR, MANIFEST_NAME)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    if mtime != _manifest['mtime']:
+        _manifest['images'] = load_manifest(settings.IMAGE_BUILD_DIR).get('images', {})
+        _manifest['mtime'] = mtime
+    return _manifest['images'].get(name)
+
+
+def _srcset(entry, extension):
+    return ', '.join(
+        f"{static(settings.IMAGE_BUILD_URL_PREFIX + '/' + v['name'])} {v['width']}w"
+        for v in entry['variants'] if v['format'] == extension
+    )
+
+
+@register.simple_tag
+def responsive_image(name, alt='', sizes='100vw', css_class='', loading='lazy'):
+    """
+    Render a lazily loaded <picture> for a static image, with AVIF/WebP
+    sources and a downscaled PNG fallback built by `manage.py build_images`.
+
+    Usage: {% responsive_image 'images/logo.png' alt='Goal Fever' sizes='120px' %}
+    """
+    entry = get_image_entry(name)
+    if entry is None:
+        # Not built yet: fall back to the original file
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}" decoding="async">',
+            static(name), alt, css_class, loading,
+        )
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (mime, _srcset(entry, extension), sizes)
+            for extension, mime in SOURCE_TYPES if _srcset(entry, extension)
+        ),
+    )
+    fallback = [v for v in entry['variants'] if v['format'] == 'png']
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" '
+        'alt="{}" class="{}" loading="{}" decoding="async"></picture>',
+        sources,
+        static(settings.IMAGE_BUILD_URL_PREFIX + '/' + fallback[-1]['name']),
+        _srcset(entry, 'png'),
+        sizes,
+        entry['width'],
+        entry['height'],
+        alt,
+        css_class,
+        loading,
+    )
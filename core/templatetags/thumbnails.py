@@ -0,0 +1,12 @@
+# core/templatetags/thumbnails.py
+from django import template
+
+from core.thumbnails import thumbnail_url
+
+register = template.Library()
+
+
+@register.filter
+def thumbnail(field_file, size='small'):
+    """{{ user.profile_picture|thumbnail:'small' }} -> cached thumbnail URL"""
+    return thumbnail_url(field_file, size)
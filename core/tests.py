@@ -1,3 +1,1200 @@
-from django.test import TestCase
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from PIL import Image
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.cache import SessionStore
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.conf import settings
+from django.core.cache import cache
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.cache import get_cached_user, set_cached_user
+from accounts.models import PlayerProfile, User
+from tournaments.flags import DEFAULT_FLAG_CODE, FLAGS
+from tournaments.models import Match, Team, Tournament, TournamentRegistration
+from .storage import ContentAddressedStorage, repoint_media_references
+from .db import apply_sqlite_pragmas, run_serialized_write
+from .images import build_images, find_source_images
+from .autocomplete import get_prefix_index, reset_prefix_indexes
+from .page_cache import _cacheable_response
+from .search import LikeSearchBackend, get_search_backend
+from .mail_sink import LocalSMTPSink
+from .idempotency import IDEMPOTENCY_FIELD, duplicate_stats
+from .models import IdempotencyKey, Notification, Task
+from .notifications import deliver_notification_emails, notify
+from .taskqueue import claim_task, enqueue, release_expired_leases, run_task, task
+from .thumbnails import thumbnail_name, thumbnail_url
+from .routers import ReplicaPinningMiddleware, ReplicaRouter, read_from_replica
+from .views import acheck_team_availability, ahome_view, autocomplete_results
+
+
+class SQLitePragmaTests(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1234})
+    def test_configured_pragmas_are_applied(self):
+        apply_sqlite_pragmas(connection)
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], -1234)
+
+    @override_settings(SQLITE_PRAGMAS={'busy_timeout': 12345})
+    def test_busy_timeout_is_set_on_new_connections(self):
+        # Not Python's 5s default: the connection_created hook applied it
+        fresh = connections.create_connection('default')
+        self.addCleanup(fresh.close)
+        with fresh.cursor() as cursor:
+            cursor.execute("PRAGMA busy_timeout")
+            self.assertEqual(cursor.fetchone()[0], 12345)
+
+
+@override_settings(SQLITE_SERIALIZE_WRITES=True, SQLITE_WRITE_RETRIES=3, SQLITE_WRITE_BACKOFF=0)
+class SerializedWriteTests(SimpleTestCase):
+    databases = {'default'}
+
+    def test_lock_errors_are_retried(self):
+        attempts = []
+
+        def flaky_write():
+            attempts.append(1)
+            if len(attempts) < 3:
+                raise OperationalError('database is locked')
+            return 'saved'
+
+        with self.assertLogs('core.db', 'WARNING'):
+            self.assertEqual(run_serialized_write(flaky_write), 'saved')
+        self.assertEqual(len(attempts), 3)
+
+    def test_gives_up_after_max_retries(self):
+        def always_locked():
+            raise OperationalError('database is locked')
+
+        with self.assertLogs('core.db', 'WARNING'), self.assertRaises(OperationalError):
+            run_serialized_write(always_locked)
+
+    def test_other_errors_are_not_retried(self):
+        attempts = []
+
+        def broken_write():
+            attempts.append(1)
+            raise OperationalError('no such table: missing')
+
+        with self.assertRaises(OperationalError):
+            run_serialized_write(broken_write)
+        self.assertEqual(len(attempts), 1)
+
+    def test_writers_run_one_at_a_time(self):
+        active = []
+        overlaps = []
+
+        def slow_write():
+            active.append(1)
+            if len(active) > 1:
+                overlaps.append(len(active))
+            time.sleep(0.01)
+            active.pop()
+
+        def worker():
+            try:
+                for _ in range(5):
+                    run_serialized_write(slow_write)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(overlaps, [])
+
+
+@override_settings(READ_REPLICA_ALIAS='replica', REPLICA_PIN_SECONDS=60)
+class ReplicaRouterTests(TransactionTestCase):
+    """Primary and replica are separate SQLite databases; replicate() copies one to the other"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Registered after setUpClass so the test framework leaves the alias alone
+        handle, cls.replica_path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(handle)
+        connections.settings['replica'] = {**connections.settings['default'], 'NAME': cls.replica_path}
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        os.remove(cls.replica_path)
+        super().tearDownClass()
+
+    def replicate(self):
+        """Replication stand-in: copy the primary into the replica file"""
+        connections['replica'].close()
+        connection.ensure_connection()
+        target = sqlite3.connect(self.replica_path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+    def request(self, view, session_key=None):
+        request = RequestFactory().get('/')
+        SessionMiddleware(lambda r: None).process_request(request)
+        if session_key:
+            request.session = request.session.__class__(session_key)
+        response = ReplicaPinningMiddleware(view)(request)
+        request.session.save()
+        return request.session.session_key, response
+
+    @staticmethod
+    @read_from_replica
+    def team_names_view(request):
+        return HttpResponse(','.join(Team.objects.order_by('name').values_list('name', flat=True)))
+
+    def test_marked_views_read_from_replica(self):
+        Team.objects.create(name='Brazil', country='Brazil')
+        self.replicate()
+        Team.objects.create(name='Spain', country='Spain')
+
+        _, response = self.request(self.team_names_view)
+        self.assertEqual(response.content, b'Brazil')
+        self.assertEqual(Team.objects.count(), 2)  # unmarked reads use the primary
+
+    def test_session_that_wrote_reads_from_primary(self):
+        self.replicate()
+
+        def write_view(request):
+            Team.objects.create(name='Japan', country='Japan')
+            return HttpResponse()
+
+        session_key, _ = self.request(write_view)
+        _, response = self.request(self.team_names_view, session_key)
+        self.assertEqual(response.content, b'Japan')
+
+        # Other sessions still read the (stale) replica
+        _, response = self.request(self.team_names_view)
+        self.assertEqual(response.content, b'')
+
+
+class HomeFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            name='WORLD CUP 2026', description='', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=150, status='upcoming',
+        )
+        self.user = User.objects.create_user('keeper', 'keeper@example.com', 'pass12345')
+        PlayerProfile.objects.create(user=self.user, matches_won=2)
+        self.register(self.user, 'Brazil')
+        self.client.force_login(self.user)
+
+    def register(self, player, team_name):
+        return TournamentRegistration.objects.create(
+            player=player, tournament=self.tournament, status=TournamentRegistration.CONFIRMED,
+            selected_team=Team.objects.create(name=team_name, country=team_name),
+        )
+
+    def get_home(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'))
+        return response, len(queries)
+
+    def test_warm_render_skips_fragment_queries(self):
+        cold_response, cold = self.get_home()
+        warm_response, warm = self.get_home()
+        self.assertLess(warm, cold)
+        for response in (cold_response, warm_response):
+            self.assertContains(response, 'Brazil')
+
+    def test_model_change_invalidates_fragment(self):
+        self.get_home()
+        other = User.objects.create_user('winger', 'winger@example.com', 'pass12345')
+        self.register(other, 'Spain')
+        response, _ = self.get_home()
+        self.assertContains(response, 'winger')
+
+
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            name='WORLD CUP 2026', description='', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=150, status='upcoming',
+        )
+
+    def get_home(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_hit_runs_no_queries(self):
+        cold_response, cold = self.get_home()
+        warm_response, warm = self.get_home()
+        self.assertGreater(cold, 0)
+        self.assertEqual(warm, 0)
+        self.assertEqual(warm_response.content, cold_response.content)
+        for response in (cold_response, warm_response):
+            self.assertIn('Cookie', response['Vary'])
+            self.assertIn('Accept-Language', response['Vary'])
+            self.assertFalse(response.cookies)
+
+    def test_model_change_invalidates_page(self):
+        self.get_home()
+        self.tournament.max_teams = 16
+        self.tournament.save()
+        _, queries = self.get_home()
+        self.assertGreater(queries, 0)
+
+    def test_logged_in_visitors_bypass_the_cache(self):
+        self.get_home()
+        user = User.objects.create_user('keeper', 'keeper@example.com', 'pass12345')
+        self.client.force_login(user)
+        response, queries = self.get_home()
+        self.assertGreater(queries, 0)
+        self.assertContains(response, 'keeper')
+
+    def test_query_strings_bypass_the_cache(self):
+        self.get_home()
+        for index in range(3):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('home'), {'x': index})
+            self.assertGreater(len(queries), 0)
+        self.assertEqual(len([key for key in cache._cache if 'anon_page:' in key]), 1)
+
+    def test_pages_that_use_the_csrf_token_are_not_stored(self):
+        plain, form = RequestFactory().get('/'), RequestFactory().get('/')
+        form.META['CSRF_COOKIE_NEEDS_UPDATE'] = True  # set by get_token()
+        self.assertTrue(_cacheable_response(plain, HttpResponse('page')))
+        self.assertFalse(_cacheable_response(form, HttpResponse('form')))
+
+
+class ImagePipelineTests(SimpleTestCase):
+    def setUp(self):
+        self.source_dir = tempfile.mkdtemp()
+        self.out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source_dir)
+        self.addCleanup(shutil.rmtree, self.out_dir)
+        os.makedirs(os.path.join(self.source_dir, 'players'))
+        self.image_path = os.path.join(self.source_dir, 'players', 'star.png')
+        Image.new('RGBA', (800, 400), (255, 204, 0, 255)).save(self.image_path)
+
+    def build(self):
+        return build_images(
+            find_source_images(self.source_dir), self.out_dir, widths=[160, 320, 1280], workers=1,
+        )
+
+    def test_builds_downscaled_variants(self):
+        built, skipped = self.build()
+        self.assertEqual(built, ['images/players/star.png'])
+        self.assertEqual(skipped, [])
+        for width in (160, 320, 800):
+            with Image.open(os.path.join(self.out_dir, f'players/star-{width}w.webp')) as variant:
+                self.assertEqual(variant.size, (width, width // 2))
+
+    def test_rebuild_is_incremental_on_content_hash(self):
+        self.build()
+        self.assertEqual(self.build(), ([], ['images/players/star.png']))
+        Image.new('RGBA', (800, 400), (0, 0, 0, 255)).save(self.image_path)
+        self.assertEqual(self.build()[0], ['images/players/star.png'])
+
+    def test_template_tag_emits_srcset_and_lazy_loading(self):
+        self.build()
+        with self.settings(IMAGE_BUILD_DIR=self.out_dir):
+            html = Template(
+                "{% load responsive_images %}{% responsive_image 'images/players/star.png' alt='Star' %}"
+            ).render(Context())
+        self.assertIn('<source type="image/webp" srcset="/static/images/optimized/players/star-160w.webp 160w, ', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('width="800" height="400"', html)
+
+
+class PrecompressedStaticTests(SimpleTestCase):
+    """Bytes a browser transfers for the home page's static assets, first load vs repeat load"""
+    databases = {'default'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.static_root = tempfile.mkdtemp()
+        cls.static_settings = override_settings(
+            STATIC_ROOT=cls.static_root,
+            STATICFILES_DIRS=[('vendor', os.path.join(settings.BASE_DIR, 'static', 'vendor'))],
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'core.storage.CompressedManifestStaticStorage'},
+            },
+        )
+        cls.static_settings.enable()
+        super().setUpClass()
+        call_command('collectstatic', interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.static_settings.disable()
+        shutil.rmtree(cls.static_root)
+
+    def load_home(self, browser_cache):
+        """Fetch home and its assets like a browser; returns bytes transferred"""
+        page = self.client.get(reverse('home'))
+        transferred = len(page.content)
+        for url in re.findall(r'(?:href|src)="(/static/[^"]+)"', page.content.decode()):
+            if url in browser_cache:
+                continue
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+            self.assertEqual(response.status_code, 200)
+            transferred += int(response.headers['Content-Length'])
+            if 'immutable' in response.headers['Cache-Control']:
+                browser_cache[url] = response
+            response.close()
+        return transferred
+
+    def asset_url(self, pattern):
+        page = self.client.get(reverse('home')).content.decode()
+        return next(url for url in re.findall(r'(?:href|src)="(/static/[^"]+)"', page) if re.search(pattern, url))
+
+    def test_refused_encodings_are_not_sent(self):
+        url = self.asset_url(r'\.css$')
+        for header, expected in (('br;q=0, gzip', 'gzip'), ('gzip;q=0, br;q=0', None), ('identity', None)):
+            response = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+            self.assertEqual(response.headers.get('Content-Encoding'), expected, header)
+            response.close()
+
+    def test_unhashed_names_are_revalidated(self):
+        url = '/static/' + re.sub(r'\.[0-9a-f]{12}(\.[^/.]+)$', r'\1', self.asset_url(r'\.css$')[len('/static/'):])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response.headers['Cache-Control'])
+        response.close()
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(again.status_code, 304)
+        again = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response.headers['Last-Modified'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_traversal_falls_through(self):
+        response = self.client.get('/static/../manage.py')
+        self.assertEqual(response.status_code, 404)
+
+    def test_assets_are_local_precompressed_and_immutable(self):
+        browser_cache = {}
+        first = self.load_home(browser_cache)
+        repeat = self.load_home(browser_cache)
+
+        self.assertEqual(len(browser_cache), 3)
+        for url, response in browser_cache.items():
+            self.assertEqual(response.headers['Content-Encoding'], 'br')
+            self.assertIn('Accept-Encoding', response.headers['Vary'])
+            raw = os.path.getsize(os.path.join(self.static_root, url[len('/static/'):]))
+            self.assertLess(int(response.headers['Content-Length']), raw / 3)
+        self.assertLess(repeat, first / 2)
+
+
+@override_settings(UPLOAD_MAX_DIMENSION=1000, THUMBNAIL_SIZES={'small': 96}, TASKS_EAGER=True)
+class UploadProcessingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.user = User.objects.create_user('phone', 'phone@example.com', 'pass12345')
+        self.client.force_login(self.user)
+
+    def phone_photo(self):
+        """A large JPEG with GPS-style EXIF data, as phones upload them"""
+        image = Image.new('RGB', (3000, 2000), (30, 120, 30))
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'  # Make
+        exif[0x8825] = {2: (23.0, 48.0, 0.0)}  # GPSInfo
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_profile_upload_is_normalized_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('profile'), {
+                'email': 'phone@example.com', 'profile_picture': self.phone_photo(),
+            })
+        self.user.refresh_from_db()
+        name = self.user.profile_picture.name
+        # The cleaned blob replaces the upload's blob, not nested under it
+        self.assertRegex(name, r'^profile_pics/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$')
+
+        with default_storage.open(name) as handle, Image.open(handle) as stored:
+            self.assertEqual(stored.size, (1000, 667))
+            self.assertEqual(len(stored.getexif()), 0)
+        with default_storage.open(thumbnail_name(name, 96)) as handle, Image.open(handle) as thumb:
+            self.assertEqual(thumb.size, (96, 64))
+        self.assertTrue(thumbnail_url(self.user.profile_picture, 'small').endswith('.96.webp'))
+
+    def test_thumbnail_url_falls_back_to_original(self):
+        self.user.profile_picture = self.phone_photo()
+        self.user.save()
+        self.assertEqual(thumbnail_url(self.user.profile_picture, 'small'), self.user.profile_picture.url)
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.storage = ContentAddressedStorage()
+        self.user = User.objects.create_user('dup', 'dup@example.com', 'pass12345')
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), self.storage.location)
+            for directory, _, names in os.walk(self.storage.location) for name in names
+        )
+
+    def test_identical_uploads_are_stored_once(self):
+        first = self.storage.save('team_logos/brazil.PNG', ContentFile(b'logo-bytes'))
+        second = self.storage.save('team_logos/copy.png', ContentFile(b'logo-bytes'))
+        self.assertEqual(first, second)
+        self.assertRegex(first, r'^team_logos/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(self.stored_files(), [first])
+
+    def test_large_uploads_are_hashed_in_chunks(self):
+        self.storage.chunk_size = 1024
+        content = os.urandom(10 * 1024 + 7)
+        name = self.storage.save('match_screenshots/big.jpg', ContentFile(content))
+        with self.storage.open(name) as handle:
+            self.assertEqual(handle.read(), content)
+
+    def test_gc_deletes_only_unreferenced_blobs(self):
+        kept = self.storage.save('profile_pics/a.jpg', ContentFile(b'referenced'))
+        orphan = self.storage.save('profile_pics/b.jpg', ContentFile(b'orphan'))
+        User.objects.filter(pk=self.user.pk).update(profile_picture=kept)
+        call_command('gc_media', grace=0, stdout=StringIO())
+        self.assertEqual(self.stored_files(), [kept])
+        self.assertNotEqual(kept, orphan)
+
+    def test_repointing_drops_cached_users(self):
+        old = self.storage.save('profile_pics/a.jpg', ContentFile(b'before'))
+        new = self.storage.save('profile_pics/a.jpg', ContentFile(b'after'))
+        User.objects.filter(pk=self.user.pk).update(profile_picture=old)
+        set_cached_user(User.objects.get(pk=self.user.pk))
+        self.assertEqual(repoint_media_references(old, new), 1)
+        self.assertIsNone(get_cached_user(self.user.pk))
+
+    def test_gc_keeps_an_old_blob_that_was_just_uploaded_again(self):
+        name = self.storage.save('profile_pics/a.jpg', ContentFile(b'comeback'))
+        aged = time.time() - 7 * 24 * 3600
+        os.utime(self.storage.path(name), (aged, aged))
+        # Re-uploaded; the row pointing at it is not committed yet
+        self.assertEqual(self.storage.save('profile_pics/b.jpg', ContentFile(b'comeback')), name)
+        call_command('gc_media', grace=3600, stdout=StringIO())
+        self.assertEqual(self.stored_files(), [name])
+
+    def test_dedupe_moves_existing_files_into_blobs(self):
+        os.makedirs(os.path.join(self.storage.location, 'profile_pics'))
+        for filename in ('one.jpg', 'two.jpg'):
+            with open(os.path.join(self.storage.location, 'profile_pics', filename), 'wb') as handle:
+                handle.write(b'same-avatar')
+        other = User.objects.create_user('dup2', 'dup2@example.com', 'pass12345')
+        User.objects.filter(pk=self.user.pk).update(profile_picture='profile_pics/one.jpg')
+        User.objects.filter(pk=other.pk).update(profile_picture='profile_pics/two.jpg')
+
+        call_command('dedupe_media', stdout=StringIO())
+
+        names = set(User.objects.filter(pk__in=[self.user.pk, other.pk]).values_list('profile_picture', flat=True))
+        self.assertEqual(len(names), 1)
+        self.assertEqual(self.stored_files(), sorted(names))
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root, MEDIA_OFFLOAD='')
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.logo = default_storage.save('team_logos/logo.png', ContentFile(b'0123456789'))
+        self.screenshot = default_storage.save('match_screenshots/result.jpg', ContentFile(b'final-score'))
+
+        self.player1 = User.objects.create_user('p1', 'p1@example.com', 'pass12345')
+        self.player2 = User.objects.create_user('p2', 'p2@example.com', 'pass12345')
+        self.outsider = User.objects.create_user('other', 'other@example.com', 'pass12345')
+        now = timezone.now()
+        tournament = Tournament.objects.create(
+            name='Cup', description='x', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=100,
+        )
+        team = Team.objects.create(name='Brazil', country='Brazil')
+        Match.objects.create(
+            tournament=tournament, player1=self.player1, player2=self.player2,
+            player1_team=team, player2_team=team, match_date=now, screenshot=self.screenshot,
+        )
+
+    def test_conditional_get_returns_not_modified(self):
+        response = self.client.get(settings.MEDIA_URL + self.logo)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get(settings.MEDIA_URL + self.logo, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_in_flight_uploads_are_not_served(self):
+        os.makedirs(os.path.join(settings.MEDIA_ROOT, 'tmp'), exist_ok=True)
+        with open(os.path.join(settings.MEDIA_ROOT, 'tmp', 'tmpupload'), 'wb') as handle:
+            handle.write(b'half-written')
+        for path in ('tmp/tmpupload', 'team_logos/../tmp/tmpupload'):
+            self.assertEqual(self.client.get(settings.MEDIA_URL + path).status_code, 404)
+
+    def test_byte_ranges(self):
+        url = settings.MEDIA_URL + self.logo
+        response = self.client.get(url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'789')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */10')
+
+    def test_accel_redirect_offload(self):
+        with self.settings(MEDIA_OFFLOAD='x-accel'):
+            response = self.client.get(settings.MEDIA_URL + self.logo)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.logo)
+        self.assertEqual(response.content, b'')
+
+    def test_screenshots_are_private_to_the_match(self):
+        url = settings.MEDIA_URL + self.screenshot
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(self.player2)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Cache-Control'].startswith('private'))
+
+        admin = User.objects.create_superuser('boss', 'boss@example.com', 'pass12345')
+        self.client.force_login(admin)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_path_traversal_is_rejected(self):
+        response = self.client.get(settings.MEDIA_URL + '../manage.py')
+        self.assertEqual(response.status_code, 404)
+
+
+class FlagSpriteTests(SimpleTestCase):
+    # Stands in for flagcdn.com: a few <code>.png files of odd sizes
+    fixture_dir = os.path.join(os.path.dirname(__file__), 'testdata', 'flags')
+
+    def setUp(self):
+        self.out_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.out_dir)
+        sprite_settings = override_settings(FLAG_SPRITE_DIR=self.out_dir, FLAG_CELL_SIZE=(80, 50))
+        sprite_settings.enable()
+        self.addCleanup(sprite_settings.disable)
+
+    def render(self, code, url=''):
+        return Template('{% load flags %}{% team_flag code url alt="Brazil" %}').render(
+            Context({'code': code, 'url': url})
+        )
+
+    def test_flag_table_is_keyed_by_iso_code(self):
+        self.assertEqual(FLAGS['br'], 'Brazil')
+        self.assertEqual(Team(name='Brazil').get_flag_code(), 'br')
+        self.assertEqual(Team(name='Atlantis').get_flag_code(), DEFAULT_FLAG_CODE)
+        self.assertEqual(Team(name='Brazil', flag_url='https://x/br.svg').get_flag_url(), 'https://x/br.svg')
+
+    def test_command_packs_local_flags_into_one_sprite(self):
+        err = StringIO()
+        call_command('build_flag_sprite', source=self.fixture_dir, stdout=StringIO(), stderr=err)
+        self.assertIn('missing fr', err.getvalue())
+
+        with open(os.path.join(self.out_dir, 'flags.json')) as handle:
+            manifest = json.load(handle)
+        self.assertEqual(sorted(manifest['positions']), ['ar', 'br', 'un'])
+        with Image.open(os.path.join(self.out_dir, 'flags.png')) as sprite:
+            self.assertEqual(sprite.size, (240, 50))
+            x, y = manifest['positions']['br']
+            self.assertEqual(sprite.getpixel((x + 40, y + 25))[:3], (0, 156, 59))
+
+    def test_tag_uses_sprite_and_falls_back_to_img(self):
+        self.assertIn('<img src="https://flagcdn.com/w80/br.png"', self.render('br'))
+
+        call_command('build_flag_sprite', source=self.fixture_dir, stdout=StringIO(), stderr=StringIO())
+        html = self.render('br')
+        self.assertIn('class="flag-sprite', html)
+        self.assertIn('flags/flags.png', html)
+        self.assertIn('<img src="https://x/custom.png"', self.render(None, 'https://x/custom.png'))
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            name='WORLD CUP 2026', description='', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=150, status='upcoming',
+        )
+        self.user = User.objects.create_user('keeper', 'keeper@example.com', 'pass12345')
+        PlayerProfile.objects.create(user=self.user, matches_won=2)
+        self.team = Team.objects.create(name='Brazil', country='Brazil')
+        TournamentRegistration.objects.create(
+            player=self.user, tournament=self.tournament, selected_team=self.team, status=TournamentRegistration.CONFIRMED,
+        )
+
+    def async_get(self, view, path, user, *args, **extra):
+        request = AsyncRequestFactory().get(path, **extra)
+        request.user = user
+        request.session = SessionStore()
+        # Any sync ORM access inside the coroutine raises SynchronousOnlyOperation
+        return async_to_sync(view)(request, *args)
+
+    def test_home_renders_without_sync_queries(self):
+        response = self.async_get(ahome_view, '/', self.user)
+        self.assertContains(response, 'keeper')
+        self.assertContains(response, 'Brazil')
+
+        response = self.async_get(ahome_view, '/', AnonymousUser())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Tournament.objects.count(), 1)
+
+    def test_team_availability(self):
+        other = Team.objects.create(name='Spain', country='Spain')
+        path = f'/check-team/{self.tournament.id}/'
+        ajax = {'headers': {'X-Requested-With': 'XMLHttpRequest'}}
+
+        taken = self.async_get(acheck_team_availability, path + f'?team_id={self.team.id}', self.user, self.tournament.id, **ajax)
+        free = self.async_get(acheck_team_availability, path + f'?team_id={other.id}', self.user, self.tournament.id, **ajax)
+        self.assertEqual(json.loads(taken.content)['is_confirmed_taken'], True)
+        self.assertEqual(json.loads(free.content)['is_available'], True)
+
+        anonymous = self.async_get(acheck_team_availability, path, AnonymousUser(), self.tournament.id)
+        self.assertEqual(anonymous.status_code, 302)
+
+    @override_settings(READ_REPLICA_ALIAS='replica')
+    def test_async_views_can_read_from_replica(self):
+        @read_from_replica
+        async def view(request):
+            return HttpResponse(ReplicaRouter().db_for_read(Team))
+
+        response = async_to_sync(view)(AsyncRequestFactory().get('/'))
+        self.assertEqual(response.content, b'replica')
+
+
+class RegistrationExportTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        tournament = Tournament.objects.create(
+            name='Cup', description='', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=150,
+        )
+        for index, team in enumerate(['Brazil', 'Spain', 'Ghana']):
+            TournamentRegistration.objects.create(
+                player=User.objects.create_user(f'p{index}', f'p{index}@example.com', 'pass12345'),
+                tournament=tournament,
+                selected_team=Team.objects.create(name=team, country=team),
+                status=TournamentRegistration.SUBMITTED,
+                transaction_id='=HYPERLINK("x")' if team == 'Ghana' else f'TX{index}',
+                mobile_number=f'+88017111111{index}',
+            )
+        self.admin = User.objects.create_superuser('boss', 'boss@example.com', 'pass12345')
+        self.client.force_login(self.admin)
+
+    def export(self, export_format):
+        response = self.client.get(reverse('export_registrations'), {'format': export_format})
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment;', response['Content-Disposition'])
+        return b''.join(response.streaming_content)
+
+    def test_csv_export(self):
+        lines = self.export('csv').decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[0].startswith('ID,Player,Email'))
+        self.assertIn('Brazil', lines[1])
+        # Formula-looking values are neutralised for spreadsheet apps
+        self.assertIn("'=HYPERLINK", lines[3])
+        # ...but phone numbers are left as they are
+        self.assertIn(',+880171111110,', lines[1])
+
+    def test_xlsx_export_is_a_valid_workbook(self):
+        with zipfile.ZipFile(BytesIO(self.export('xlsx'))) as archive:
+            self.assertIn('xl/workbook.xml', archive.namelist())
+            sheet = archive.read('xl/worksheets/sheet1.xml').decode()
+        self.assertEqual(sheet.count('<row>'), 4)
+        self.assertIn('Spain', sheet)
+
+    def test_rows_are_fetched_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.export('csv')
+        registration_queries = [q for q in queries if 'tournaments_tournamentregistration' in q['sql']]
+        self.assertEqual(len(registration_queries), 1)
+
+    def test_players_cannot_export(self):
+        self.client.force_login(User.objects.get(username='p0'))
+        response = self.client.get(reverse('export_registrations'))
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            name='Cup', description='', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=150,
+        )
+        self.brazil = Team.objects.create(name='Brazil', country='Brazil')
+        self.ghana = Team.objects.create(name='Ghana', country='Ghana')
+        self.keeper = User.objects.create_user('keeper', 'keeper@example.com', 'pass12345')
+        self.registration = TournamentRegistration.objects.create(
+            player=self.keeper, tournament=self.tournament, selected_team=self.brazil,
+        )
+        self.admin = User.objects.create_superuser('boss', 'boss@example.com', 'pass12345')
+
+    def search(self, term, index='registration', backend=None, **kwargs):
+        model = {'registration': TournamentRegistration, 'team': Team, 'player': User}[index]
+        backend = backend or get_search_backend()
+        return set(backend.filter(model.objects.all(), index, term, **kwargs).values_list('pk', flat=True))
+
+    def test_fts_matches_like(self):
+        self.assertTrue(get_search_backend().is_ready('default'))
+        for term in ('keep', 'razi', 'eeper brazil', 'nobody', 'gh'):
+            self.assertEqual(self.search(term), self.search(term, backend=LikeSearchBackend()), term)
+
+    def test_triggers_follow_updates(self):
+        # submit_payment writes through queryset.update(), which sends no signals
+        self.registration.submit_payment('bkash', 'TXN98765', '01711111111')
+        self.assertEqual(self.search('98765'), {self.registration.pk})
+
+        self.brazil.name = 'Seleção'
+        self.brazil.save()
+        self.assertEqual(self.search('seleção'), {self.registration.pk})
+        self.assertEqual(self.search('brazil', index='team'), {self.brazil.pk})  # country still matches
+
+        self.registration.delete()
+        self.assertEqual(self.search('keeper'), set())
+
+    def test_prefix_lookup(self):
+        self.assertEqual(self.search('gha', index='team', prefix=True), {self.ghana.pk})
+        self.assertEqual(self.search('han', index='team', prefix=True), set())
+        self.assertEqual(self.search('g', index='team', prefix=True), {self.ghana.pk})  # LIKE fallback
+
+    def test_admin_search_uses_index(self):
+        self.client.force_login(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:tournaments_tournamentregistration_changelist'), {'q': 'keeper'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.registration])
+        self.assertTrue(any('MATCH' in q['sql'] for q in queries))
+
+
+@override_settings(AUTOCOMPLETE_BUILD_IN_BACKGROUND=False)
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        reset_prefix_indexes()
+        self.brazil = Team.objects.create(name='Brazil', country='Brazil')
+        Team.objects.create(name='Bosnia', country='Bosnia')
+        self.keeper = User.objects.create_user('keeper', 'keeper@example.com', 'pass12345')
+        User.objects.create_superuser('boss', 'boss@example.com', 'pass12345')
+        self.client.force_login(self.keeper)
+
+    def lookup(self, kind, term, **params):
+        response = self.client.get(reverse('autocomplete'), {'type': kind, 'q': term, **params})
+        self.assertEqual(response.status_code, 200)
+        return [result['label'] for result in response.json()['results']]
+
+    def test_prefix_lookup_from_index(self):
+        self.assertEqual(self.lookup('team', 'b'), ['Bosnia', 'Brazil'])
+        self.assertEqual(self.lookup('team', 'BRA'), ['Brazil'])
+        self.assertEqual(self.lookup('team', 'b', limit=1), ['Bosnia'])
+        self.assertEqual(self.lookup('player', 'k'), ['keeper'])
+        self.assertEqual(self.lookup('player', 'bo'), [])  # admins are not listed
+        self.assertIsNotNone(get_prefix_index('team'))
+
+        with self.assertNumQueries(0):
+            autocomplete_results('team', 'bra', 10)
+
+    def test_signals_update_the_index(self):
+        self.lookup('team', 'b')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brazil.name = 'Argentina'
+            self.brazil.save()
+            Team.objects.create(name='Benin', country='Benin')
+        self.assertEqual(self.lookup('team', 'b'), ['Benin', 'Bosnia'])
+        self.assertEqual(self.lookup('team', 'arg'), ['Argentina'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.keeper.is_admin = True
+            self.keeper.save()
+        self.assertEqual(self.lookup('player', 'k'), [])
+
+    def test_cold_index_falls_back_to_the_database(self):
+        with mock.patch('core.views.get_prefix_index', return_value=None):
+            self.assertEqual(self.lookup('team', 'bra'), ['Brazil'])
+            self.assertEqual(self.lookup('team', 'b', limit=500), ['Bosnia', 'Brazil'])
+
+    def test_bad_type(self):
+        response = self.client.get(reverse('autocomplete'), {'type': 'match', 'q': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+# -----------------------------------------------------
+# Task queue
+# -----------------------------------------------------
+@task
+def add_numbers(a, b):
+    return a + b
+
+
+@task(max_attempts=2)
+def always_fails():
+    raise RuntimeError("boom")
+
+
+@task(singleton=True)
+def one_at_a_time():
+    return 'ok'
+
+
+class TaskQueueTests(TestCase):
+    def test_enqueue_claim_and_run(self):
+        queued = enqueue(add_numbers, args=[2, 3])
+        self.assertEqual(queued.status, Task.QUEUED)
+
+        claimed = claim_task('test-worker')
+        self.assertEqual((claimed.pk, claimed.status, claimed.attempts), (queued.pk, Task.RUNNING, 1))
+        self.assertIsNone(claim_task('other-worker'))  # already taken
+
+        self.assertTrue(run_task(claimed))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.result, queued.locked_by), (Task.DONE, 5, ''))
+        self.assertIsNotNone(queued.run_time)
+
+    @override_settings(TASK_RETRY_BACKOFF=10)
+    def test_retry_with_backoff_then_fail(self):
+        queued = enqueue(always_fails)
+        self.assertFalse(run_task(claim_task('test-worker')))
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Task.QUEUED)
+        self.assertIn('boom', queued.last_error)
+        self.assertGreater(queued.run_at, timezone.now() + timezone.timedelta(seconds=5))
+        self.assertIsNone(claim_task('test-worker'))  # not due yet
+
+        Task.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        self.assertFalse(run_task(claim_task('test-worker')))
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Task.FAILED, 2))
+
+    def test_scheduled_and_unique(self):
+        later = enqueue(add_numbers, args=[1, 1], delay=60)
+        self.assertIsNone(claim_task('test-worker'))
+        self.assertEqual(enqueue(add_numbers, args=[1, 1], unique=True), later)
+        self.assertNotEqual(enqueue(add_numbers, args=[1, 2], unique=True), later)
+
+    def test_singleton_waits_for_the_running_one(self):
+        enqueue(one_at_a_time)
+        running = claim_task('test-worker')
+        # Queued while the first run is in progress: kept, but it waits
+        queued = enqueue(one_at_a_time, unique=True)
+        self.assertNotEqual(queued.pk, running.pk)
+        self.assertIsNone(claim_task('other-worker'))
+        run_task(running)
+        self.assertEqual(claim_task('other-worker').pk, queued.pk)
+
+    def test_expired_lease_is_queued_again(self):
+        queued = enqueue(add_numbers, args=[1, 1])
+        claim_task('dead-worker')
+        Task.objects.filter(pk=queued.pk).update(locked_until=timezone.now() - timezone.timedelta(seconds=1))
+        self.assertEqual(release_expired_leases(), 1)
+        self.assertEqual(claim_task('test-worker').pk, queued.pk)
+
+    @override_settings(TASKS_EAGER=True)
+    def test_eager_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertIsNone(enqueue(add_numbers, args=[1, 1]))
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(Task.objects.exists())
+
+    def test_ranking_is_recomputed_in_the_background(self):
+        first = User.objects.create_user(username='first', password='pw')
+        second = User.objects.create_user(username='second', password='pw')
+        PlayerProfile.objects.create(user=first, matches_won=1)
+        PlayerProfile.objects.create(user=second, matches_won=5)
+        self.assertEqual(Task.objects.filter(name='accounts.tasks.recompute_rankings', status=Task.QUEUED).count(), 1)
+
+        self.assertTrue(run_task(claim_task('test-worker')))
+        rankings = dict(PlayerProfile.objects.values_list('user__username', 'ranking'))
+        self.assertEqual((rankings['second'], rankings['first']), (1, 2))
+
+    def test_dashboard(self):
+        enqueue(add_numbers, args=[1, 1])
+        run_task(claim_task('test-worker'))
+        enqueue(always_fails)
+        admin = User.objects.create_superuser(username='root', password='pw', email='root@example.com')
+        player = User.objects.create_user(username='player', password='pw')
+
+        self.client.force_login(player)
+        self.assertRedirects(self.client.get(reverse('task_dashboard')), reverse('home'), fetch_redirect_response=False)
+
+        self.client.force_login(admin)
+        response = self.client.get(reverse('task_dashboard'), {'hours': 'x'})
+        self.assertEqual(response.status_code, 200)
+        rows = {row['name']: row for row in response.context['stats']}
+        self.assertEqual(rows['core.tests.add_numbers']['done'], 1)
+        self.assertEqual(rows['core.tests.always_fails']['queued'], 1)
+        self.assertIsNotNone(rows['core.tests.add_numbers']['run_p50'])
+
+
+class RunWorkersTests(TransactionTestCase):
+    def test_burst_drains_the_queue(self):
+        tasks = [enqueue(add_numbers, args=[index, 1]) for index in range(5)]
+        call_command('run_workers', '--burst', '--threads', '1', stdout=StringIO())
+        self.assertEqual(
+            sorted(Task.objects.filter(status=Task.DONE).values_list('result', flat=True)),
+            [task.args[0] + 1 for task in tasks],
+        )
+
+
+# -----------------------------------------------------
+# Notifications
+# -----------------------------------------------------
+@override_settings(NOTIFICATION_EMAIL_BATCH_SIZE=3)
+class NotificationTests(TestCase):
+    def setUp(self):
+        self.players = [User.objects.create_user(f'p{index}', f'p{index}@example.com', 'pw') for index in range(5)]
+        self.no_email = User.objects.create_user('quiet', '', 'pw')
+        self.ids = [player.pk for player in self.players]
+
+    def test_events_coalesce_into_one_email_per_player(self):
+        notify(self.ids + [self.no_email.pk], 'payment_confirmed', 'Payment confirmed for Cup')
+        notify(self.ids[:2], 'schedule_published', 'Cup: round 1 is scheduled', link='/tournaments/schedule/')
+        self.assertEqual(Notification.objects.count(), 8)
+        self.assertEqual(Task.objects.filter(name=deliver_notification_emails.task_name).count(), 1)
+
+        result = deliver_notification_emails()
+        self.assertEqual((result['notifications'], result['emails']), (8, 5))
+        self.assertEqual(len(mail.outbox), 5)
+        subjects = {message.to[0]: message.subject for message in mail.outbox}
+        self.assertEqual(subjects['p0@example.com'], '2 updates from Goal Fever')
+        self.assertEqual(subjects['p4@example.com'], 'Payment confirmed for Cup')
+        self.assertIn('/tournaments/schedule/', mail.outbox[0].body)
+        self.assertFalse(Notification.objects.filter(emailed_at__isnull=True).exists())
+
+    @override_settings(NOTIFICATION_SMTP_CONNECTIONS=2)
+    def test_sends_over_reused_smtp_connections(self):
+        notify(self.ids, 'payment_confirmed', 'Payment confirmed for Cup')
+        with LocalSMTPSink() as sink, override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend', EMAIL_HOST='127.0.0.1', EMAIL_PORT=sink.port,
+        ):
+            result = deliver_notification_emails()
+        self.assertEqual(result['emails'], 5)
+        self.assertEqual(sink.connections, 2)
+        self.assertEqual(sorted(recipients[0] for recipients, _ in sink.messages),
+                         [f'p{index}@example.com' for index in range(5)])
+
+    def test_overlapping_deliveries_do_not_resend(self):
+        notify(self.ids, 'payment_confirmed', 'Payment confirmed for Cup')
+        Task.objects.update(run_at=timezone.now())
+        running = claim_task('test-worker')
+        # More notices arrive while the first run is still sending
+        notify(self.ids[:1], 'schedule_published', 'Cup: round 1 is scheduled')
+        Task.objects.filter(status=Task.QUEUED).update(run_at=timezone.now())
+        self.assertIsNone(claim_task('other-worker'))
+
+        run_task(running)
+        self.assertEqual(len(mail.outbox), 5)
+        run_task(claim_task('other-worker'))
+        self.assertEqual(len(mail.outbox), 5)  # the first run already sent everything
+
+    def test_page_marks_notifications_read(self):
+        notify(self.ids[:1], 'payment_confirmed', 'Payment confirmed for Cup')
+        self.client.force_login(self.players[0])
+        response = self.client.get(reverse('notifications'))
+        self.assertContains(response, 'Payment confirmed for Cup')
+        self.assertContains(response, 'New')
+        self.assertFalse(Notification.objects.filter(read_at__isnull=True).exists())
+
+
+class TournamentRegisterTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            name='Cup', description='', start_date=now + timezone.timedelta(days=7),
+            end_date=now + timezone.timedelta(days=30), registration_deadline=now + timezone.timedelta(days=1),
+            entry_fee=150, max_teams=8, is_active=True,
+        )
+        self.team = Team.objects.create(name='Brazil', country='Brazil')
+        self.client.force_login(User.objects.create_user('late', 'late@example.com', 'pw'))
+
+    def register(self):
+        return self.client.post(reverse('tournament_register', args=[self.tournament.pk]), {'team': self.team.pk})
+
+    def test_availability_is_checked_inside_the_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.register()
+        sql = [query['sql'] for query in queries]
+        savepoint = next(index for index, statement in enumerate(sql) if statement.startswith('SAVEPOINT'))
+        team_check = next(index for index, statement in enumerate(sql) if '"selected_team_id" =' in statement)
+        self.assertGreater(team_check, savepoint)
+        self.assertEqual(TournamentRegistration.objects.count(), 1)
+
+    def test_only_one_of_two_reservations_can_submit_payment(self):
+        first, second = [
+            TournamentRegistration.objects.create(
+                player=User.objects.create_user(username, f'{username}@example.com', 'pw'),
+                tournament=self.tournament, selected_team=self.team,
+            )
+            for username in ('first', 'second')
+        ]
+        data = {'payment_method': 'Rocket', 'transaction_id': 'TX1', 'mobile_number': '01700000000'}
+        responses = []
+        for registration in (first, second):
+            self.client.force_login(registration.player)
+            with CaptureQueriesContext(connection) as queries:
+                responses.append(self.client.post(reverse('payment_page', args=[registration.pk]), data))
+        self.assertEqual(responses[0]['Location'], reverse('home'))
+        self.assertEqual(responses[1]['Location'], reverse('tournament_register', args=[self.tournament.pk]))
+        self.assertEqual(TournamentRegistration.objects.get(pk=first.pk).status, TournamentRegistration.SUBMITTED)
+        self.assertFalse(TournamentRegistration.objects.filter(pk=second.pk).exists())
+
+        # The losing check ran inside the serialized write
+        sql = [query['sql'] for query in queries]
+        savepoint = next(index for index, statement in enumerate(sql) if statement.startswith('SAVEPOINT'))
+        team_check = next(index for index, statement in enumerate(sql) if '"selected_team_id" =' in statement)
+        self.assertGreater(team_check, savepoint)
+
+    def test_taken_team_is_refused(self):
+        TournamentRegistration.objects.create(
+            player=User.objects.create_user('first', 'first@example.com', 'pw'), tournament=self.tournament,
+            selected_team=self.team, status=TournamentRegistration.CONFIRMED,
+        )
+        response = self.register()
+        self.assertRedirects(response, reverse('tournament_register', args=[self.tournament.pk]),
+                             fetch_redirect_response=False)
+        self.assertEqual(TournamentRegistration.objects.count(), 1)
+
+
+class IdempotentSubmitTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.player = User.objects.create_user('tapper', 'tapper@example.com', 'pw')
+        self.tournament = Tournament.objects.create(
+            name='Cup', description='', start_date=now + timezone.timedelta(days=7),
+            end_date=now + timezone.timedelta(days=30), registration_deadline=now + timezone.timedelta(days=1),
+            entry_fee=150, max_teams=8, is_active=True,
+        )
+        self.team = Team.objects.create(name='Brazil', country='Brazil')
+        self.client.force_login(self.player)
+
+    def register(self, key):
+        return self.client.post(
+            reverse('tournament_register', args=[self.tournament.pk]), {'team': self.team.pk, IDEMPOTENCY_FIELD: key},
+        )
+
+    def test_form_renders_a_fresh_token(self):
+        url = reverse('tournament_register', args=[self.tournament.pk])
+        tokens = [re.search(rf'name="{IDEMPOTENCY_FIELD}" value="(\w+)"', self.client.get(url).content.decode()).group(1)
+                  for _ in range(2)]
+        self.assertNotEqual(*tokens)
+
+    def test_double_submit_replays_first_outcome(self):
+        first = self.register('tap-1')
+        registration = TournamentRegistration.objects.get()
+        self.assertRedirects(first, reverse('payment_page', args=[registration.pk]), fetch_redirect_response=False)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.register('tap-1')
+        self.assertEqual(second['Location'], first['Location'])
+        self.assertFalse([query for query in queries if 'tournaments_' in query['sql']])
+        self.assertEqual(TournamentRegistration.objects.count(), 1)
+
+        # The replay shows the first submission's message again
+        page = self.client.get(second['Location'])
+        self.assertEqual([str(m) for m in page.context['messages']].count(
+            "✅ Team 'Brazil' selected successfully! Please complete payment."), 2)
+        self.assertEqual(IdempotencyKey.objects.get().replays, 1)
+        self.assertEqual(duplicate_stats(timezone.now() - timezone.timedelta(hours=1)),
+                         [{'scope': 'tournament_register', 'forms': 1, 'duplicates': 1}])
+        self.client.force_login(User.objects.create_superuser('boss', 'boss@example.com', 'pw'))
+        self.assertContains(self.client.get(reverse('manage_registrations')), '1 double submission absorbed')
+
+    def test_payment_submitted_once(self):
+        self.register('tap-1')
+        registration = TournamentRegistration.objects.get()
+        url = reverse('payment_page', args=[registration.pk])
+        data = {'payment_method': 'Rocket', 'transaction_id': 'TX1', 'mobile_number': '01700000000',
+                IDEMPOTENCY_FIELD: 'pay-1'}
+        with mock.patch.object(TournamentRegistration, 'submit_payment', autospec=True,
+                               side_effect=TournamentRegistration.submit_payment) as submit:
+            responses = [self.client.post(url, data) for _ in range(3)]
+        self.assertEqual(submit.call_count, 1)
+        self.assertEqual({response['Location'] for response in responses}, {reverse('home')})
+        registration.refresh_from_db()
+        self.assertEqual(registration.status, TournamentRegistration.SUBMITTED)
+        self.assertEqual(IdempotencyKey.objects.get(key='pay-1').replays, 2)
+
+    def test_token_is_bound_to_user_and_form(self):
+        self.register('tap-1')
+        other = User.objects.create_user('other', '', 'pw')
+        self.client.force_login(other)
+        self.assertEqual(self.register('tap-1').status_code, 400)
+        self.assertEqual(TournamentRegistration.objects.count(), 1)
+
+    def pending_key(self):
+        return IdempotencyKey.objects.create(key='tap-1', user=self.player, scope='tournament_register',
+                                             path=reverse('tournament_register', args=[self.tournament.pk]))
+
+    @override_settings(IDEMPOTENCY_PENDING_WAIT=0)
+    def test_pending_submission_is_not_run_twice(self):
+        self.pending_key()
+        response = self.register('tap-1')
+        # To the status on the home page, not back to the form
+        self.assertEqual(response['Location'], reverse('home'))
+        self.assertFalse(TournamentRegistration.objects.exists())
+
+    def test_repeat_waits_for_the_pending_outcome(self):
+        key = self.pending_key()
+
+        def first_request_finishes(seconds):
+            IdempotencyKey.objects.filter(pk=key.pk).update(
+                status=IdempotencyKey.DONE, redirect_to='/payment/42/', messages=[[25, 'Team selected!']],
+            )
+
+        with mock.patch('core.idempotency.time.sleep', side_effect=first_request_finishes) as sleep:
+            response = self.register('tap-1')
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(response['Location'], '/payment/42/')
+        self.assertIn('Team selected!', [str(m) for m in response.wsgi_request._messages])
+        self.assertFalse(TournamentRegistration.objects.exists())
+
+    def test_posts_without_token_run_normally(self):
+        response = self.client.post(reverse('tournament_register', args=[self.tournament.pk]), {'team': self.team.pk})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(TournamentRegistration.objects.count(), 1)
+        self.assertFalse(IdempotencyKey.objects.exists())
@@ -0,0 +1,99 @@
+# core/thumbnails.py
+import logging
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .storage import is_content_addressed, repoint_media_references
+from .taskqueue import enqueue, task
+
+logger = logging.getLogger(__name__)
+
+def thumbnail_name(name, size):
+    """profile_pics/me.jpg -> profile_pics/thumbs/me.320.webp"""
+    directory, filename = posixpath.split(name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'thumbs', f"{stem}.{size}.webp")
+
+
+def _thumbnail_cache_key(name, size):
+    return f"thumbnail:{size}:{name}"
+
+
+def _save_image(storage, name, image, image_format, **options):
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    if storage.exists(name) and not is_content_addressed(storage):
+        storage.delete(name)
+    return storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def process_upload(name, storage=default_storage):
+    """
+    Normalize an uploaded image in place and write its thumbnails.
+
+    The original is rotated upright, stripped of EXIF (GPS, camera data)
+    and capped at UPLOAD_MAX_DIMENSION; one WebP thumbnail is written
+    per THUMBNAIL_SIZES entry. Returns the (possibly new) stored name.
+    """
+    with storage.open(name, 'rb') as handle:
+        image = Image.open(handle)
+        image_format = image.format or 'PNG'
+        has_exif = bool(image.getexif())
+        image = ImageOps.exif_transpose(image)
+        image.load()
+
+    max_dimension = settings.UPLOAD_MAX_DIMENSION
+    resized = image.width > max_dimension or image.height > max_dimension
+    if resized:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    if resized or has_exif:
+        if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        # Saving without exif=... drops the EXIF block
+        new_name = _save_image(storage, name, image, image_format, quality=85, optimize=True)
+        if new_name != name:
+            # Content-addressed storage: the cleaned image is a new blob
+            repoint_media_references(name, new_name)
+            name = new_name
+
+    for label, size in settings.THUMBNAIL_SIZES.items():
+        thumb = image.copy()
+        thumb.thumbnail((size, size), Image.LANCZOS)
+        thumb_name = _save_image(storage, thumbnail_name(name, size), thumb, 'WEBP', quality=80)
+        cache.set(_thumbnail_cache_key(name, label), storage.url(thumb_name), None)
+    return name
+
+
+@task
+def process_upload_task(name):
+    return process_upload(name)
+
+
+def schedule_upload_processing(field_file):
+    """
+    Queue an uploaded image for processing (see core.taskqueue); the task
+    row commits with the upload, so the request returns immediately.
+    """
+    if field_file:
+        enqueue(process_upload_task, args=[field_file.name])
+
+
+def thumbnail_url(field_file, size):
+    """URL of the thumbnail if it is ready, otherwise of the original file"""
+    if not field_file:
+        return ''
+    key = _thumbnail_cache_key(field_file.name, size)
+    url = cache.get(key)
+    if url is None:
+        thumb_name = thumbnail_name(field_file.name, settings.THUMBNAIL_SIZES[size])
+        if not field_file.storage.exists(thumb_name):
+            return field_file.url
+        url = field_file.storage.url(thumb_name)
+        cache.set(key, url, None)
+    return url
@@ -0,0 +1,48 @@
+# core/versions.py
+import time
+
+from django.core.cache import cache
+
+# Counters are kept until bumped; a missing one restarts from the clock so
+# it can never collide with a version that cached fragments still use.
+VERSION_KEY_PREFIX = 'data_version:'
+
+
+def _initial_version():
+    return time.time_ns()
+
+
+def get_data_versions(*names):
+    """Return {name: version} for the given data version counters"""
+    keys = {VERSION_KEY_PREFIX + name: name for name in names}
+    found = cache.get_many(keys)
+    versions = {}
+    for key, name in keys.items():
+        if key not in found:
+            cache.add(key, _initial_version(), None)
+            found[key] = cache.get(key)
+        versions[name] = found[key]
+    return versions
+
+
+async def aget_data_versions(*names):
+    """Async get_data_versions for coroutine views"""
+    keys = {VERSION_KEY_PREFIX + name: name for name in names}
+    found = await cache.aget_many(keys)
+    versions = {}
+    for key, name in keys.items():
+        if key not in found:
+            await cache.aadd(key, _initial_version(), None)
+            found[key] = await cache.aget(key)
+        versions[name] = found[key]
+    return versions
+
+
+def bump_data_version(*names):
+    """Invalidate everything cached under the given counters"""
+    for name in names:
+        key = VERSION_KEY_PREFIX + name
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
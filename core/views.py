@@ -2,33 +2,88 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from tournaments.models import Tournament, TournamentRegistration, Schedule, Team, Match
+from tournaments.models import (
+    Tournament, TournamentRegistration, Schedule, Team, Match, aget_active_tournament, get_active_tournament,
+)
+from tournaments.notifications import notify_payments_confirmed
+from payments.models import PaymentVerification
+from payments.stripe_checkout import card_payments_enabled
+from payments.tasks import verify_pending_payments
+from payments.verification import providers as verification_providers
 from accounts.models import PlayerProfile, User
-from django.db.models import Q, Count
+from django.db.models import Q, Count, F, Sum
+from django.core.exceptions import ValidationError
 from django.utils import timezone
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, StreamingHttpResponse, Http404
+from django.core.exceptions import PermissionDenied, SuspiciousFileOperation
+from django.conf import settings
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from .db import run_serialized_write
+from .exports import EXPORT_FORMATS, registrations_export_response
+from .idempotency import duplicate_stats, idempotent_post
+from .models import Notification, Task
+from .taskqueue import enqueue
+from .autocomplete import AUTOCOMPLETE_SOURCES, get_prefix_index
+from .page_cache import cache_anonymous_page
+from .search import get_search_backend
+from .routers import read_from_replica
+from .versions import aget_data_versions, get_data_versions
+from .async_helpers import aget_object_or_404, arender, async_login_required, get_request_user
+import asyncio
 import logging
+import mimetypes
+import os
+import posixpath
+import re
 
 logger = logging.getLogger(__name__)
 
+def home_querysets(user):
+    """
+    Listings for home.html. These stay lazy: a cached fragment never
+    evaluates them, whichever view (sync or async) built the context.
+    """
+    # Rankings for players only (exclude admins)
+    top_players = []
+    if user.is_authenticated and not user.is_admin:
+        top_players = PlayerProfile.objects.filter(
+            user__is_admin=False,
+            user__is_superuser=False
+        ).select_related('user').annotate(
+            total_points=F('matches_won') * 10 + F('total_goals')
+        ).order_by(
+            '-matches_won',
+            '-total_goals',
+            '-ranking'
+        )[:10]
+    
+    # Recent registrations and schedules for logged in users
+    recent_registrations = []
+    schedules = []
+    if user.is_authenticated:
+        recent_registrations = TournamentRegistration.objects.filter(
+            status=TournamentRegistration.CONFIRMED
+        ).select_related('player', 'selected_team').order_by('-registration_date')[:10]
+        
+        schedules = Schedule.objects.filter(is_published=True).select_related('tournament')[:5]
+    
+    return {
+        'top_players': top_players,
+        'recent_registrations': recent_registrations,
+        'schedules': schedules,
+        # Get teams for display
+        'teams': Team.objects.all().order_by('name')[:32],
+    }
+
+
+@cache_anonymous_page('landing')
+@read_from_replica
 def home_view(request):
     """Home page view"""
-    # Get active tournament
-    active_tournament = Tournament.objects.filter(is_active=True, status='upcoming').first()
-    
-    # Create default tournament if not exists
-    if not active_tournament:
-        active_tournament = Tournament.objects.create(
-            name="WORLD CUP 2026",
-            description="International Football Tournament 2026",
-            start_date=timezone.now() + timezone.timedelta(days=30),
-            end_date=timezone.now() + timezone.timedelta(days=60),
-            registration_deadline=timezone.now() + timezone.timedelta(days=15),
-            max_teams=32,
-            entry_fee=150.00,
-            status='upcoming',
-            is_active=True
-        )
+    # Get active tournament (never created here, see bootstrap_tournament)
+    active_tournament = get_active_tournament()
     
     # Get user's registration status
     user_registration = None
@@ -44,42 +99,14 @@ def home_view(request):
         user_registered = TournamentRegistration.objects.filter(
             player=request.user, 
             tournament=active_tournament,
-            payment_confirmed=True
+            status=TournamentRegistration.CONFIRMED
         ).exists()
     
-    # Rankings for players only (exclude admins)
-    top_players = []
-    if request.user.is_authenticated and not request.user.is_admin:
-        top_players = PlayerProfile.objects.filter(
-            user__is_admin=False,
-            user__is_superuser=False
-        ).select_related('user').order_by(
-            '-matches_won',
-            '-total_goals',
-            '-ranking'
-        )[:10]
-        
-        for player in top_players:
-            player.total_points = (player.matches_won * 10) + player.total_goals
+    lists = home_querysets(request.user)
     
-    # Recent registrations and schedules for logged in users
-    recent_registrations = []
-    schedules = []
     total_registrations = 0
-    
     if request.user.is_authenticated:
-        recent_registrations = TournamentRegistration.objects.filter(
-            payment_confirmed=True
-        ).select_related('player', 'selected_team').order_by('-registration_date')[:10]
-        
-        total_registrations = TournamentRegistration.objects.filter(
-            payment_confirmed=True
-        ).count()
-        
-        schedules = Schedule.objects.filter(is_published=True)[:5]
-    
-    # Get teams for display
-    teams = Team.objects.all().order_by('name')[:32]
+        total_registrations = Tournament.objects.aggregate(total=Sum('confirmed_count'))['total'] or 0
     
     # Get match stats
     live_matches = Match.objects.filter(status='ongoing').count()
@@ -90,23 +117,65 @@ def home_view(request):
         'active_tournament': active_tournament,
         'user_registered': user_registered,
         'user_registration': user_registration,
-        'top_players': top_players,
-        'recent_registrations': recent_registrations,
-        'schedules': schedules,
-        'teams': teams,
+        **lists,
         'total_registrations': total_registrations,
         'live_matches': live_matches,
         'completed_matches': completed_matches,
         'upcoming_matches': upcoming_matches,
+        'fragment_versions': get_data_versions('leaderboard', 'registrations', 'schedules'),
     }
     
     return render(request, 'core/home.html', context)
 
 
+@cache_anonymous_page('landing')
+@read_from_replica
+async def ahome_view(request):
+    """Async home page: independent queries run through asyncio.gather"""
+    user = await get_request_user(request)
+    active_tournament = await aget_active_tournament()
+    
+    is_player = user.is_authenticated and not user.is_admin
+    own_registrations = TournamentRegistration.objects.filter(player_id=user.pk, tournament=active_tournament)
+    
+    (
+        user_registration, user_registered, total_registrations,
+        live_matches, completed_matches, upcoming_matches, fragment_versions,
+    ) = await asyncio.gather(
+        own_registrations.afirst() if is_player else _none(),
+        own_registrations.filter(status=TournamentRegistration.CONFIRMED).aexists() if is_player else _none(False),
+        Tournament.objects.aaggregate(total=Sum('confirmed_count')) if user.is_authenticated else _none({}),
+        Match.objects.filter(status='ongoing').acount(),
+        Match.objects.filter(status='completed').acount(),
+        Match.objects.filter(status='scheduled').acount(),
+        aget_data_versions('leaderboard', 'registrations', 'schedules'),
+    )
+    
+    context = {
+        'active_tournament': active_tournament,
+        'user_registered': user_registered,
+        'user_registration': user_registration,
+        **home_querysets(user),
+        'total_registrations': total_registrations.get('total') or 0,
+        'live_matches': live_matches,
+        'completed_matches': completed_matches,
+        'upcoming_matches': upcoming_matches,
+        'fragment_versions': fragment_versions,
+    }
+    
+    return await arender(request, 'core/home.html', context)
+
+
+async def _none(value=None):
+    """Placeholder awaitable for a query a visitor does not need"""
+    return value
+
+
 # -----------------------------------------------------
 # Tournament Register
 # -----------------------------------------------------
 @login_required
+@idempotent_post
 def tournament_register(request, tournament_id):
     """Tournament registration with team selection"""
     if request.user.is_admin or request.user.is_superuser:
@@ -124,18 +193,18 @@ def tournament_register(request, tournament_id):
     existing_reg = TournamentRegistration.objects.filter(
         player=request.user, 
         tournament=tournament,
-        payment_confirmed=True
+        status=TournamentRegistration.CONFIRMED
     ).first()
     
     if existing_reg:
         messages.info(request, "You are already registered and payment confirmed!")
         return redirect('home')
     
-    # Check if pending registration exists
+    # Check if pending registration exists (expired reservations can be replaced)
     pending_reg = TournamentRegistration.objects.filter(
         player=request.user, 
         tournament=tournament,
-        payment_confirmed=False
+        status__in=TournamentRegistration.OPEN_STATUSES
     ).first()
     
     if pending_reg:
@@ -150,41 +219,54 @@ def tournament_register(request, tournament_id):
         
         team = get_object_or_404(Team, id=team_id)
         
-        # ✅ IMPORTANT: Check if team is already CONFIRMED in this tournament
-        team_confirmed_taken = TournamentRegistration.objects.filter(
-            tournament=tournament,
-            selected_team=team,
-            payment_confirmed=True
-        ).exists()
-        
-        if team_confirmed_taken:
-            messages.error(request, f"⚠️ Team '{team.name}' is already taken by another player!")
-            return redirect('tournament_register', tournament_id=tournament_id)
-        
-        # ✅ IMPORTANT: Check if team is PENDING (already selected by someone with payment)
-        team_pending = TournamentRegistration.objects.filter(
-            tournament=tournament,
-            selected_team=team,
-            is_paid=True  # শুধু paid registrations check করব
-        ).exclude(player=request.user).exists()
-        
-        if team_pending:
-            messages.error(request, f"❌ Team '{team.name}' is currently pending payment by another player. Please select another team.")
-            return redirect('tournament_register', tournament_id=tournament_id)
-        
-        try:
-            # Create registration
-            registration = TournamentRegistration.objects.create(
+        def reserve():
+            # The checks run in the write transaction, so two players cannot
+            # both pass them before either registration exists
+            if Tournament.objects.get(pk=tournament.pk).is_full:
+                raise ValidationError("Tournament is full! No more slots available.")
+            
+            # ✅ IMPORTANT: Check if team is already CONFIRMED in this tournament
+            team_confirmed_taken = TournamentRegistration.objects.filter(
+                tournament=tournament,
+                selected_team=team,
+                status=TournamentRegistration.CONFIRMED
+            ).exists()
+            if team_confirmed_taken:
+                raise ValidationError(f"⚠️ Team '{team.name}' is already taken by another player!")
+            
+            # ✅ IMPORTANT: Check if team is PENDING (already selected by someone with payment)
+            team_pending = TournamentRegistration.objects.filter(
+                tournament=tournament,
+                selected_team=team,
+                status=TournamentRegistration.SUBMITTED  # শুধু paid registrations check করব
+            ).exclude(player=request.user).exists()
+            if team_pending:
+                raise ValidationError(
+                    f"❌ Team '{team.name}' is currently pending payment by another player. Please select another team."
+                )
+            
+            # An expired reservation still occupies (player, tournament)
+            TournamentRegistration.objects.filter(
+                player=request.user,
+                tournament=tournament,
+                status=TournamentRegistration.EXPIRED
+            ).delete()
+            return TournamentRegistration.objects.create(
                 player=request.user,
                 tournament=tournament,
                 selected_team=team,
-                is_paid=False,
-                payment_confirmed=False
             )
+        
+        try:
+            # Create registration
+            registration = run_serialized_write(reserve)
             
             messages.success(request, f"✅ Team '{team.name}' selected successfully! Please complete payment.")
             return redirect('payment_page', registration_id=registration.id)
             
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+            return redirect('tournament_register', tournament_id=tournament_id)
         except Exception as e:
             logger.error(f"Registration error: {str(e)}")
             messages.error(request, "An error occurred during registration. Please try again.")
@@ -196,14 +278,13 @@ def tournament_register(request, tournament_id):
     # ✅ Get teams that are already CONFIRMED in this tournament
     confirmed_taken_teams = TournamentRegistration.objects.filter(
         tournament=tournament,
-        payment_confirmed=True
+        status=TournamentRegistration.CONFIRMED
     ).values_list('selected_team_id', flat=True)
     
     # ✅ Get teams that are PENDING (paid but not confirmed) in this tournament
     pending_teams = TournamentRegistration.objects.filter(
         tournament=tournament,
-        is_paid=True,
-        payment_confirmed=False
+        status=TournamentRegistration.SUBMITTED
     ).values_list('selected_team_id', flat=True)
     
     # ✅ Prepare team data with availability status
@@ -219,27 +300,21 @@ def tournament_register(request, tournament_id):
             'country': team.country,
             'logo': team.logo,
             'flag_url': team.get_flag_url(),
+            'flag_code': None if team.flag_url else team.get_flag_code(),
             'is_confirmed_taken': is_confirmed_taken,
             'is_pending': is_pending,
             'is_available': is_available,
         })
     
-    # Check tournament capacity
-    total_registered = TournamentRegistration.objects.filter(
-        tournament=tournament,
-        payment_confirmed=True
-    ).count()
-    
-    tournament_full = total_registered >= tournament.max_teams
-    
     context = {
         'tournament': tournament,
         'teams': team_data,
         'confirmed_taken_teams': list(confirmed_taken_teams),
         'pending_teams': list(pending_teams),
-        'total_registered': total_registered,
-        'tournament_full': tournament_full,
-        'remaining_slots': max(0, tournament.max_teams - total_registered),
+        # Capacity from the denormalized counters (no COUNT query)
+        'total_registered': tournament.confirmed_count,
+        'tournament_full': tournament.is_full,
+        'remaining_slots': tournament.remaining_slots,
     }
     
     return render(request, 'core/tournament_register.html', context)
@@ -249,13 +324,14 @@ def tournament_register(request, tournament_id):
 # Payment Page
 # -----------------------------------------------------
 @login_required
+@idempotent_post
 def payment_page(request, registration_id):
     """Payment page after team selection"""
     registration = get_object_or_404(
         TournamentRegistration, 
         id=registration_id, 
         player=request.user,
-        payment_confirmed=False  # শুধু unconfirmed registration
+        status__in=TournamentRegistration.OPEN_STATUSES  # শুধু unconfirmed registration
     )
     
     if request.method == 'POST':
@@ -269,43 +345,55 @@ def payment_page(request, registration_id):
             messages.error(request, "Please fill all payment details!")
             return redirect('payment_page', registration_id=registration_id)
         
-        # Check if team is still available (double-check before payment)
-        team_still_available = not TournamentRegistration.objects.filter(
-            tournament=registration.tournament,
-            selected_team=registration.selected_team,
-            payment_confirmed=True
-        ).exclude(id=registration_id).exists()
-        
-        if not team_still_available:
-            messages.error(request, f"⚠️ Sorry! Team '{registration.selected_team.name}' was taken by another player while you were processing payment.")
-            registration.delete()
-            return redirect('tournament_register', tournament_id=registration.tournament.id)
-        
-        # Also check if team is pending by someone else (extra safety)
-        team_pending_by_others = TournamentRegistration.objects.filter(
-            tournament=registration.tournament,
-            selected_team=registration.selected_team,
-            is_paid=True,
-            payment_confirmed=False
-        ).exclude(id=registration_id).exclude(player=request.user).exists()
-        
-        if team_pending_by_others:
-            messages.error(request, f"⚠️ Sorry! Another player has already submitted payment for team '{registration.selected_team.name}'.")
-            registration.delete()
-            return redirect('tournament_register', tournament_id=registration.tournament.id)
+        def submit():
+            # The team checks run in the write transaction, so two players
+            # holding the same team cannot both pass them and both submit
+            # Check if team is still available (double-check before payment)
+            team_still_available = not TournamentRegistration.objects.filter(
+                tournament=registration.tournament,
+                selected_team=registration.selected_team,
+                status=TournamentRegistration.CONFIRMED
+            ).exclude(id=registration_id).exists()
+            if not team_still_available:
+                raise ValidationError(
+                    f"⚠️ Sorry! Team '{registration.selected_team.name}' was taken by another player while you were processing payment.",
+                    code='team_unavailable',
+                )
+            
+            # Also check if team is pending by someone else (extra safety)
+            team_pending_by_others = TournamentRegistration.objects.filter(
+                tournament=registration.tournament,
+                selected_team=registration.selected_team,
+                status=TournamentRegistration.SUBMITTED
+            ).exclude(id=registration_id).exclude(player=request.user).exists()
+            if team_pending_by_others:
+                raise ValidationError(
+                    f"⚠️ Sorry! Another player has already submitted payment for team '{registration.selected_team.name}'.",
+                    code='team_unavailable',
+                )
+            
+            # Update registration with payment info
+            registration.submit_payment(payment_method, transaction_id.strip(), mobile_number.strip())
+            # A corrected submission is verified afresh
+            PaymentVerification.objects.filter(registration=registration).delete()
         
         try:
-            # Update registration with payment info
-            registration.is_paid = True
-            registration.payment_method = payment_method
-            registration.transaction_id = transaction_id.strip()
-            registration.mobile_number = mobile_number.strip()
-            registration.payment_date = timezone.now()
-            registration.save()
+            run_serialized_write(submit)
             
-            messages.success(request, "Payment submitted! Admin will verify and confirm.")
+            if payment_method in verification_providers():
+                run_serialized_write(enqueue, verify_pending_payments, unique=True)
+                messages.success(request, "Payment submitted! It will be confirmed as soon as we verify it.")
+            else:
+                messages.success(request, "Payment submitted! Admin will verify and confirm.")
             return redirect('home')
             
+        except ValidationError as e:
+            messages.error(request, e.messages[0])
+            if getattr(e, 'code', None) == 'team_unavailable':
+                # The reservation is lost; free it and let the player pick another team
+                run_serialized_write(registration.delete)
+                return redirect('tournament_register', tournament_id=registration.tournament.id)
+            return redirect('home')
         except Exception as e:
             logger.error(f"Payment error: {str(e)}")
             messages.error(request, "An error occurred during payment. Please try again.")
@@ -314,6 +402,7 @@ def payment_page(request, registration_id):
         'registration': registration,
         'tournament': registration.tournament,
         'team': registration.selected_team,
+        'card_payments': card_payments_enabled() and registration.status == TournamentRegistration.RESERVED,
     }
     return render(request, 'core/payment_page.html', context)
 
@@ -331,12 +420,12 @@ def cancel_registration(request, registration_id):
     )
 
     # If already paid and confirmed, do NOT allow cancellation
-    if registration.payment_confirmed:
+    if registration.status == TournamentRegistration.CONFIRMED:
         messages.error(request, "You cannot cancel after payment confirmation.")
         return redirect("home")
     
     # If already paid (pending admin confirmation), show warning
-    if registration.is_paid and not registration.payment_confirmed:
+    if registration.status == TournamentRegistration.SUBMITTED:
         messages.warning(request, "Your payment has been submitted. Please contact admin if you want to cancel.")
         return redirect("home")
 
@@ -369,7 +458,7 @@ def manage_registrations(request):
     if request.method == 'GET':
         # Find tournaments where same team selected by multiple confirmed players
         tournament_stats = TournamentRegistration.objects.filter(
-            payment_confirmed=True
+            status=TournamentRegistration.CONFIRMED
         ).values(
             'tournament__name', 
             'selected_team__name'
@@ -390,21 +479,14 @@ def manage_registrations(request):
         registration = get_object_or_404(TournamentRegistration, id=reg_id)
         
         if action == 'confirm_payment':
-            # ✅ Double-check if team is still available
-            team_already_taken = TournamentRegistration.objects.filter(
-                tournament=registration.tournament,
-                selected_team=registration.selected_team,
-                payment_confirmed=True
-            ).exclude(id=reg_id).exists()
-            
-            if team_already_taken:
-                messages.error(request, f"Cannot confirm! Team '{registration.selected_team.name}' is already taken by another confirmed player in this tournament.")
+            # ✅ The team check is the unique_team_per_tournament constraint
+            try:
+                run_serialized_write(registration.confirm, request.user)
+            except ValidationError as e:
+                # team taken, tournament full, or already confirmed/rejected
+                messages.error(request, f"Cannot confirm! {e.messages[0]}")
             else:
-                registration.is_paid = True
-                registration.payment_confirmed = True
-                registration.confirmed_by = request.user
-                registration.confirmed_date = timezone.now()
-                registration.save()
+                run_serialized_write(notify_payments_confirmed, [registration])
                 messages.success(request, f"✅ Payment confirmed for {registration.player.username}!")
                 
         elif action == 'delete':
@@ -412,30 +494,116 @@ def manage_registrations(request):
             messages.success(request, f"Registration deleted for {registration.player.username}!")
         
         elif action == 'reject_payment':
-            registration.is_paid = False
-            registration.payment_method = ''
-            registration.transaction_id = ''
-            registration.mobile_number = ''
-            registration.payment_date = None
-            registration.save()
-            messages.success(request, f"Payment rejected for {registration.player.username}!")
+            try:
+                run_serialized_write(registration.reject)
+            except ValidationError as e:
+                messages.error(request, f"Cannot reject! {e.messages[0]}")
+            else:
+                messages.success(request, f"Payment rejected for {registration.player.username}!")
         
         return redirect('manage_registrations')
 
+    # Double-submitted registration/payment forms answered from their first outcome
+    duplicate_submissions = duplicate_stats(timezone.now() - timezone.timedelta(days=1))
     context = {
         'registrations': registrations,
         'duplicate_teams': duplicate_teams,
+        'duplicate_submissions': duplicate_submissions,
+        'duplicates_absorbed': sum(row['duplicates'] for row in duplicate_submissions),
     }
     return render(request, 'core/manage_registrations.html', context)
 
 
+@login_required
+def export_registrations(request):
+    """Stream all registrations with payment details as CSV or XLSX (superusers only)"""
+    if not request.user.is_superuser:
+        messages.error(request, "You are not authorized to access this page.")
+        return redirect("home")
+    
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponse(f"Unknown export format '{export_format}'", status=400)
+    
+    registrations = TournamentRegistration.objects.all()
+    if request.GET.get('tournament'):
+        registrations = registrations.filter(tournament_id=request.GET['tournament'])
+    return registrations_export_response(registrations, export_format)
+
+
+# -----------------------------------------------------
+# ⭐ In-app Notifications
+# -----------------------------------------------------
+@login_required
+def notifications(request):
+    """Latest notifications; showing them marks them read"""
+    latest = list(request.user.notifications.all()[:50])
+    unread = [notification.pk for notification in latest if notification.read_at is None]
+    if unread:
+        run_serialized_write(Notification.objects.filter(pk__in=unread).update, read_at=timezone.now())
+    return render(request, 'core/notifications.html', {'notifications': latest, 'unread': set(unread)})
+
+
+# -----------------------------------------------------
+# ⭐ Background Task Dashboard (superusers)
+# -----------------------------------------------------
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def task_stats(since):
+    """Per task name: counts by status and queue latency / run time percentiles"""
+    stats = {}
+    counts = Task.objects.filter(Q(created_at__gte=since) | ~Q(status__in=[Task.DONE, Task.FAILED]))
+    for row in counts.values('name', 'status').annotate(count=Count('id')):
+        stats.setdefault(row['name'], {'name': row['name']})[row['status']] = row['count']
+    
+    finished = Task.objects.filter(finished_at__gte=since, started_at__isnull=False).values_list(
+        'name', 'run_at', 'started_at', 'finished_at'
+    ).order_by('-finished_at')[:10000]
+    timings = {}
+    for name, run_at, started_at, finished_at in finished:
+        waits, runs = timings.setdefault(name, ([], []))
+        waits.append(max(0, (started_at - run_at).total_seconds()))
+        runs.append((finished_at - started_at).total_seconds())
+    for name, (waits, runs) in timings.items():
+        stats.setdefault(name, {'name': name}).update(
+            wait_p50=_percentile(waits, 0.5), wait_p95=_percentile(waits, 0.95),
+            run_p50=_percentile(runs, 0.5), run_p95=_percentile(runs, 0.95),
+        )
+    return sorted(stats.values(), key=lambda row: row['name'])
+
+
+@login_required
+def task_dashboard(request):
+    """Queue depth and task latency over the last ?hours= (default 24)"""
+    if not request.user.is_superuser:
+        messages.error(request, "You are not authorized to access this page.")
+        return redirect("home")
+    
+    try:
+        hours = max(1, min(int(request.GET.get('hours', 24)), 24 * 30))
+    except ValueError:
+        hours = 24
+    context = {
+        'hours': hours,
+        'hour_options': [1, 24, 168],
+        'stats': task_stats(timezone.now() - timezone.timedelta(hours=hours)),
+        'recent_failures': Task.objects.filter(status=Task.FAILED).order_by('-finished_at')[:10],
+    }
+    return render(request, 'core/task_dashboard.html', context)
+
+
 # -----------------------------------------------------
 # ⭐ Team Availability Check API
 # -----------------------------------------------------
 @login_required
 def check_team_availability(request, tournament_id):
     """API endpoint to check team availability"""
-    if request.method == 'GET' and request.is_ajax():
+    if request.method == 'GET' and request.headers.get('x-requested-with') == 'XMLHttpRequest':
         tournament = get_object_or_404(Tournament, id=tournament_id)
         team_id = request.GET.get('team_id')
         
@@ -446,15 +614,14 @@ def check_team_availability(request, tournament_id):
             is_confirmed_taken = TournamentRegistration.objects.filter(
                 tournament=tournament,
                 selected_team=team,
-                payment_confirmed=True
+                status=TournamentRegistration.CONFIRMED
             ).exists()
             
             # Check if team is pending
             is_pending = TournamentRegistration.objects.filter(
                 tournament=tournament,
                 selected_team=team,
-                is_paid=True,
-                payment_confirmed=False
+                status=TournamentRegistration.SUBMITTED
             ).exists()
             
             return JsonResponse({
@@ -468,10 +635,78 @@ def check_team_availability(request, tournament_id):
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 
+@async_login_required
+async def acheck_team_availability(request, tournament_id):
+    """Async team availability API: both lookups and both checks run concurrently"""
+    team_id = request.GET.get('team_id')
+    is_ajax = request.headers.get('x-requested-with') == 'XMLHttpRequest'
+    if request.method != 'GET' or not is_ajax or not team_id:
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    
+    tournament, team = await asyncio.gather(
+        aget_object_or_404(Tournament.objects.all(), id=tournament_id),
+        aget_object_or_404(Team.objects.all(), id=team_id),
+    )
+    registrations = TournamentRegistration.objects.filter(tournament=tournament, selected_team=team)
+    is_confirmed_taken, is_pending = await asyncio.gather(
+        registrations.filter(status=TournamentRegistration.CONFIRMED).aexists(),
+        registrations.filter(status=TournamentRegistration.SUBMITTED).aexists(),
+    )
+    
+    return JsonResponse({
+        'team_id': team_id,
+        'team_name': team.name,
+        'is_confirmed_taken': is_confirmed_taken,
+        'is_pending': is_pending,
+        'is_available': not (is_confirmed_taken or is_pending),
+    })
+
+
+# -----------------------------------------------------
+# ⭐ Player / Team Autocomplete API
+# -----------------------------------------------------
+def autocomplete_results(kind, term, limit):
+    """[{'id', 'label'}] of teams or players whose name starts with term"""
+    index = get_prefix_index(kind)
+    if index is None:
+        # Index still cold: ask the database
+        return database_autocomplete_results(kind, term, limit)
+    return index.search(term, limit)
+
+
+def database_autocomplete_results(kind, term, limit):
+    backend = get_search_backend()
+    if kind == 'team':
+        rows = backend.filter(Team.objects.all(), 'team', term, prefix=True).order_by('name')
+        rows = rows.values_list('id', 'name')
+    else:
+        players = User.objects.filter(is_admin=False, is_superuser=False)
+        rows = backend.filter(players, 'player', term, prefix=True).order_by('username')
+        rows = rows.values_list('id', 'username')
+    return [{'id': pk, 'label': label} for pk, label in rows[:limit]]
+
+
+@login_required
+@read_from_replica
+def autocomplete(request):
+    """JSON prefix search: ?type=team|player&q=...&limit=..."""
+    kind = request.GET.get('type', 'team')
+    term = request.GET.get('q', '').strip()
+    if kind not in AUTOCOMPLETE_SOURCES:
+        return JsonResponse({'error': 'type must be team or player'}, status=400)
+    try:
+        limit = min(int(request.GET.get('limit', 10)), settings.AUTOCOMPLETE_MAX_RESULTS)
+    except ValueError:
+        limit = 10
+    results = autocomplete_results(kind, term, max(limit, 1)) if term else []
+    return JsonResponse({'results': results})
+
+
 # -----------------------------------------------------
 # ⭐ Tournament Dashboard
 # -----------------------------------------------------
 @login_required
+@read_from_replica
 def tournament_dashboard(request, tournament_id):
     """Dashboard showing tournament details and team selections"""
     tournament = get_object_or_404(Tournament, id=tournament_id)
@@ -482,7 +717,7 @@ def tournament_dashboard(request, tournament_id):
     # Get all registrations with payment confirmed
     confirmed_registrations = TournamentRegistration.objects.filter(
         tournament=tournament,
-        payment_confirmed=True
+        status=TournamentRegistration.CONFIRMED
     ).select_related('player', 'selected_team').order_by('selected_team__name')
     
     # Get available teams
@@ -494,7 +729,7 @@ def tournament_dashboard(request, tournament_id):
     user_registered = TournamentRegistration.objects.filter(
         player=request.user,
         tournament=tournament,
-        payment_confirmed=True
+        status=TournamentRegistration.CONFIRMED
     ).exists()
     
     # Determine the user's registration object (if any) for this tournament
@@ -512,8 +747,177 @@ def tournament_dashboard(request, tournament_id):
         'confirmed_registrations': confirmed_registrations,
         'available_teams': available_teams,
         'user_registered': user_registered,
-        'total_registered': confirmed_registrations.count(),
+        'total_registered': tournament.confirmed_count,
+        'max_teams': tournament.max_teams,
+    }
+    
+    return render(request, 'core/tournament_dashboard.html', context)
+
+
+@async_login_required
+@read_from_replica
+async def atournament_dashboard(request, tournament_id):
+    """Async tournament dashboard"""
+    user = await get_request_user(request)
+    tournament = await aget_object_or_404(Tournament.objects.all(), id=tournament_id)
+    
+    confirmed = TournamentRegistration.objects.filter(
+        tournament=tournament,
+        status=TournamentRegistration.CONFIRMED
+    )
+    own_registrations = TournamentRegistration.objects.filter(player_id=user.pk, tournament=tournament)
+    
+    async def confirmed_registrations():
+        return [r async for r in confirmed.select_related('player', 'selected_team').order_by('selected_team__name')]
+    
+    async def available_teams():
+        taken = confirmed.values_list('selected_team_id', flat=True)
+        return [t async for t in Team.objects.exclude(id__in=taken).order_by('name')]
+    
+    registrations, teams, user_registered, user_registration = await asyncio.gather(
+        confirmed_registrations(),
+        available_teams(),
+        own_registrations.filter(status=TournamentRegistration.CONFIRMED).aexists(),
+        own_registrations.afirst() if not user.is_admin else _none(),
+    )
+    
+    context = {
+        'active_tournament': tournament,
+        'user_registration': user_registration,
+        'tournament': tournament,
+        'confirmed_registrations': registrations,
+        'available_teams': teams,
+        'user_registered': user_registered,
+        'total_registered': tournament.confirmed_count,
         'max_teams': tournament.max_teams,
     }
     
-    return render(request, 'core/tournament_dashboard.html', context)
\ No newline at end of file
+    return await arender(request, 'core/tournament_dashboard.html', context)
+
+
+# -----------------------------------------------------
+# ⭐ Media Files (uploads)
+# -----------------------------------------------------
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOB_STEM_RE = re.compile(r'^[0-9a-f]{64}$')
+MEDIA_CHUNK_SIZE = 64 * 1024
+
+
+def can_view_media(user, name):
+    """Match screenshots are private to the two players and admins"""
+    if not name.startswith('match_screenshots/'):
+        return True
+    if not user.is_authenticated:
+        return False
+    if user.is_superuser or user.is_admin:
+        return True
+
+    directory, filename = posixpath.split(name)
+    if posixpath.basename(directory) == 'thumbs':
+        # match_screenshots/ab/thumbs/<stem>.320.webp belongs to match_screenshots/ab/<stem>.*
+        stem = filename.split('.', 1)[0]
+        screenshot_filter = Q(screenshot__startswith=f"{posixpath.dirname(directory)}/{stem}.")
+    else:
+        screenshot_filter = Q(screenshot=name)
+    return Match.objects.filter(screenshot_filter).filter(
+        Q(player1=user) | Q(player2=user)
+    ).exists()
+
+
+def _media_etag(name, stat):
+    stem = posixpath.basename(name).split('.', 1)[0]
+    if BLOB_STEM_RE.match(stem):
+        return quote_etag(stem)  # content-addressed: the name is the hash
+    return quote_etag(f"{stat.st_size:x}-{stat.st_mtime_ns:x}")
+
+
+def _requested_range(request, size, etag):
+    """(start, end) of a single satisfiable byte range, None for the whole file, or False"""
+    header = request.headers.get('Range')
+    if not header or request.headers.get('If-Range', etag) != etag:
+        return None
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None  # multiple or malformed ranges: send everything
+    start, end = match.groups()
+    if start == '':
+        start, end = max(0, size - int(end)), size - 1  # suffix range: last N bytes
+    else:
+        start, end = int(start), min(int(end) if end else size - 1, size - 1)
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = handle.read(min(MEDIA_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_media(request, path):
+    """
+    Serve an uploaded file with ETag/Last-Modified validation and byte ranges.
+
+    With MEDIA_OFFLOAD set, the body is left to the front-end server
+    (nginx X-Accel-Redirect or X-Sendfile); otherwise a FileResponse lets
+    the WSGI server's file_wrapper send it with os.sendfile.
+    """
+    name = posixpath.normpath(path).lstrip('/')
+    if name == 'tmp' or name.startswith('tmp/'):
+        # ContentAddressedStorage's in-flight uploads
+        raise Http404("Media file not found")
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404("Invalid media path")
+    if not os.path.isfile(full_path):
+        raise Http404("Media file not found")
+    if not can_view_media(request.user, name):
+        raise PermissionDenied
+
+    stat = os.stat(full_path)
+    etag = _media_etag(name, stat)
+    last_modified = int(stat.st_mtime)
+    private = name.startswith('match_screenshots/')
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        if settings.MEDIA_OFFLOAD == 'x-accel':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = settings.MEDIA_X_ACCEL_PREFIX + name
+        elif settings.MEDIA_OFFLOAD == 'x-sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = full_path
+        else:
+            byte_range = _requested_range(request, stat.st_size, etag)
+            if byte_range is False:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f"bytes */{stat.st_size}"
+            elif byte_range:
+                start, end = byte_range
+                response = StreamingHttpResponse(
+                    _read_range(full_path, start, end), status=206, content_type=content_type,
+                )
+                response['Content-Range'] = f"bytes {start}-{end}/{stat.st_size}"
+                response['Content-Length'] = end - start + 1
+            else:
+                response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+                del response['Content-Disposition']
+        response['Accept-Ranges'] = 'bytes'
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if BLOB_STEM_RE.match(posixpath.basename(name).split('.', 1)[0]):
+        max_age = f"max-age={settings.STATIC_MAX_AGE}, immutable"
+    else:
+        max_age = "max-age=3600"
+    response['Cache-Control'] = f"{'private' if private else 'public'}, {max_age}"
+    return response
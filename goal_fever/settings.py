@@ -8,13 +8,43 @@ import os
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+
+def env_bool(name, default=False):
+    """Read a boolean flag from the environment"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def env_int(name, default):
+    """Read an integer from the environment"""
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+
+def env_list(name, default):
+    """Read a comma separated list from the environment"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+# Settings profile: "dev" (default) or "prod"
+GOAL_FEVER_ENV = os.environ.get('GOAL_FEVER_ENV', 'dev').strip().lower()
+IS_PRODUCTION = GOAL_FEVER_ENV in ('prod', 'production')
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'your-secret-key-here-change-in-production'
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'your-secret-key-here-change-in-production')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = env_bool('DJANGO_DEBUG', not IS_PRODUCTION)
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = env_list(
+    'DJANGO_ALLOWED_HOSTS',
+    ['localhost', '127.0.0.1'] if IS_PRODUCTION else [],
+)
 
 # Application definition
 INSTALLED_APPS = [
@@ -42,7 +72,9 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.routers.ReplicaPinningMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -68,16 +100,84 @@ TEMPLATES = [
     },
 ]
 
+if IS_PRODUCTION:
+    # Compile every template once per process instead of on each render
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'goal_fever.wsgi.application'
 
 # Database
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+        # Keep connections open between requests in production
+        'CONN_MAX_AGE': env_int('DJANGO_CONN_MAX_AGE', 600 if IS_PRODUCTION else 0),
+        'CONN_HEALTH_CHECKS': IS_PRODUCTION,
     }
 }
 
+# Optional read replica for the read-heavy pages (see core.routers).
+# Reads from views marked @read_from_replica go to it unless the session
+# wrote within the last REPLICA_PIN_SECONDS.
+REPLICA_DB_NAME = os.environ.get('DJANGO_REPLICA_DB_NAME')
+if REPLICA_DB_NAME:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': REPLICA_DB_NAME,
+        'TEST': {'MIRROR': 'default'},
+    }
+READ_REPLICA_ALIAS = 'replica' if REPLICA_DB_NAME else None
+REPLICA_PIN_SECONDS = env_int('DJANGO_REPLICA_PIN_SECONDS', 10)
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# PRAGMAs run on every new SQLite connection (see core.db).
+# WAL lets readers run alongside the single writer; busy_timeout makes a
+# writer wait for the lock instead of failing with "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': env_int('SQLITE_BUSY_TIMEOUT_MS', 5000),
+    'mmap_size': env_int('SQLITE_MMAP_SIZE', 128 * 1024 * 1024),
+}
+if IS_PRODUCTION:
+    SQLITE_PRAGMAS.update({
+        'temp_store': 'MEMORY',
+        'cache_size': -20000,  # ~20 MB page cache
+    })
+
+# Queue short write transactions behind one in-process lock and retry
+# lock errors with exponential backoff (see core.db.run_serialized_write)
+SQLITE_SERIALIZE_WRITES = env_bool('SQLITE_SERIALIZE_WRITES', IS_PRODUCTION)
+SQLITE_WRITE_RETRIES = env_int('SQLITE_WRITE_RETRIES', 5)
+SQLITE_WRITE_BACKOFF = 0.05  # seconds, doubled on every retry
+
+# Cache: local memory by default, file based with DJANGO_CACHE_BACKEND=file
+CACHE_BACKEND = os.environ.get('DJANGO_CACHE_BACKEND', 'locmem').strip().lower()
+if CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', BASE_DIR / 'cache'),
+            'TIMEOUT': 300,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'goal-fever',
+            'TIMEOUT': 300,
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -94,6 +194,11 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Route the read-heavy pages to their coroutine versions (ahome_view,
+# aschedule_view, ...). Turn on when serving goal_fever.asgi under an ASGI
+# server; under WSGI every async view would pay for its own event loop.
+ASYNC_VIEWS = env_bool('DJANGO_ASYNC_VIEWS', False)
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -105,17 +210,152 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'static')
 ]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Resized image variants written by `manage.py build_images` (see core.images)
+# and served under static/images/optimized/
+IMAGE_BUILD_DIR = os.path.join(BASE_DIR, 'build', 'images')
+IMAGE_BUILD_URL_PREFIX = 'images/optimized'
+IMAGE_VARIANT_WIDTHS = [160, 320, 640, 960]
+if os.path.isdir(IMAGE_BUILD_DIR):
+    STATICFILES_DIRS.append((IMAGE_BUILD_URL_PREFIX, IMAGE_BUILD_DIR))
+
+# Team flag sprite written by `manage.py build_flag_sprite` (see tournaments.flags)
+FLAG_SPRITE_DIR = os.path.join(BASE_DIR, 'build', 'flags')
+FLAG_SPRITE_URL_PREFIX = 'flags'
+FLAG_SOURCE = 'https://flagcdn.com/w80/{code}.png'
+FLAG_CELL_SIZE = (80, 50)
+if os.path.isdir(FLAG_SPRITE_DIR):
+    STATICFILES_DIRS.append((FLAG_SPRITE_URL_PREFIX, FLAG_SPRITE_DIR))
+
+STORAGES = {
+    # Uploads are stored once per distinct content (see core.storage)
+    'default': {'BACKEND': 'core.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+if IS_PRODUCTION:
+    # collectstatic writes content-hashed copies, a manifest of them and
+    # gzip/brotli siblings served by core.middleware.StaticFilesMiddleware
+    STORAGES['staticfiles'] = {'BACKEND': 'core.storage.CompressedManifestStaticStorage'}
+
+# Cache lifetime for content-hashed static files (one year)
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
 
 # Media files (User uploaded files)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploaded images are normalized and thumbnailed by a background task
+# (see core.thumbnails)
+UPLOAD_MAX_DIMENSION = 1920
+THUMBNAIL_SIZES = {'small': 96, 'medium': 320}
+
+# How core.views.serve_media hands file bodies to the front-end server:
+# '' (stream from Django), 'x-accel' (nginx internal location at
+# MEDIA_X_ACCEL_PREFIX) or 'x-sendfile' (Apache/lighttpd)
+MEDIA_OFFLOAD = os.environ.get('DJANGO_MEDIA_OFFLOAD', '').strip().lower()
+MEDIA_X_ACCEL_PREFIX = '/protected-media/'
+
+# Unreferenced media blobs younger than this are kept by `manage.py gc_media`
+MEDIA_GC_GRACE_SECONDS = 60 * 60 * 24
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
+# Load the logged-in user (and PlayerProfile) from the cache, see accounts.backends.
+# ModelBackend stays listed: sessions created before the switch name it as
+# their backend, and Django logs out sessions whose backend is not listed.
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_TIMEOUT = env_int('DJANGO_USER_CACHE_TIMEOUT', 60)
+
+# Admin search and autocomplete lookups, see core.search. The FTS5 backend
+# falls back to LIKE where its tables are missing.
+SEARCH_BACKEND = os.environ.get('DJANGO_SEARCH_BACKEND', 'core.search.FTS5SearchBackend')
+
+# Background tasks are stored in core.Task and run by `manage.py run_workers`
+# (see core.taskqueue). TASKS_EAGER runs them inline after commit instead.
+TASKS_EAGER = env_bool('DJANGO_TASKS_EAGER', False)
+TASK_MAX_ATTEMPTS = 3
+TASK_RETRY_BACKOFF = 10  # seconds, doubled on every retry
+TASK_LEASE_SECONDS = 600  # a running task is handed to another worker after this
+
+# Outgoing mail. Notifications (core.notifications) are emailed by a task
+# that coalesces everything queued within NOTIFICATION_COALESCE_SECONDS and
+# sends it over NOTIFICATION_SMTP_CONNECTIONS reused SMTP connections,
+# NOTIFICATION_EMAIL_BATCH_SIZE recipients at a time (`manage.py
+# bench_notifications` measures it against a local sink server).
+EMAIL_BACKEND = os.environ.get('DJANGO_EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('DJANGO_EMAIL_HOST', 'localhost')
+EMAIL_PORT = env_int('DJANGO_EMAIL_PORT', 25)
+EMAIL_HOST_USER = os.environ.get('DJANGO_EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('DJANGO_EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = env_bool('DJANGO_EMAIL_USE_TLS', False)
+DEFAULT_FROM_EMAIL = os.environ.get('DJANGO_DEFAULT_FROM_EMAIL', 'Goal Fever <noreply@goalfever.local>')
+SITE_URL = os.environ.get('DJANGO_SITE_URL', 'http://localhost:8000')
+NOTIFICATION_COALESCE_SECONDS = env_int('DJANGO_NOTIFICATION_COALESCE_SECONDS', 30)
+NOTIFICATION_EMAIL_BATCH_SIZE = 200
+NOTIFICATION_SMTP_CONNECTIONS = env_int('DJANGO_NOTIFICATION_SMTP_CONNECTIONS', 1)
+
+# Automatic checks of submitted bKash/Nagad transaction ids, see
+# payments.verification. Providers without a URL are left to the admins.
+# CLIENT is any class with async get_json()/aclose() (payments.http).
+PAYMENT_VERIFICATION = {
+    'CLIENT': os.environ.get('DJANGO_PAYMENT_VERIFICATION_CLIENT', 'payments.http.StdlibHTTPClient'),
+    'CONCURRENCY': env_int('DJANGO_PAYMENT_VERIFICATION_CONCURRENCY', 20),
+    'TIMEOUT': 10,
+    'BATCH_SIZE': 2000,  # capped to what finishes within TASK_LEASE_SECONDS / 2 (batch_limit)
+    # Not found yet / provider errors are asked again after RETRY_SECONDS
+    'RETRY_SECONDS': 300,
+    'MAX_ATTEMPTS': 12,
+    'PROVIDERS': {
+        'bKash': {
+            'URL': os.environ.get('DJANGO_BKASH_VERIFY_URL', ''),
+            'TOKEN': os.environ.get('DJANGO_BKASH_VERIFY_TOKEN', ''),
+        },
+        'Nagad': {
+            'URL': os.environ.get('DJANGO_NAGAD_VERIFY_URL', ''),
+            'TOKEN': os.environ.get('DJANGO_NAGAD_VERIFY_TOKEN', ''),
+        },
+    },
+}
+
+# Card payments through Stripe Checkout (payments.stripe_checkout). The
+# webhook only stores events; process_stripe_events handles them in batches
+# of STRIPE_EVENT_BATCH_SIZE. STRIPE_API_BASE can point at stripe-mock.
+STRIPE_SECRET_KEY = os.environ.get('DJANGO_STRIPE_SECRET_KEY', '')
+STRIPE_WEBHOOK_SECRET = os.environ.get('DJANGO_STRIPE_WEBHOOK_SECRET', '')
+STRIPE_WEBHOOK_TOLERANCE = 300  # seconds a signed event stays valid
+STRIPE_API_BASE = os.environ.get('DJANGO_STRIPE_API_BASE', 'https://api.stripe.com')
+STRIPE_CURRENCY = 'bdt'
+STRIPE_EVENT_BATCH_SIZE = 100
+
+# Player/team autocomplete answers from an in-process prefix index
+# (core.autocomplete), rebuilt after AUTOCOMPLETE_INDEX_TTL seconds to
+# pick up changes made by other worker processes
+AUTOCOMPLETE_MAX_RESULTS = 20
+AUTOCOMPLETE_INDEX_TTL = env_int('DJANGO_AUTOCOMPLETE_INDEX_TTL', 300)
+AUTOCOMPLETE_BUILD_IN_BACKGROUND = True
+
+# Forms carrying {% idempotency_field %} (core.idempotency) are processed
+# once per token; a double submit replays the first outcome. Tokens are
+# purged after IDEMPOTENCY_KEY_TTL seconds. A repeat that arrives while the
+# first submission is still running waits up to IDEMPOTENCY_PENDING_WAIT
+# seconds for its outcome.
+IDEMPOTENCY_KEY_TTL = env_int('DJANGO_IDEMPOTENCY_KEY_TTL', 24 * 3600)
+IDEMPOTENCY_PENDING_WAIT = 3
+
+# Whole-page cache for anonymous visitors of the landing page, see core.page_cache (0 disables)
+ANON_PAGE_CACHE_TIMEOUT = env_int('DJANGO_ANON_PAGE_CACHE_TIMEOUT', 30)
+
+# Sessions are read from the cache and written through to the database
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 # Login/Logout URLs
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'home'
@@ -1,22 +1,32 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
 # Direct import from core views
 from core.views import (
     home_view, 
+    ahome_view,
     tournament_register, 
     payment_page, 
     cancel_registration,
-    manage_registrations  # Superuser management page
+    manage_registrations,  # Superuser management page
+    export_registrations,
+    task_dashboard,
+    notifications,
+    check_team_availability,
+    acheck_team_availability,
+    autocomplete,
+    serve_media,
 )
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     
     # Direct URLs - no namespace conflict
-    path('', home_view, name='home'),
+    path('', ahome_view if settings.ASYNC_VIEWS else home_view, name='home'),
     path('tournament/register/<int:tournament_id>/', tournament_register, name='tournament_register'),
     path('payment/<int:registration_id>/', payment_page, name='payment_page'),
 
@@ -25,6 +35,17 @@ urlpatterns = [
 
     # Superuser Manage Registrations Page
     path('manage-registrations/', manage_registrations, name='manage_registrations'),
+    path('manage-registrations/export/', export_registrations, name='export_registrations'),
+    path('manage-tasks/', task_dashboard, name='task_dashboard'),
+    path('notifications/', notifications, name='notifications'),
+
+    # Team availability API (JSON)
+    path(
+        'check-team/<int:tournament_id>/',
+        acheck_team_availability if settings.ASYNC_VIEWS else check_team_availability,
+        name='check_team_availability',
+    ),
+    path('autocomplete/', autocomplete, name='autocomplete'),
     
     # Other apps
     path('accounts/', include('accounts.urls')),
@@ -32,6 +53,10 @@ urlpatterns = [
     path('payments/', include('payments.urls')),
 ]
 
+# Uploads: conditional GET, byte ranges and access control (see core.views.serve_media)
+urlpatterns += [
+    re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media, name='media'),
+]
+
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
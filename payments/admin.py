@@ -1,3 +1,34 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Payment, PaymentVerification, StripeEvent
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'tournament_registration', 'amount', 'payment_method', 'transaction_id', 'status',
+                    'payment_date')
+    list_filter = ('status', 'payment_method')
+    list_select_related = ('user', 'tournament_registration__tournament', 'tournament_registration__selected_team',
+                           'tournament_registration__player')
+    search_fields = ('transaction_id', 'user__username')
+    raw_id_fields = ('user', 'tournament_registration')
+    ordering = ('-id',)
+
+
+@admin.register(PaymentVerification)
+class PaymentVerificationAdmin(admin.ModelAdmin):
+    list_display = ('registration', 'transaction_id', 'outcome', 'detail', 'attempts', 'checked_at', 'response_ms')
+    list_filter = ('outcome',)
+    list_select_related = ('registration__player', 'registration__tournament', 'registration__selected_team')
+    search_fields = ('transaction_id',)
+    raw_id_fields = ('registration',)
+    ordering = ('-checked_at',)
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'type', 'received_at', 'processed_at', 'attempts')
+    list_filter = ('type',)
+    search_fields = ('event_id',)
+    ordering = ('-id',)
+    readonly_fields = ('event_id', 'type', 'payload', 'received_at', 'processed_at', 'attempts', 'last_error')
@@ -0,0 +1,124 @@
+# payments/http.py
+"""
+Async HTTP clients for the payment providers. Anything with
+`async get_json(url, headers=None) -> (status, data)` and `async aclose()`
+can be plugged in through PAYMENT_VERIFICATION['CLIENT'].
+"""
+import asyncio
+import json
+import ssl
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+except ImportError:  # optional: StdlibHTTPClient needs nothing extra
+    httpx = None
+
+
+class HTTPError(Exception):
+    pass
+
+
+class StdlibHTTPClient:
+    """
+    HTTP/1.1 over asyncio streams with keep-alive connections pooled per
+    host; at most `max_connections` requests are in flight at once.
+    """
+
+    def __init__(self, max_connections=20, timeout=10):
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle = {}  # (scheme, host, port) -> [(reader, writer)]
+        self.connections_opened = 0
+
+    async def get_json(self, url, headers=None):
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        lines = [f"GET {path} HTTP/1.1", f"Host: {parts.netloc}", "Accept: application/json"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        request = ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+        async with self._slots:
+            idle = self._idle.setdefault(key, [])
+            # A pooled connection may have been closed by the server; retry once on a fresh one
+            for reuse in (bool(idle), False):
+                reader, writer = idle.pop() if reuse else await self._connect(key)
+                try:
+                    status, response_headers, body = await asyncio.wait_for(
+                        self._exchange(reader, writer, request), self.timeout
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError) as exc:
+                    writer.close()
+                    if reuse:
+                        continue
+                    raise HTTPError(f"GET {url}: {exc!r}") from exc
+                except BaseException:
+                    writer.close()
+                    raise
+                break
+            if response_headers.get('connection', '').lower() == 'close':
+                writer.close()
+            else:
+                idle.append((reader, writer))
+
+        try:
+            return status, json.loads(body) if body else None
+        except ValueError as exc:
+            raise HTTPError(f"GET {url}: response is not JSON") from exc
+
+    async def _connect(self, key):
+        scheme, host, port = key
+        self.connections_opened += 1
+        return await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=ssl.create_default_context() if scheme == 'https' else None),
+            self.timeout,
+        )
+
+    async def _exchange(self, reader, writer, request):
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readuntil(b"\r\n")
+        status = int(status_line.split()[1])
+        headers = {}
+        while (line := await reader.readuntil(b"\r\n")) != b"\r\n":
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b""
+            while size := int((await reader.readuntil(b"\r\n")).split(b";")[0], 16):
+                body += (await reader.readexactly(size + 2))[:-2]
+            await reader.readuntil(b"\r\n")
+        else:
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+        return status, headers, body
+
+    async def aclose(self):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle.clear()
+
+
+class HttpxClient:
+    """The same interface on httpx.AsyncClient, when httpx is installed"""
+
+    def __init__(self, max_connections=20, timeout=10):
+        if httpx is None:
+            raise ImportError("HttpxClient needs the httpx package")
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout,
+        )
+
+    async def get_json(self, url, headers=None):
+        try:
+            response = await self._client.get(url, headers=headers)
+            return response.status_code, response.json() if response.content else None
+        except (httpx.HTTPError, ValueError) as exc:
+            raise HTTPError(f"GET {url}: {exc!r}") from exc
+
+    async def aclose(self):
+        await self._client.aclose()
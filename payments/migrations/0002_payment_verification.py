@@ -0,0 +1,28 @@
+# Generated by Django 4.2 on 2026-10-19 03:16
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0007_tournament_unique_name'),
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentVerification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_id', models.CharField(max_length=100)),
+                ('outcome', models.CharField(choices=[('verified', 'Verified'), ('not_found', 'Not found yet'), ('mismatch', 'Amount or number mismatch'), ('conflict', 'Verified, but could not confirm'), ('error', 'Provider error')], max_length=20)),
+                ('detail', models.CharField(blank=True, max_length=255)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('checked_at', models.DateTimeField()),
+                ('response_ms', models.PositiveIntegerField(blank=True, null=True)),
+                ('registration', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='verification', to='tournaments.tournamentregistration')),
+            ],
+        ),
+    ]
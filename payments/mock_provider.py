@@ -0,0 +1,70 @@
+# payments/mock_provider.py
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+
+class _ProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real APIs
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if server.latency:
+            time.sleep(server.latency)
+        prefix = '/transactions/'
+        transaction = server.transactions.get(unquote(self.path[len(prefix):])) if self.path.startswith(prefix) else None
+        if server.token and self.headers.get('Authorization') != f'Bearer {server.token}':
+            status, payload = 401, {'error': 'unauthorized'}
+        elif transaction is None:
+            status, payload = 404, {'error': 'not found'}
+        else:
+            status, payload = 200, transaction
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockPaymentProvider(ThreadingHTTPServer):
+    """
+    Stand-in for a bKash/Nagad transaction lookup API on 127.0.0.1:
+    GET /transactions/<id> answers with what add() stored, or 404.
+    `latency` (seconds) is added to every response.
+    """
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, port=0, latency=0, token=''):
+        super().__init__(('127.0.0.1', port), _ProviderHandler)
+        self.latency = latency
+        self.token = token
+        self.transactions = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def add(self, transaction_id, amount, sender, status='Completed'):
+        self.transactions[transaction_id] = {
+            'trxID': transaction_id, 'amount': str(amount), 'sender': sender, 'status': status,
+        }
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, name='mock-provider', daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
@@ -6,6 +6,8 @@ class Payment(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
         ('completed', 'Completed'),
+        # Money captured, but the registration could not be confirmed: refund or move it
+        ('needs_review', 'Paid, needs review'),
         ('failed', 'Failed'),
         ('refunded', 'Refunded'),
     ]
@@ -18,5 +20,61 @@ class Payment(models.Model):
     transaction_id = models.CharField(max_length=100, blank=True, null=True)
     payment_method = models.CharField(max_length=50, blank=True, null=True)
     
+    class Meta:
+        indexes = [
+            # Stripe events find their payment by checkout session id
+            models.Index(fields=['transaction_id'], name='payment_transaction_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.amount} - {self.status}"
+
+class PaymentVerification(models.Model):
+    """Latest provider lookup of a registration's transaction (see payments.verification)"""
+    VERIFIED = 'verified'
+    NOT_FOUND = 'not_found'
+    MISMATCH = 'mismatch'
+    CONFLICT = 'conflict'
+    ERROR = 'error'
+    OUTCOME_CHOICES = [
+        (VERIFIED, 'Verified'),
+        (NOT_FOUND, 'Not found yet'),
+        (MISMATCH, 'Amount or number mismatch'),
+        (CONFLICT, 'Verified, but could not confirm'),
+        (ERROR, 'Provider error'),
+    ]
+    # Worth asking the provider again later
+    RETRY_OUTCOMES = (NOT_FOUND, ERROR)
+    
+    registration = models.OneToOneField(
+        'tournaments.TournamentRegistration', on_delete=models.CASCADE, related_name='verification'
+    )
+    transaction_id = models.CharField(max_length=100)
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES)
+    detail = models.CharField(max_length=255, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    checked_at = models.DateTimeField()
+    response_ms = models.PositiveIntegerField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.transaction_id}: {self.outcome}"
+
+
+class StripeEvent(models.Model):
+    """Webhook inbox: events stored as received, handled by payments.tasks.process_stripe_events"""
+    # Unique: a replayed or duplicate delivery is rejected by the index
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.TextField()
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=models.Q(processed_at__isnull=True), name='stripe_event_pending_idx'),
+        ]
+    
     def __str__(self):
-        return f"{self.user.username} - {self.amount} - {self.status}"
\ No newline at end of file
+        return f"{self.type} {self.event_id}"
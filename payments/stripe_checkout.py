@@ -0,0 +1,157 @@
+# payments/stripe_checkout.py
+import json
+import logging
+
+import stripe
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tournaments.models import TournamentRegistration
+from tournaments.notifications import notify_payment_needs_review, notify_payments_confirmed
+
+from .models import Payment, StripeEvent
+
+logger = logging.getLogger(__name__)
+
+STRIPE_METHOD = 'Stripe'
+
+
+def card_payments_enabled():
+    return bool(settings.STRIPE_SECRET_KEY)
+
+
+def create_checkout_session(registration, success_url, cancel_url):
+    """Open a Checkout Session for the entry fee and remember it as a pending Payment"""
+    tournament = registration.tournament
+    # stripe 7 has no per-call api_base on Session.create; a requestor of our own
+    # avoids setting the module-global stripe.api_base
+    requestor = stripe.api_requestor.APIRequestor(settings.STRIPE_SECRET_KEY, api_base=settings.STRIPE_API_BASE)
+    response, api_key = requestor.request('post', stripe.checkout.Session.class_url(), dict(
+        mode='payment',
+        line_items=[{
+            'quantity': 1,
+            'price_data': {
+                'currency': settings.STRIPE_CURRENCY,
+                # Stripe wants the smallest currency unit (poisha)
+                'unit_amount': int(tournament.entry_fee * 100),
+                'product_data': {'name': f"{tournament.name} entry ({registration.selected_team.name})"},
+            },
+        }],
+        client_reference_id=str(registration.pk),
+        metadata={'registration_id': registration.pk},
+        customer_email=registration.player.email or None,
+        success_url=success_url,
+        cancel_url=cancel_url,
+    ))
+    session = stripe.util.convert_to_stripe_object(response, api_key)
+    Payment.objects.create(
+        user=registration.player, tournament_registration=registration, amount=tournament.entry_fee,
+        transaction_id=session.id, payment_method=STRIPE_METHOD,
+    )
+    return session
+
+
+# -----------------------------------------------------
+# Webhook inbox
+# -----------------------------------------------------
+def parse_webhook(payload, signature):
+    """
+    Check the Stripe-Signature header and return (event id, type).
+    Raises ValueError for anything that is not a valid signed event.
+    """
+    if not settings.STRIPE_WEBHOOK_SECRET:
+        raise ValueError("No STRIPE_WEBHOOK_SECRET configured")
+    try:
+        payload = payload.decode('utf-8')
+        stripe.WebhookSignature.verify_header(
+            payload, signature, settings.STRIPE_WEBHOOK_SECRET, settings.STRIPE_WEBHOOK_TOLERANCE
+        )
+        event = json.loads(payload)
+        return event['id'], event['type']
+    except (stripe.error.SignatureVerificationError, UnicodeDecodeError, TypeError, KeyError) as exc:
+        raise ValueError(str(exc)) from exc
+
+
+# -----------------------------------------------------
+# Event handlers (run by the worker, once per event id)
+# -----------------------------------------------------
+def _session_payment(session):
+    return Payment.objects.select_related(
+        'tournament_registration__tournament', 'tournament_registration__selected_team',
+    ).filter(transaction_id=session['id'], payment_method=STRIPE_METHOD).first()
+
+
+def checkout_paid(session):
+    if session.get('payment_status') != 'paid':
+        return  # delayed payment methods finish with async_payment_succeeded
+    payment = _session_payment(session)
+    if payment is None:
+        logger.warning(f"Stripe session {session['id']} has no Payment here")
+        return
+    if payment.status in ('completed', 'needs_review'):
+        return
+
+    registration = payment.tournament_registration
+    try:
+        if registration.status == TournamentRegistration.RESERVED:
+            registration.submit_payment(STRIPE_METHOD, session.get('payment_intent') or session['id'], '')
+        registration.confirm(None)
+    except ValidationError as e:
+        # Paid, but the team was taken or the reservation lapsed: an admin refunds or moves it
+        logger.warning(f"Paid Stripe session {session['id']} could not confirm registration {registration.pk}: "
+                       f"{e.messages[0]}")
+        payment.status = 'needs_review'
+        payment.save(update_fields=['status'])
+        notify_payment_needs_review(registration, e.messages[0])
+        return
+    payment.status = 'completed'
+    payment.save(update_fields=['status'])
+    notify_payments_confirmed([registration])
+
+
+def checkout_failed(session):
+    Payment.objects.filter(transaction_id=session['id'], payment_method=STRIPE_METHOD, status='pending').update(
+        status='failed'
+    )
+
+
+EVENT_HANDLERS = {
+    'checkout.session.completed': checkout_paid,
+    'checkout.session.async_payment_succeeded': checkout_paid,
+    'checkout.session.async_payment_failed': checkout_failed,
+    'checkout.session.expired': checkout_failed,
+}
+
+
+def process_event_batch(limit, max_attempts, after=0):
+    """
+    Handle up to `limit` pending events with ids above `after` inside the
+    caller's transaction, each in its own savepoint; the handled ones are
+    marked with one UPDATE. Returns (handled, failed, last id seen).
+    """
+    pending = StripeEvent.objects.filter(
+        processed_at__isnull=True, attempts__lt=max_attempts, id__gt=after,
+    ).order_by('id')
+    if connection.features.has_select_for_update_skip_locked:
+        pending = pending.select_for_update(skip_locked=True)
+    events = list(pending[:limit])
+    handled, failed = [], []
+    for event in events:
+        handler = EVENT_HANDLERS.get(event.type)
+        try:
+            with transaction.atomic():
+                if handler is not None:
+                    handler(json.loads(event.payload)['data']['object'])
+        except Exception as exc:
+            logger.exception(f"Stripe event {event.event_id} failed")
+            event.attempts += 1
+            event.last_error = repr(exc)
+            failed.append(event)
+        else:
+            handled.append(event.pk)
+    StripeEvent.objects.filter(pk__in=handled).update(processed_at=timezone.now())
+    if failed:
+        StripeEvent.objects.bulk_update(failed, ['attempts', 'last_error'])
+    return len(handled), len(failed), events[-1].pk if events else after
@@ -0,0 +1,39 @@
+# payments/tasks.py
+from django.conf import settings
+
+from core.db import run_serialized_write
+from core.taskqueue import enqueue, task
+
+from .models import PaymentVerification
+from .stripe_checkout import process_event_batch
+from .verification import batch_limit, pending_registrations, verify_payments
+
+
+@task(singleton=True)
+def verify_pending_payments():
+    """One batch of provider lookups; queues itself again while work is left"""
+    options = settings.PAYMENT_VERIFICATION
+    counts = verify_payments(limit=batch_limit())
+    if pending_registrations().exists():
+        enqueue(verify_pending_payments, unique=True)
+    elif any(counts.get(outcome) for outcome in PaymentVerification.RETRY_OUTCOMES):
+        enqueue(verify_pending_payments, delay=options['RETRY_SECONDS'], unique=True)
+    return counts
+
+
+@task(singleton=True)
+def process_stripe_events():
+    """Drain the Stripe webhook inbox, one write transaction per batch"""
+    handled = failed = last_id = 0
+    while True:
+        # Failed events wait for the retry below instead of looping here
+        batch_handled, batch_failed, last_id = run_serialized_write(
+            process_event_batch, settings.STRIPE_EVENT_BATCH_SIZE, settings.TASK_MAX_ATTEMPTS, last_id
+        )
+        handled += batch_handled
+        failed += batch_failed
+        if batch_handled + batch_failed < settings.STRIPE_EVENT_BATCH_SIZE:
+            break
+    if failed:
+        enqueue(process_stripe_events, delay=settings.TASK_RETRY_BACKOFF, unique=True)
+    return {'handled': handled, 'failed': failed}
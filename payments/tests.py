@@ -1,3 +1,359 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
 
-# Create your tests here.
+import stripe
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from core.models import Notification, Task
+from tournaments.models import Team, Tournament, TournamentRegistration
+from .http import StdlibHTTPClient
+from .mock_provider import MockPaymentProvider
+from .models import Payment, PaymentVerification, StripeEvent
+from .tasks import process_stripe_events, verify_pending_payments
+from .verification import (
+    Lookup, batch_limit, confirm_verified, pending_registrations, record_lookups, verify_payments,
+)
+
+
+class PaymentVerificationTests(TestCase):
+    def setUp(self):
+        self.provider = MockPaymentProvider(token='secret').__enter__()
+        self.addCleanup(self.provider.__exit__, None, None, None)
+        verification = {
+            **settings.PAYMENT_VERIFICATION, 'CONCURRENCY': 4,
+            'PROVIDERS': {'bKash': {'URL': self.provider.url, 'TOKEN': 'secret'}, 'Nagad': {'URL': ''}},
+        }
+        overrides = override_settings(PAYMENT_VERIFICATION=verification)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            name='Cup', description='', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=150,
+        )
+
+    def submit(self, username, transaction_id, method='bKash', team=None, mobile='01711111111'):
+        registration = TournamentRegistration.objects.create(
+            player=User.objects.create_user(username, f'{username}@example.com', 'pw'),
+            tournament=self.tournament,
+            selected_team=team or Team.objects.create(name=username, country=username),
+        )
+        registration.submit_payment(method, transaction_id, mobile)
+        return registration
+
+    def outcome(self, registration):
+        return PaymentVerification.objects.get(registration=registration).outcome
+
+    def test_verifies_in_parallel_and_confirms(self):
+        paid = self.submit('paid', 'TX1')
+        self.provider.add('TX1', 150, '+8801711111111')
+        short = self.submit('short', 'TX2')
+        self.provider.add('TX2', 100, '01711111111')
+        other_number = self.submit('other', 'TX3')
+        self.provider.add('TX3', 150, '01999999999')
+        missing = self.submit('missing', 'TX4')
+        nagad = self.submit('nagad', 'TX5', method='Nagad')  # no provider configured
+
+        counts = verify_payments()
+        self.assertEqual((counts['verified'], counts['mismatch'], counts['not_found']), (1, 2, 1))
+        self.assertEqual(self.provider.requests, 4)
+
+        paid.refresh_from_db()
+        self.assertEqual(paid.status, TournamentRegistration.CONFIRMED)
+        self.assertIsNone(paid.confirmed_by)
+        self.assertEqual(self.outcome(short), PaymentVerification.MISMATCH)
+        self.assertEqual(self.outcome(other_number), PaymentVerification.MISMATCH)
+        self.assertEqual(self.outcome(missing), PaymentVerification.NOT_FOUND)
+        self.assertFalse(PaymentVerification.objects.filter(registration=nagad).exists())
+        self.assertTrue(Notification.objects.filter(user=paid.player, kind='payment_confirmed').exists())
+
+        # Nothing is due again until RETRY_SECONDS have passed
+        self.assertEqual(verify_payments(), {})
+        PaymentVerification.objects.update(checked_at=timezone.now() - timezone.timedelta(hours=1))
+        self.provider.add('TX4', 150, '01711111111')
+        self.assertEqual(verify_payments()['verified'], 1)
+        verification = PaymentVerification.objects.get(registration=missing)
+        self.assertEqual((verification.outcome, verification.attempts), (PaymentVerification.VERIFIED, 2))
+
+    def test_submitted_payment_can_be_corrected(self):
+        registration = self.submit('typo', 'TX9')
+        verify_payments()
+        self.assertEqual(self.outcome(registration), PaymentVerification.NOT_FOUND)
+
+        self.provider.add('TX10', 150, '01711111111')
+        self.client.force_login(registration.player)
+        response = self.client.post(reverse('payment_page', args=[registration.pk]), {
+            'payment_method': 'bKash', 'transaction_id': 'TX10', 'mobile_number': '01711111111',
+        })
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        registration.refresh_from_db()
+        self.assertEqual((registration.status, registration.transaction_id), (TournamentRegistration.SUBMITTED, 'TX10'))
+        self.assertFalse(PaymentVerification.objects.filter(registration=registration).exists())
+        self.assertEqual(verify_payments()['verified'], 1)
+
+    def test_answer_about_a_corrected_transaction_id_is_dropped(self):
+        self.submit('fixer', 'TXOLD')
+        # Loaded before the (slow) lookup, as verify_payments does
+        lookups = [Lookup(registration, PaymentVerification.VERIFIED, 'Paid 150')
+                   for registration in pending_registrations()]
+        TournamentRegistration.objects.update(transaction_id='TXNEW')  # corrected meanwhile
+
+        self.assertEqual(confirm_verified(lookups), [])
+        self.assertEqual(record_lookups(lookups), [])
+        registration = TournamentRegistration.objects.get()
+        self.assertEqual(registration.status, TournamentRegistration.SUBMITTED)
+        self.assertFalse(PaymentVerification.objects.exists())
+        self.assertEqual(list(pending_registrations()), [registration])
+
+    @override_settings(TASK_LEASE_SECONDS=600)
+    def test_batch_finishes_within_the_task_lease(self):
+        for concurrency, timeout, expected in ((20, 10, 600), (100, 10, 2000), (4, 30, 40)):
+            verification = {**settings.PAYMENT_VERIFICATION, 'BATCH_SIZE': 2000,
+                            'CONCURRENCY': concurrency, 'TIMEOUT': timeout}
+            with self.settings(PAYMENT_VERIFICATION=verification):
+                self.assertEqual(batch_limit(), expected)
+
+    def test_transaction_id_confirms_only_one_registration(self):
+        self.provider.add('TXDUP', 150, '01711111111')
+        first = self.submit('first', 'TXDUP')
+        second = self.submit('second', 'TXDUP')
+        counts = verify_payments()
+        self.assertEqual((counts.get('verified'), counts['conflict']), (None, 2))
+        for registration in (first, second):
+            registration.refresh_from_db()
+            self.assertEqual(registration.status, TournamentRegistration.SUBMITTED)
+            self.assertEqual(self.outcome(registration), PaymentVerification.CONFLICT)
+
+        # Once one of them is confirmed, a later reuse is caught as well
+        second.delete()
+        first.verification.delete()
+        self.assertEqual(verify_payments()['verified'], 1)
+        third = self.submit('third', 'TXDUP')
+        self.assertEqual(verify_payments()['conflict'], 1)
+        third.refresh_from_db()
+        self.assertEqual(third.status, TournamentRegistration.SUBMITTED)
+        self.assertIn(f'#{first.pk}', third.verification.detail)
+
+    def test_team_conflict_is_left_for_an_admin(self):
+        team = Team.objects.create(name='Brazil', country='Brazil')
+        first = self.submit('first', 'TX1', team=team)
+        second = self.submit('second', 'TX2', team=team)
+        self.provider.add('TX1', 150, '01711111111')
+        self.provider.add('TX2', 150, '01711111111')
+
+        counts = verify_payments()
+        self.assertEqual((counts['verified'], counts['conflict']), (1, 1))
+        statuses = set(TournamentRegistration.objects.filter(pk__in=[first.pk, second.pk]).values_list('status', flat=True))
+        self.assertEqual(statuses, {TournamentRegistration.CONFIRMED, TournamentRegistration.SUBMITTED})
+
+    def test_provider_errors_are_retried(self):
+        registration = self.submit('paid', 'TX1')
+        self.provider.token = 'rotated'
+        self.assertEqual(verify_payments()['error'], 1)
+        self.assertIn('401', PaymentVerification.objects.get(registration=registration).detail)
+        self.assertFalse(pending_registrations().exists())  # not due yet
+
+        PaymentVerification.objects.update(checked_at=timezone.now() - timezone.timedelta(hours=1))
+        self.assertEqual(verify_pending_payments()['error'], 1)
+        retry = Task.objects.get(name=verify_pending_payments.task_name, status=Task.QUEUED)
+        self.assertGreater(retry.run_at, timezone.now() + timezone.timedelta(seconds=60))
+
+    def test_client_reuses_connections(self):
+        for index in range(20):
+            self.provider.add(f'TX{index}', 150, '017')
+
+        async def fetch():
+            client = StdlibHTTPClient(max_connections=3)
+            results = await asyncio.gather(*(
+                client.get_json(f'{self.provider.url}/transactions/TX{index}', headers={'Authorization': 'Bearer secret'})
+                for index in range(20)
+            ))
+            missing = await client.get_json(f'{self.provider.url}/transactions/nope', {'Authorization': 'Bearer secret'})
+            await client.aclose()
+            return client.connections_opened, results, missing
+
+        opened, results, missing = asyncio.run(fetch())
+        self.assertEqual(opened, 3)
+        self.assertEqual({status for status, _ in results}, {200})
+        self.assertEqual(results[7][1]['trxID'], 'TX7')
+        self.assertEqual(missing[0], 404)
+
+    @override_settings(TASKS_EAGER=False)
+    def test_payment_page_queues_a_verification(self):
+        registration = TournamentRegistration.objects.create(
+            player=User.objects.create_user('player', 'player@example.com', 'pw'),
+            tournament=self.tournament, selected_team=Team.objects.create(name='Brazil', country='Brazil'),
+        )
+        self.client.force_login(registration.player)
+        self.client.post(reverse('payment_page', args=[registration.pk]), {
+            'payment_method': 'bKash', 'transaction_id': 'TX1', 'mobile_number': '01711111111',
+        })
+        self.assertEqual(Task.objects.filter(name=verify_pending_payments.task_name).count(), 1)
+
+
+# -----------------------------------------------------
+# Stripe Checkout + webhook inbox
+# -----------------------------------------------------
+WEBHOOK_SECRET = 'whsec_test'
+
+# Trimmed from responses recorded against the Stripe test mode API
+CHECKOUT_SESSION = {
+    'id': 'cs_test_a1b2c3', 'object': 'checkout.session', 'mode': 'payment', 'status': 'open',
+    'payment_status': 'unpaid', 'amount_total': 15000, 'currency': 'bdt', 'payment_intent': None,
+    'url': 'https://checkout.stripe.com/c/pay/cs_test_a1b2c3',
+}
+
+
+def checkout_event(event_id, event_type='checkout.session.completed', **session):
+    data = {**CHECKOUT_SESSION, 'status': 'complete', 'payment_status': 'paid', 'payment_intent': 'pi_test_9z8y', **session}
+    return json.dumps({
+        'id': event_id, 'object': 'event', 'type': event_type, 'api_version': '2023-10-16',
+        'created': int(time.time()), 'livemode': False, 'data': {'object': data},
+    })
+
+
+def signature_header(payload, secret=WEBHOOK_SECRET):
+    timestamp = int(time.time())
+    signature = stripe.WebhookSignature._compute_signature(f"{timestamp}.{payload}", secret)
+    return f"t={timestamp},v1={signature}"
+
+
+class _StripeStandIn(BaseHTTPRequestHandler):
+    """Answers POST /v1/checkout/sessions with the recorded session, like stripe-mock"""
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode())
+        self.server.requests.append((self.path, form))
+        body = json.dumps(CHECKOUT_SESSION).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(STRIPE_SECRET_KEY='sk_test_123', STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET, TASKS_EAGER=False)
+class StripeCheckoutTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            name='Cup', description='', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=150,
+        )
+        self.registration = TournamentRegistration.objects.create(
+            player=User.objects.create_user('player', 'player@example.com', 'pw'),
+            tournament=self.tournament, selected_team=Team.objects.create(name='Brazil', country='Brazil'),
+        )
+
+    def checkout(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), _StripeStandIn)
+        server.requests = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.client.force_login(self.registration.player)
+        with override_settings(STRIPE_API_BASE=f'http://127.0.0.1:{server.server_address[1]}'):
+            response = self.client.post(reverse('stripe_checkout', args=[self.registration.pk]))
+        return response, server.requests
+
+    def deliver(self, payload, signature=None):
+        return self.client.post(
+            reverse('stripe_webhook'), payload, content_type='application/json',
+            headers={'Stripe-Signature': signature or signature_header(payload)},
+        )
+
+    def test_checkout_redirects_to_stripe(self):
+        response, requests = self.checkout()
+        self.assertRedirects(response, CHECKOUT_SESSION['url'], fetch_redirect_response=False)
+        path, form = requests[0]
+        self.assertEqual(path, '/v1/checkout/sessions')
+        self.assertEqual(form['line_items[0][price_data][unit_amount]'], ['15000'])
+        self.assertEqual(form['metadata[registration_id]'], [str(self.registration.pk)])
+        self.assertEqual(stripe.api_base, 'https://api.stripe.com')  # the global is left alone
+        payment = Payment.objects.get()
+        self.assertEqual((payment.transaction_id, payment.status), (CHECKOUT_SESSION['id'], 'pending'))
+
+    def test_webhook_rejects_bad_signatures(self):
+        payload = checkout_event('evt_1')
+        with self.assertLogs('payments.views', 'WARNING'):
+            self.assertEqual(self.deliver(payload, signature_header(payload, 'whsec_wrong')).status_code, 400)
+            self.assertEqual(self.deliver(payload, 'garbage').status_code, 400)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_duplicate_delivery_is_one_indexed_insert(self):
+        payload = checkout_event('evt_1')
+        self.assertEqual(self.deliver(payload).status_code, 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.deliver(payload).status_code, 200)
+        touched = [query['sql'] for query in queries if 'payments_stripeevent' in query['sql'] or 'core_task' in query['sql']]
+        self.assertEqual(len(touched), 1)
+        self.assertTrue(touched[0].startswith('INSERT'))
+        self.assertEqual(StripeEvent.objects.count(), 1)
+        self.assertEqual(Task.objects.filter(name=process_stripe_events.task_name).count(), 1)
+
+    def test_worker_confirms_paid_registration_once(self):
+        self.checkout()
+        self.deliver(checkout_event('evt_1'))
+        self.deliver(checkout_event('evt_2', 'checkout.session.async_payment_succeeded'))
+        self.deliver(checkout_event('evt_3', 'customer.created'))  # not handled, still marked processed
+
+        self.assertEqual(process_stripe_events(), {'handled': 3, 'failed': 0})
+        self.registration.refresh_from_db()
+        self.assertEqual(self.registration.status, TournamentRegistration.CONFIRMED)
+        self.assertEqual(self.registration.payment_method, 'Stripe')
+        self.assertEqual(self.registration.transaction_id, 'pi_test_9z8y')
+        self.assertEqual(Payment.objects.get().status, 'completed')
+        self.assertEqual(Notification.objects.filter(kind='payment_confirmed').count(), 1)
+        self.assertFalse(StripeEvent.objects.filter(processed_at__isnull=True).exists())
+
+        self.deliver(checkout_event('evt_1'))  # replayed by Stripe
+        self.assertEqual(process_stripe_events(), {'handled': 0, 'failed': 0})
+
+    def test_paid_session_that_cannot_confirm_is_flagged(self):
+        self.checkout()
+        # Someone else confirmed the same team while this player was on Stripe
+        TournamentRegistration.objects.create(
+            player=User.objects.create_user('rival', 'rival@example.com', 'pw'), tournament=self.tournament,
+            selected_team=self.registration.selected_team, status=TournamentRegistration.CONFIRMED,
+        )
+        User.objects.create_superuser('boss', 'boss@example.com', 'pw')
+        self.deliver(checkout_event('evt_1'))
+        with self.assertLogs('payments.stripe_checkout', 'WARNING'):
+            self.assertEqual(process_stripe_events(), {'handled': 1, 'failed': 0})
+
+        self.assertEqual(Payment.objects.get().status, 'needs_review')
+        self.registration.refresh_from_db()
+        self.assertEqual(self.registration.status, TournamentRegistration.SUBMITTED)
+        self.assertEqual(
+            sorted(Notification.objects.filter(kind='payment_needs_review').values_list('user__username', flat=True)),
+            ['boss', 'player'],
+        )
+
+    def test_expired_session_and_failing_events(self):
+        self.checkout()
+        self.deliver(checkout_event('evt_1', 'checkout.session.expired', status='expired', payment_status='unpaid'))
+        broken = json.dumps({'id': 'evt_2', 'type': 'checkout.session.completed', 'data': {}})
+        self.deliver(broken)
+
+        with self.assertLogs('payments.stripe_checkout', 'ERROR'):
+            self.assertEqual(process_stripe_events(), {'handled': 1, 'failed': 1})
+        self.assertEqual(Payment.objects.get().status, 'failed')
+        event = StripeEvent.objects.get(event_id='evt_2')
+        self.assertEqual((event.attempts, event.processed_at), (1, None))
+        self.assertIn('KeyError', event.last_error)
+        self.assertTrue(Task.objects.filter(name=process_stripe_events.task_name, status=Task.QUEUED).exists())
@@ -3,5 +3,6 @@ from . import views
 
 urlpatterns = [
     path('dummy/', views.dummy_view, name='dummy_payment'),
-    # Add more paths later
+    path('stripe/checkout/<int:registration_id>/', views.stripe_checkout, name='stripe_checkout'),
+    path('stripe/webhook/', views.stripe_webhook, name='stripe_webhook'),
 ]
\ No newline at end of file
@@ -0,0 +1,262 @@
+# payments/verification.py
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.db import run_serialized_write
+from tournaments.models import TournamentRegistration
+from tournaments.notifications import notify_payments_confirmed
+
+from .http import HTTPError
+from .models import PaymentVerification
+
+logger = logging.getLogger(__name__)
+
+# Verified payments confirmed per write transaction
+CONFIRM_CHUNK = 100
+
+
+@dataclass
+class Lookup:
+    """What the provider said about one registration's transaction"""
+    registration: TournamentRegistration
+    outcome: str
+    detail: str = ''
+    response_ms: int = None
+
+
+def providers():
+    """payment_method -> provider settings, for the providers with a URL configured"""
+    return {
+        method: provider for method, provider in settings.PAYMENT_VERIFICATION['PROVIDERS'].items()
+        if provider.get('URL')
+    }
+
+
+def _digits(number):
+    return re.sub(r'\D', '', number or '')[-11:]
+
+
+def check_transaction(registration, status, data):
+    """
+    Map a provider response to an outcome. The transaction must be
+    completed, cover the entry fee and come from the number the player gave.
+    """
+    if status == 404:
+        return PaymentVerification.NOT_FOUND, 'Transaction not found'
+    if status != 200 or not isinstance(data, dict):
+        return PaymentVerification.ERROR, f'Provider answered HTTP {status}'
+    if str(data.get('status', '')).lower() != 'completed':
+        return PaymentVerification.NOT_FOUND, f"Transaction is {data.get('status') or 'unknown'}"
+    try:
+        amount = Decimal(str(data.get('amount')))
+    except InvalidOperation:
+        return PaymentVerification.ERROR, 'Provider sent no amount'
+    if amount < registration.tournament.entry_fee:
+        return PaymentVerification.MISMATCH, f'Paid {amount}, entry fee is {registration.tournament.entry_fee}'
+    if _digits(data.get('sender')) != _digits(registration.mobile_number):
+        return PaymentVerification.MISMATCH, 'Paid from a different number'
+    return PaymentVerification.VERIFIED, f'Paid {amount}'
+
+
+async def lookup_transactions(registrations, client, concurrency):
+    """Ask the providers about every registration, `concurrency` at a time"""
+    configured = providers()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def lookup(registration):
+        provider = configured[registration.payment_method]
+        url = f"{provider['URL'].rstrip('/')}/transactions/{quote(registration.transaction_id, safe='')}"
+        headers = {'Authorization': f"Bearer {provider['TOKEN']}"} if provider.get('TOKEN') else None
+        async with slots:
+            started = time.perf_counter()
+            try:
+                status, data = await client.get_json(url, headers=headers)
+            except (HTTPError, OSError, asyncio.TimeoutError) as exc:
+                return Lookup(registration, PaymentVerification.ERROR, str(exc)[:255])
+            elapsed = int((time.perf_counter() - started) * 1000)
+        outcome, detail = check_transaction(registration, status, data)
+        return Lookup(registration, outcome, detail, elapsed)
+
+    return await asyncio.gather(*(lookup(registration) for registration in registrations))
+
+
+def pending_registrations():
+    """Submitted payments of configured providers that are due for a (re)check"""
+    options = settings.PAYMENT_VERIFICATION
+    recheck_before = timezone.now() - timezone.timedelta(seconds=options['RETRY_SECONDS'])
+    return TournamentRegistration.objects.filter(
+        status=TournamentRegistration.SUBMITTED, payment_method__in=list(providers()),
+    ).filter(
+        Q(verification__isnull=True)
+        | Q(verification__outcome__in=PaymentVerification.RETRY_OUTCOMES,
+            verification__attempts__lt=options['MAX_ATTEMPTS'],
+            verification__checked_at__lt=recheck_before)
+        # A new transaction id after a rejection is checked again
+        | ~Q(verification__transaction_id=F('transaction_id'))
+    ).select_related('tournament', 'selected_team', 'player', 'verification')
+
+
+def batch_limit():
+    """
+    Registrations per run, capped so that even if every lookup times out
+    the run ends within half the task lease and is never handed to a
+    second worker while still going.
+    """
+    options = settings.PAYMENT_VERIFICATION
+    worst_case_rounds = max(1, settings.TASK_LEASE_SECONDS // 2 // options['TIMEOUT'])
+    return min(options['BATCH_SIZE'], options['CONCURRENCY'] * worst_case_rounds)
+
+
+def make_client():
+    options = settings.PAYMENT_VERIFICATION
+    return import_string(options['CLIENT'])(max_connections=options['CONCURRENCY'], timeout=options['TIMEOUT'])
+
+
+def verify_payments(limit=None):
+    """
+    Look up pending payments in parallel and confirm the verified ones
+    through the usual guarded transition (team already taken or tournament
+    full leaves the row for an admin). Returns counts per outcome.
+    """
+    registrations = list(pending_registrations().order_by('payment_date', 'id')[:limit])
+    if not registrations:
+        return {}
+    started = time.perf_counter()
+    counts = {}
+
+    async def run():
+        # The client's pooled connections belong to this event loop
+        client = make_client()
+        try:
+            return await lookup_transactions(registrations, client, settings.PAYMENT_VERIFICATION['CONCURRENCY'])
+        finally:
+            await client.aclose()
+            counts['connections'] = getattr(client, 'connections_opened', None)
+
+    lookups = asyncio.run(run())
+    looked_up = time.perf_counter() - started
+
+    verified = [lookup for lookup in lookups if lookup.outcome == PaymentVerification.VERIFIED]
+    confirmed = []
+    # One transaction per chunk rather than a commit per confirmation
+    for start in range(0, len(verified), CONFIRM_CHUNK):
+        confirmed += run_serialized_write(confirm_verified, verified[start:start + CONFIRM_CHUNK])
+    recorded = run_serialized_write(record_lookups, lookups)
+    if len(recorded) < len(lookups):
+        counts['stale'] = len(lookups) - len(recorded)
+        lookups = recorded
+    if confirmed:
+        run_serialized_write(notify_payments_confirmed, confirmed)
+
+    for lookup in lookups:
+        counts[lookup.outcome] = counts.get(lookup.outcome, 0) + 1
+    counts['seconds'] = round(time.perf_counter() - started, 3)
+    counts['lookup_seconds'] = round(looked_up, 3)
+    logger.info(f"Verified {len(lookups)} payments in {counts['seconds']}s: {counts}")
+    return counts
+
+
+def reused_transactions(registrations):
+    """
+    registration id -> another registration already holding its transaction
+    id: submitted or confirmed with the same method, or verified before.
+    Duplicates within `registrations` find each other (all are submitted).
+    """
+    keys = {(registration.payment_method, registration.transaction_id.upper()): registration.pk
+            for registration in registrations}
+    transaction_ids = {transaction_id for _, transaction_id in keys}
+    holders = TournamentRegistration.objects.annotate(trx=Upper('transaction_id')).filter(
+        trx__in=transaction_ids,
+        status__in=[TournamentRegistration.SUBMITTED, TournamentRegistration.CONFIRMED],
+    ).values_list('pk', 'payment_method', 'trx')
+    verified = PaymentVerification.objects.annotate(trx=Upper('transaction_id')).filter(
+        trx__in=transaction_ids, outcome=PaymentVerification.VERIFIED,
+    ).values_list('registration_id', 'registration__payment_method', 'trx')
+
+    held = {}
+    for pk, method, transaction_id in [*holders, *verified]:
+        held.setdefault((method, transaction_id), set()).add(pk)
+    reused = {}
+    for registration in registrations:
+        others = held.get((registration.payment_method, registration.transaction_id.upper()), set()) - {registration.pk}
+        if others:
+            reused[registration.pk] = min(others)
+    return reused
+
+
+def current_lookups(lookups):
+    """
+    The lookups whose registration still has the payment details that were
+    looked up. A player may correct a submitted transaction id while the
+    provider is being asked; the answer about the old id must not count.
+    """
+    fields = ('payment_method', 'transaction_id', 'mobile_number')
+    current = {
+        row[0]: row[1:] for row in TournamentRegistration.objects.filter(
+            pk__in=[lookup.registration.pk for lookup in lookups]
+        ).values_list('pk', *fields)
+    }
+    return [
+        lookup for lookup in lookups
+        if current.get(lookup.registration.pk) == tuple(getattr(lookup.registration, field) for field in fields)
+    ]
+
+
+def confirm_verified(lookups):
+    # Re-read inside the write: the registrations were loaded before the lookups
+    lookups = current_lookups(lookups)
+    # One payment confirms one registration; a reused transaction id goes to an admin
+    reused = reused_transactions([lookup.registration for lookup in lookups])
+    confirmed = []
+    for lookup in lookups:
+        if lookup.registration.pk in reused:
+            lookup.outcome = PaymentVerification.CONFLICT
+            lookup.detail = f"Transaction id also used by registration #{reused[lookup.registration.pk]}"
+            continue
+        try:
+            # Each transition runs in its own savepoint
+            lookup.registration.confirm(None)
+        except ValidationError as e:
+            lookup.outcome, lookup.detail = PaymentVerification.CONFLICT, e.messages[0][:255]
+        else:
+            confirmed.append(lookup.registration)
+    return confirmed
+
+
+def record_lookups(lookups):
+    """Store the outcome of the lookups that are still current; returns those"""
+    lookups = current_lookups(lookups)
+    now = timezone.now()
+    new, changed = [], []
+    for lookup in lookups:
+        # select_related by pending_registrations()
+        verification = getattr(lookup.registration, 'verification', None)
+        same_transaction = verification and verification.transaction_id == lookup.registration.transaction_id
+        if verification is None:
+            verification = PaymentVerification(registration=lookup.registration)
+            new.append(verification)
+        else:
+            changed.append(verification)
+        verification.transaction_id = lookup.registration.transaction_id
+        verification.outcome = lookup.outcome
+        verification.detail = lookup.detail
+        verification.attempts = (verification.attempts if same_transaction else 0) + 1
+        verification.checked_at = now
+        verification.response_ms = lookup.response_ms
+    PaymentVerification.objects.bulk_create(new, batch_size=500)
+    PaymentVerification.objects.bulk_update(
+        changed, ['transaction_id', 'outcome', 'detail', 'attempts', 'checked_at', 'response_ms'], batch_size=500
+    )
+    return lookups
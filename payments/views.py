@@ -1,6 +1,79 @@
 # payments/views.py
-# Temporary views for now
-from django.shortcuts import render
+import logging
+
+import stripe
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db import IntegrityError, transaction
+from django.http import Http404, HttpResponse, HttpResponseBadRequest
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from core.db import run_serialized_write
+from core.idempotency import idempotent_post
+from core.taskqueue import enqueue
+from tournaments.models import TournamentRegistration
+from .models import StripeEvent
+from .stripe_checkout import card_payments_enabled, create_checkout_session, parse_webhook
+from .tasks import process_stripe_events
+
+logger = logging.getLogger(__name__)
 
 def dummy_view(request):
-    return render(request, 'payments/dummy.html', {})
\ No newline at end of file
+    return render(request, 'payments/dummy.html', {})
+
+
+# -----------------------------------------------------
+# ⭐ Stripe Checkout (card payments)
+# -----------------------------------------------------
+@login_required
+@require_POST
+@idempotent_post
+def stripe_checkout(request, registration_id):
+    """Send the player to a Stripe Checkout page for their reserved registration"""
+    if not card_payments_enabled():
+        raise Http404("Card payments are not enabled")
+    registration = get_object_or_404(
+        TournamentRegistration.objects.select_related('tournament', 'selected_team', 'player'),
+        id=registration_id, player=request.user, status=TournamentRegistration.RESERVED,
+    )
+    try:
+        session = create_checkout_session(
+            registration,
+            success_url=request.build_absolute_uri(reverse('home')),
+            cancel_url=request.build_absolute_uri(reverse('payment_page', args=[registration.pk])),
+        )
+    except stripe.error.StripeError as e:
+        logger.error(f"Stripe checkout for registration {registration.pk} failed: {e}")
+        messages.error(request, "Card payments are unavailable right now. Please try again or pay by bKash/Nagad.")
+        return redirect('payment_page', registration_id=registration.pk)
+    return redirect(session.url)
+
+
+def store_stripe_event(event_id, event_type, payload):
+    """
+    One INSERT into the inbox. A duplicate delivery fails on the unique
+    event_id index and is dropped; returns whether the event was new.
+    """
+    try:
+        with transaction.atomic():
+            StripeEvent.objects.create(event_id=event_id, type=event_type, payload=payload.decode('utf-8'))
+            enqueue(process_stripe_events, unique=True)
+    except IntegrityError:
+        return False
+    return True
+
+
+@csrf_exempt
+@require_POST
+def stripe_webhook(request):
+    """Verify the signature, store the event, answer right away; a task handles it"""
+    try:
+        event_id, event_type = parse_webhook(request.body, request.headers.get('Stripe-Signature', ''))
+    except ValueError as e:
+        logger.warning(f"Rejected Stripe webhook: {e}")
+        return HttpResponseBadRequest("Invalid signature or payload")
+    run_serialized_write(store_stripe_event, event_id, event_type, request.body)
+    return HttpResponse(status=200)
@@ -1,24 +1,38 @@
 from django.contrib import admin
-from .models import Team, Tournament, TournamentRegistration, Match, Schedule
+from .models import Team, Tournament, TournamentRegistration, Match, Schedule, recount_registrations
+from .notifications import notify_schedule_published
+from .tasks import confirm_registrations
+from django.db import transaction
+from django.db.models import Count, Q
 from django.utils import timezone
-from django.db.models import Count
+from core.exports import registrations_export_response
+from core.search import IndexedSearchMixin
+from core.taskqueue import enqueue
+from core.versions import bump_data_version
 
 # ==========================
 # TEAM ADMIN
 # ==========================
 @admin.register(Team)
-class TeamAdmin(admin.ModelAdmin):
+class TeamAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('name', 'country', 'taken_in_tournaments')
     search_fields = ('name', 'country')
+    search_index = 'team'
     ordering = ('name',)
     
+    def get_queryset(self, request):
+        # One aggregate query for the whole page instead of a COUNT per row
+        return super().get_queryset(request).annotate(
+            taken_count=Count(
+                'tournamentregistration',
+                filter=Q(tournamentregistration__status=TournamentRegistration.CONFIRMED),
+            )
+        )
+    
     def taken_in_tournaments(self, obj):
-        taken_count = TournamentRegistration.objects.filter(
-            selected_team=obj, 
-            payment_confirmed=True
-        ).count()
-        return taken_count
+        return obj.taken_count
     taken_in_tournaments.short_description = 'Taken Count'
+    taken_in_tournaments.admin_order_field = 'taken_count'
 
 
 # ==========================
@@ -33,18 +47,22 @@ class TournamentAdmin(admin.ModelAdmin):
         'registration_deadline',
         'entry_fee',
         'status',
-        'is_active'
+        'is_active',
+        'confirmed_count',
+        'pending_count',
     )
     list_filter = ('status', 'is_active')
     search_fields = ('name', 'description')
     ordering = ('-start_date',)
+    # Maintained by TournamentRegistration.save(); fix drift with `manage.py reconcile_counters`
+    readonly_fields = ('confirmed_count', 'pending_count', 'reserved_count')
 
 
 # ==========================
 # TOURNAMENT REGISTRATION ADMIN
 # ==========================
 @admin.register(TournamentRegistration)
-class TournamentRegistrationAdmin(admin.ModelAdmin):
+class TournamentRegistrationAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         'id',
         'player',
@@ -54,115 +72,109 @@ class TournamentRegistrationAdmin(admin.ModelAdmin):
         'mobile_number', 
         'transaction_id', 
         'payment_method', 
-        'payment_confirmed',
         'confirmed_by_display'
     )
-    list_filter = ('payment_confirmed', 'is_paid', 'tournament', 'payment_method')
+    list_filter = ('status', 'tournament', 'payment_method')
+    list_select_related = ('player', 'tournament', 'selected_team', 'confirmed_by')
     search_fields = ('player__username', 'transaction_id', 'mobile_number', 'selected_team__name')
-    list_editable = ('payment_confirmed',)
-    readonly_fields = ('registration_date', 'payment_date', 'confirmed_date')
-    actions = ['confirm_payments', 'reject_payments']
+    search_index = 'registration'
+    # Status only changes through the guarded transitions (actions below)
+    readonly_fields = ('status', 'registration_date', 'payment_date', 'confirmed_date')
+    actions = ['confirm_payments', 'reject_payments', 'expire_reservations', 'export_csv', 'export_xlsx']
     
     fieldsets = (
         ('Registration Info', {
-            'fields': ('player', 'tournament', 'selected_team', 'registration_date')
+            'fields': ('player', 'tournament', 'selected_team', 'registration_date', 'status')
         }),
         ('Payment Details', {
-            'fields': ('is_paid', 'payment_method', 'transaction_id', 
+            'fields': ('payment_method', 'transaction_id', 
                       'mobile_number', 'payment_date')
         }),
         ('Confirmation', {
-            'fields': ('payment_confirmed', 'confirmed_by', 'confirmed_date')
+            'fields': ('confirmed_by', 'confirmed_date')
         }),
     )
     
+    STATUS_ICONS = {
+        TournamentRegistration.CONFIRMED: '✅',
+        TournamentRegistration.SUBMITTED: '⏳',
+        TournamentRegistration.RESERVED: '❌',
+        TournamentRegistration.REJECTED: '🚫',
+        TournamentRegistration.EXPIRED: '⌛',
+    }
+    
     def payment_status(self, obj):
-        if obj.payment_confirmed:
-            return '✅ Confirmed'
-        elif obj.is_paid:
-            return '⏳ Pending'
-        else:
-            return '❌ Not Paid'
+        return f"{self.STATUS_ICONS[obj.status]} {obj.get_status_display()}"
     payment_status.short_description = 'Status'
+    payment_status.admin_order_field = 'status'
     
     def confirmed_by_display(self, obj):
         if obj.confirmed_by:
             return obj.confirmed_by.username
         return "Not confirmed"
     confirmed_by_display.short_description = 'Confirmed By'
+    confirmed_by_display.admin_order_field = 'confirmed_by__username'
     
     def confirm_payments(self, request, queryset):
-        success_count = 0
-        failed_count = 0
-        failed_teams = []
-        
-        for registration in queryset:
-            # Check if team is already taken by another confirmed registration
-            team_already_taken = TournamentRegistration.objects.filter(
-                tournament=registration.tournament,
-                selected_team=registration.selected_team,
-                payment_confirmed=True
-            ).exclude(id=registration.id).exists()
-            
-            if team_already_taken:
-                failed_count += 1
-                failed_teams.append(f"{registration.selected_team.name} ({registration.player.username})")
-            else:
-                registration.payment_confirmed = True
-                registration.confirmed_by = request.user
-                registration.confirmed_date = timezone.now()
-                registration.save()
-                success_count += 1
-        
-        if success_count > 0:
-            self.message_user(request, f'{success_count} payments confirmed.')
-        if failed_count > 0:
-            self.message_user(request, 
-                f'{failed_count} payments failed. Teams already taken by other confirmed players: {", ".join(set(failed_teams))}', 
-                level='ERROR'
+        # Runs in the task queue; the result (confirmed ids, failures) is on the task
+        ids = list(queryset.filter(status__in=TournamentRegistration.TRANSITIONS['confirm'][0]).values_list(
+            'id', flat=True
+        ))
+        if not ids:
+            self.message_user(request, 'No selected payments can be confirmed.', level='WARNING')
+            return
+        queued = enqueue(confirm_registrations, args=[ids, request.user.pk])
+        label = f' (task #{queued.pk})' if queued else ''
+        self.message_user(request, f'Confirming {len(ids)} payments in the background{label}.')
+    
+    def _bulk_transition(self, queryset, transition):
+        """Apply a transition to every selected row it is allowed for, in one UPDATE"""
+        sources, target = TournamentRegistration.TRANSITIONS[transition]
+        fields = {'status': target}
+        if transition == 'reject':
+            fields.update(
+                transaction_id='',
+                mobile_number='',
+                payment_method='',
+                payment_date=None,
+                confirmed_by=None,
+                confirmed_date=None,
             )
+        queryset = queryset.filter(status__in=sources)
+        tournament_ids = set(queryset.values_list('tournament_id', flat=True))
+        with transaction.atomic():
+            updated = queryset.update(**fields)
+            # update() bypasses TournamentRegistration.save(), so recount the affected tournaments
+            recount_registrations(tournament_ids)
+        # update() skips post_save, so refresh the cached home page fragments here
+        bump_data_version('registrations', 'landing')
+        return updated
     
     def reject_payments(self, request, queryset):
-        updated = queryset.update(
-            is_paid=False,
-            payment_confirmed=False,
-            transaction_id='',
-            mobile_number='',
-            payment_method='',
-            confirmed_by=None,
-            confirmed_date=None
-        )
+        updated = self._bulk_transition(queryset, 'reject')
         self.message_user(request, f'{updated} payments rejected.')
     
+    def expire_reservations(self, request, queryset):
+        updated = self._bulk_transition(queryset, 'expire')
+        self.message_user(request, f'{updated} unpaid reservations expired.')
+    
+    def export_csv(self, request, queryset):
+        return registrations_export_response(queryset, 'csv')
+    
+    def export_xlsx(self, request, queryset):
+        return registrations_export_response(queryset, 'xlsx')
+    
     confirm_payments.short_description = "Confirm selected payments (with team check)"
     reject_payments.short_description = "Reject selected payments"
+    expire_reservations.short_description = "Expire selected unpaid reservations"
+    export_csv.short_description = "Export selected registrations (CSV)"
+    export_xlsx.short_description = "Export selected registrations (XLSX)"
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         if request.user.is_superuser:
             return qs
         return qs.filter(player=request.user)
-    
-    def save_model(self, request, obj, form, change):
-        """Save model with team availability check"""
-        if obj.payment_confirmed and change:
-            # Check if team is already taken by another confirmed registration
-            team_already_taken = TournamentRegistration.objects.filter(
-                tournament=obj.tournament,
-                selected_team=obj.selected_team,
-                payment_confirmed=True
-            ).exclude(id=obj.id).exists()
-            
-            if team_already_taken:
-                from django.contrib import messages
-                messages.error(request, f"Cannot confirm! Team '{obj.selected_team.name}' is already taken by another confirmed player.")
-                return
-        
-        if obj.payment_confirmed and not obj.confirmed_by:
-            obj.confirmed_by = request.user
-            obj.confirmed_date = timezone.now()
-        
-        super().save_model(request, obj, form, change)
 
 
 # ==========================
@@ -180,6 +192,7 @@ class MatchAdmin(admin.ModelAdmin):
         'confirmed_by_admin'
     )
     list_filter = ('status', 'tournament', 'confirmed_by_admin')
+    list_select_related = ('tournament', 'player1', 'player2')
     search_fields = ('player1__username', 'player2__username')
     ordering = ('-match_date',)
 
@@ -193,8 +206,39 @@ class ScheduleAdmin(admin.ModelAdmin):
         'id',
         'tournament',
         'round_number',
+        'match_count',
         'is_published',
         'published_date'
     )
     list_filter = ('is_published', 'tournament')
-    ordering = ('round_number',)
\ No newline at end of file
+    list_select_related = ('tournament',)
+    ordering = ('round_number',)
+    actions = ['publish_schedules']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(match_count=Count('matches'))
+    
+    def match_count(self, obj):
+        return obj.match_count
+    match_count.short_description = 'Matches'
+    match_count.admin_order_field = 'match_count'
+    
+    def save_model(self, request, obj, form, change):
+        newly_published = obj.is_published and (not change or 'is_published' in form.changed_data)
+        if newly_published and not obj.published_date:
+            obj.published_date = timezone.now()
+        super().save_model(request, obj, form, change)
+        if newly_published:
+            # After save_related, so the round's matches are set
+            transaction.on_commit(lambda: notify_schedule_published([obj]))
+    
+    def publish_schedules(self, request, queryset):
+        with transaction.atomic():
+            schedules = list(queryset.filter(is_published=False).select_related('tournament'))
+            Schedule.objects.filter(pk__in=[schedule.pk for schedule in schedules]).update(
+                is_published=True, published_date=timezone.now()
+            )
+            bump_data_version('schedules')
+            notify_schedule_published(schedules)
+        self.message_user(request, f'{len(schedules)} rounds published; their players are being notified.')
+    publish_schedules.short_description = "Publish selected rounds and notify players"
@@ -0,0 +1,115 @@
+# tournaments/flags.py
+import json
+import os
+from io import BytesIO
+from urllib.request import urlopen
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+# ISO 3166 code -> team name, shared by every Team instead of a per-call dict
+FLAGS = {
+    'ar': 'Argentina',
+    'br': 'Brazil',
+    'fr': 'France',
+    'de': 'Germany',
+    'es': 'Spain',
+    'gb-eng': 'England',
+    'it': 'Italy',
+    'pt': 'Portugal',
+    'nl': 'Netherlands',
+    'be': 'Belgium',
+    'hr': 'Croatia',
+    'dk': 'Denmark',
+    'ch': 'Switzerland',
+    'uy': 'Uruguay',
+    'mx': 'Mexico',
+    'us': 'USA',
+    'jp': 'Japan',
+    'kr': 'South Korea',
+    'au': 'Australia',
+    'ma': 'Morocco',
+    'sn': 'Senegal',
+    'eg': 'Egypt',
+    'ng': 'Nigeria',
+    'gh': 'Ghana',
+    'cm': 'Cameroon',
+    'cl': 'Chile',
+    'co': 'Colombia',
+    'pe': 'Peru',
+    'ec': 'Ecuador',
+    'py': 'Paraguay',
+    'se': 'Sweden',
+    'no': 'Norway',
+}
+FLAG_CODES_BY_NAME = {name: code for code, name in FLAGS.items()}
+DEFAULT_FLAG_CODE = 'un'
+
+FLAG_CDN_URL = 'https://flagcdn.com/w80/{code}.png'
+SPRITE_NAME = 'flags.png'
+SPRITE_MANIFEST_NAME = 'flags.json'
+SPRITE_COLUMNS = 8
+
+
+def flag_code(team_name):
+    return FLAG_CODES_BY_NAME.get(team_name, DEFAULT_FLAG_CODE)
+
+
+def flag_cdn_url(code):
+    return FLAG_CDN_URL.format(code=code)
+
+
+def sprite_codes():
+    """Every code that gets a cell in the sprite, fallback flag included"""
+    return list(FLAGS) + [DEFAULT_FLAG_CODE]
+
+
+def fetch_flag(source, code):
+    """
+    Raw image bytes for one flag. `source` is either a URL template
+    containing {code} or a local directory of <code>.png files.
+    """
+    if '{code}' in source:
+        with urlopen(source.format(code=code), timeout=10) as response:
+            return response.read()
+    with open(os.path.join(source, f"{code}.png"), 'rb') as handle:
+        return handle.read()
+
+
+def build_sprite(images, out_dir, cell_size, columns=SPRITE_COLUMNS):
+    """
+    Paste flag images (code -> bytes) into one grid sprite, cropped to
+    cell_size like `object-fit: cover`, and write flags.png + flags.json.
+    """
+    width, height = cell_size
+    codes = list(images)
+    rows = max(1, -(-len(codes) // columns))
+    sprite = Image.new('RGBA', (width * min(columns, max(1, len(codes))), height * rows))
+    positions = {}
+    for index, code in enumerate(codes):
+        with Image.open(BytesIO(images[code])) as flag:
+            cell = ImageOps.fit(flag.convert('RGBA'), cell_size, Image.LANCZOS)
+        x, y = (index % columns) * width, (index // columns) * height
+        sprite.paste(cell, (x, y))
+        positions[code] = [x, y]
+
+    os.makedirs(out_dir, exist_ok=True)
+    sprite.save(os.path.join(out_dir, SPRITE_NAME), 'PNG', optimize=True)
+    manifest = {
+        'sprite': SPRITE_NAME,
+        'cell': [width, height],
+        'size': list(sprite.size),
+        'positions': positions,
+    }
+    with open(os.path.join(out_dir, SPRITE_MANIFEST_NAME), 'w') as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_sprite_manifest(out_dir=None):
+    path = os.path.join(out_dir or settings.FLAG_SPRITE_DIR, SPRITE_MANIFEST_NAME)
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
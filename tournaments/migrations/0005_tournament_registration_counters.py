@@ -0,0 +1,49 @@
+# Generated by Django 4.2 on 2026-10-19 02:33
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_counters(apps, schema_editor):
+    Tournament = apps.get_model('tournaments', 'Tournament')
+    counts = Tournament.objects.annotate(
+        confirmed=Count('tournamentregistration', filter=Q(tournamentregistration__payment_confirmed=True)),
+        pending=Count('tournamentregistration', filter=Q(
+            tournamentregistration__is_paid=True, tournamentregistration__payment_confirmed=False,
+        )),
+        reserved=Count('tournamentregistration', filter=Q(
+            tournamentregistration__is_paid=False, tournamentregistration__payment_confirmed=False,
+        )),
+    )
+    for tournament in counts:
+        Tournament.objects.filter(pk=tournament.pk).update(
+            confirmed_count=tournament.confirmed,
+            pending_count=tournament.pending,
+            reserved_count=tournament.reserved,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0004_remove_tournamentregistration_unique_team_per_tournament_when_paid_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='confirmed_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='pending_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='reserved_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+def status_from_flags(apps, schema_editor):
+    TournamentRegistration = apps.get_model('tournaments', 'TournamentRegistration')
+    TournamentRegistration.objects.filter(payment_confirmed=True).update(status='confirmed')
+    TournamentRegistration.objects.filter(is_paid=True, payment_confirmed=False).update(status='submitted')
+    TournamentRegistration.objects.filter(is_paid=False, payment_confirmed=False).update(status='reserved')
+
+
+def flags_from_status(apps, schema_editor):
+    TournamentRegistration = apps.get_model('tournaments', 'TournamentRegistration')
+    TournamentRegistration.objects.filter(status='confirmed').update(is_paid=True, payment_confirmed=True)
+    TournamentRegistration.objects.filter(status='submitted').update(is_paid=True, payment_confirmed=False)
+    TournamentRegistration.objects.exclude(status__in=['confirmed', 'submitted']).update(
+        is_paid=False, payment_confirmed=False,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0005_tournament_registration_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournamentregistration',
+            name='status',
+            field=models.CharField(choices=[('reserved', 'Not Paid'), ('submitted', 'Pending'), ('confirmed', 'Confirmed'), ('rejected', 'Rejected'), ('expired', 'Expired')], default='reserved', max_length=20),
+        ),
+        migrations.RunPython(status_from_flags, flags_from_status),
+        migrations.RemoveConstraint(
+            model_name='tournamentregistration',
+            name='unique_team_per_tournament',
+        ),
+        migrations.RemoveField(
+            model_name='tournamentregistration',
+            name='is_paid',
+        ),
+        migrations.RemoveField(
+            model_name='tournamentregistration',
+            name='payment_confirmed',
+        ),
+        migrations.AddIndex(
+            model_name='tournamentregistration',
+            index=models.Index(condition=models.Q(('status', 'submitted')), fields=['tournament', 'selected_team'], name='registration_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentregistration',
+            index=models.Index(condition=models.Q(('status', 'reserved')), fields=['registration_date'], name='registration_reserved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournamentregistration',
+            index=models.Index(condition=models.Q(('status', 'confirmed')), fields=['-registration_date'], name='registration_confirmed_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tournamentregistration',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'confirmed')), fields=('tournament', 'selected_team'), name='unique_team_per_tournament'),
+        ),
+    ]
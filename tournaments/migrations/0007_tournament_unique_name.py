@@ -0,0 +1,40 @@
+# Generated by Django 4.2 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+def dedupe_tournament_names(apps, schema_editor):
+    """
+    Concurrent first hits on the home page used to create several
+    "WORLD CUP 2026" tournaments. Keep the oldest of each name, drop empty
+    copies and rename the ones that already have registrations or matches.
+    """
+    Tournament = apps.get_model('tournaments', 'Tournament')
+    duplicated = Tournament.objects.values('name').annotate(copies=models.Count('id')).filter(copies__gt=1)
+    for row in duplicated:
+        copies = Tournament.objects.filter(name=row['name']).order_by('id')[1:]
+        for tournament in copies:
+            in_use = (
+                tournament.tournamentregistration_set.exists()
+                or tournament.match_set.exists()
+                or tournament.schedule_set.exists()
+            )
+            if in_use:
+                Tournament.objects.filter(pk=tournament.pk).update(name=f"{tournament.name} #{tournament.pk}")
+            else:
+                tournament.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0006_registration_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_tournament_names, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tournament',
+            constraint=models.UniqueConstraint(fields=('name',), name='unique_tournament_name'),
+        ),
+    ]
@@ -1,9 +1,15 @@
 # tournaments/models.py
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 
+from .flags import flag_cdn_url, flag_code
+
 class Team(models.Model):
     """Football Team Model"""
     name = models.CharField(max_length=100)
@@ -14,45 +20,13 @@ class Team(models.Model):
     def __str__(self):
         return self.name
     
+    def get_flag_code(self):
+        return flag_code(self.name)
+
     def get_flag_url(self):
         if self.flag_url:
             return self.flag_url
-        
-        default_flags = {
-            'Argentina': 'https://flagcdn.com/w80/ar.png',
-            'Brazil': 'https://flagcdn.com/w80/br.png',
-            'France': 'https://flagcdn.com/w80/fr.png',
-            'Germany': 'https://flagcdn.com/w80/de.png',
-            'Spain': 'https://flagcdn.com/w80/es.png',
-            'England': 'https://flagcdn.com/w80/gb-eng.png',
-            'Italy': 'https://flagcdn.com/w80/it.png',
-            'Portugal': 'https://flagcdn.com/w80/pt.png',
-            'Netherlands': 'https://flagcdn.com/w80/nl.png',
-            'Belgium': 'https://flagcdn.com/w80/be.png',
-            'Croatia': 'https://flagcdn.com/w80/hr.png',
-            'Denmark': 'https://flagcdn.com/w80/dk.png',
-            'Switzerland': 'https://flagcdn.com/w80/ch.png',
-            'Uruguay': 'https://flagcdn.com/w80/uy.png',
-            'Mexico': 'https://flagcdn.com/w80/mx.png',
-            'USA': 'https://flagcdn.com/w80/us.png',
-            'Japan': 'https://flagcdn.com/w80/jp.png',
-            'South Korea': 'https://flagcdn.com/w80/kr.png',
-            'Australia': 'https://flagcdn.com/w80/au.png',
-            'Morocco': 'https://flagcdn.com/w80/ma.png',
-            'Senegal': 'https://flagcdn.com/w80/sn.png',
-            'Egypt': 'https://flagcdn.com/w80/eg.png',
-            'Nigeria': 'https://flagcdn.com/w80/ng.png',
-            'Ghana': 'https://flagcdn.com/w80/gh.png',
-            'Cameroon': 'https://flagcdn.com/w80/cm.png',
-            'Chile': 'https://flagcdn.com/w80/cl.png',
-            'Colombia': 'https://flagcdn.com/w80/co.png',
-            'Peru': 'https://flagcdn.com/w80/pe.png',
-            'Ecuador': 'https://flagcdn.com/w80/ec.png',
-            'Paraguay': 'https://flagcdn.com/w80/py.png',
-            'Sweden': 'https://flagcdn.com/w80/se.png',
-            'Norway': 'https://flagcdn.com/w80/no.png',
-        }
-        return default_flags.get(self.name, 'https://flagcdn.com/w80/un.png')
+        return flag_cdn_url(self.get_flag_code())
 
 class Tournament(models.Model):
     STATUS_CHOICES = [
@@ -72,16 +46,170 @@ class Tournament(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    # Denormalized TournamentRegistration counts, moved with F() updates in the
+    # same transaction as each registration change (see shift_registration_counters).
+    # `manage.py reconcile_counters` repairs any drift.
+    confirmed_count = models.IntegerField(default=0)
+    pending_count = models.IntegerField(default=0)
+    reserved_count = models.IntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            # Keeps bootstrap_tournament idempotent under concurrent runs
+            models.UniqueConstraint(fields=['name'], name='unique_tournament_name'),
+        ]
+    
     def __str__(self):
         return self.name
+    
+    @property
+    def is_full(self):
+        return self.confirmed_count >= self.max_teams
+    
+    @property
+    def remaining_slots(self):
+        return max(0, self.max_teams - self.confirmed_count)
+
+
+# -----------------------------------------------------
+# Active tournament pointer
+# -----------------------------------------------------
+# Cached id of the tournament the home page advertises (0 = none). Reads
+# never create one; `manage.py bootstrap_tournament` does.
+ACTIVE_TOURNAMENT_CACHE_KEY = 'active_tournament_id'
+
+
+def _active_tournament_ids():
+    return Tournament.objects.filter(is_active=True, status='upcoming').order_by('id').values_list('id', flat=True)
+
+
+def get_active_tournament():
+    tournament_id = cache.get(ACTIVE_TOURNAMENT_CACHE_KEY)
+    if tournament_id is None:
+        tournament_id = _active_tournament_ids().first() or 0
+        cache.set(ACTIVE_TOURNAMENT_CACHE_KEY, tournament_id, None)
+    if not tournament_id:
+        return None
+    return Tournament.objects.filter(pk=tournament_id).first()
+
+
+async def aget_active_tournament():
+    tournament_id = await cache.aget(ACTIVE_TOURNAMENT_CACHE_KEY)
+    if tournament_id is None:
+        tournament_id = await _active_tournament_ids().afirst() or 0
+        await cache.aset(ACTIVE_TOURNAMENT_CACHE_KEY, tournament_id, None)
+    if not tournament_id:
+        return None
+    return await Tournament.objects.filter(pk=tournament_id).afirst()
+
+
+@receiver(post_save, sender=Tournament)
+@receiver(post_delete, sender=Tournament)
+def reset_active_tournament(sender, **kwargs):
+    # Again after commit, so a read racing the transaction cannot keep the old pointer
+    cache.delete(ACTIVE_TOURNAMENT_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(ACTIVE_TOURNAMENT_CACHE_KEY))
+
+
+class TournamentFullError(ValidationError):
+    pass
+
+
+class InvalidTransitionError(ValidationError):
+    pass
+
+
+# Registration status -> Tournament counter column (rejected/expired are not counted)
+REGISTRATION_COUNTERS = {
+    'confirmed': 'confirmed_count',
+    'submitted': 'pending_count',
+    'reserved': 'reserved_count',
+}
+
+
+def shift_registration_counters(tournament_id, old_status=None, new_status=None):
+    """
+    Move one registration between counter columns with a single UPDATE.
+    Confirming is a conditional UPDATE that only matches while a slot is
+    free, so concurrent confirmations can never exceed max_teams.
+    """
+    old_column = REGISTRATION_COUNTERS.get(old_status)
+    new_column = REGISTRATION_COUNTERS.get(new_status)
+    if old_column == new_column:
+        return
+    changes = {}
+    if old_column:
+        changes[old_column] = F(old_column) - 1
+    if new_column:
+        changes[new_column] = F(new_column) + 1
+    
+    tournaments = Tournament.objects.filter(pk=tournament_id)
+    if new_status == 'confirmed':
+        tournaments = tournaments.filter(confirmed_count__lt=F('max_teams'))
+        if not tournaments.update(**changes):
+            raise TournamentFullError("Tournament is full! No more slots available.")
+    else:
+        tournaments.update(**changes)
+
+
+def recount_registrations(tournament_ids=None):
+    """
+    Recompute the counters from TournamentRegistration rows.
+    Returns [(tournament, {column: (stored, actual)})] for the ones that drifted.
+    """
+    tournaments = Tournament.objects.annotate(**{
+        f'actual_{status}': Count('tournamentregistration', filter=Q(tournamentregistration__status=status))
+        for status in REGISTRATION_COUNTERS
+    })
+    if tournament_ids is not None:
+        tournaments = tournaments.filter(pk__in=tournament_ids)
+    
+    drifted = []
+    with transaction.atomic():
+        for tournament in tournaments:
+            diff = {}
+            for status, column in REGISTRATION_COUNTERS.items():
+                stored, actual = getattr(tournament, column), getattr(tournament, f'actual_{status}')
+                if stored != actual:
+                    diff[column] = (stored, actual)
+            if diff:
+                Tournament.objects.filter(pk=tournament.pk).update(
+                    **{column: actual for column, (_, actual) in diff.items()}
+                )
+                drifted.append((tournament, diff))
+    return drifted
+
 
 class TournamentRegistration(models.Model):
+    RESERVED = 'reserved'
+    SUBMITTED = 'submitted'
+    CONFIRMED = 'confirmed'
+    REJECTED = 'rejected'
+    EXPIRED = 'expired'
+    STATUS_CHOICES = [
+        (RESERVED, 'Not Paid'),
+        (SUBMITTED, 'Pending'),
+        (CONFIRMED, 'Confirmed'),
+        (REJECTED, 'Rejected'),
+        (EXPIRED, 'Expired'),
+    ]
+    # Statuses that still hold (or may still take) the selected team
+    OPEN_STATUSES = (RESERVED, SUBMITTED, REJECTED)
+    
+    # transition -> (allowed current statuses, new status)
+    TRANSITIONS = {
+        # From SUBMITTED: the player corrects a mistyped transaction id
+        'submit_payment': ((RESERVED, SUBMITTED, REJECTED), SUBMITTED),
+        'confirm': ((RESERVED, SUBMITTED), CONFIRMED),
+        'reject': ((SUBMITTED, CONFIRMED), REJECTED),
+        'expire': ((RESERVED,), EXPIRED),
+    }
+    
     player = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE)
     selected_team = models.ForeignKey(Team, on_delete=models.CASCADE)
     registration_date = models.DateTimeField(auto_now_add=True)
-    is_paid = models.BooleanField(default=False)
-    payment_confirmed = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=RESERVED)
     payment_method = models.CharField(max_length=50, blank=True, null=True)  # bKash/Nagad
     transaction_id = models.CharField(max_length=100, blank=True, null=True)
     mobile_number = models.CharField(max_length=15, blank=True, null=True)
@@ -94,11 +222,29 @@ class TournamentRegistration(models.Model):
         unique_together = ['player', 'tournament']
         constraints = [
             models.UniqueConstraint(
-                fields=['tournament', 'selected_team', 'payment_confirmed'],
-                condition=models.Q(payment_confirmed=True),
+                fields=['tournament', 'selected_team'],
+                condition=models.Q(status='confirmed'),
                 name='unique_team_per_tournament'
             )
         ]
+        # Partial indexes: each hot query touches one status only
+        indexes = [
+            models.Index(
+                fields=['tournament', 'selected_team'],
+                condition=models.Q(status='submitted'),
+                name='registration_submitted_idx',
+            ),
+            models.Index(
+                fields=['registration_date'],
+                condition=models.Q(status='reserved'),
+                name='registration_reserved_idx',
+            ),
+            models.Index(
+                fields=['-registration_date'],
+                condition=models.Q(status='confirmed'),
+                name='registration_confirmed_idx',
+            ),
+        ]
     
     def clean(self):
         """Validate that team is not already taken in this tournament"""
@@ -106,7 +252,7 @@ class TournamentRegistration(models.Model):
         existing_registration = TournamentRegistration.objects.filter(
             tournament=self.tournament,
             selected_team=self.selected_team,
-            payment_confirmed=True
+            status=self.CONFIRMED
         ).exclude(id=self.id).first()
         
         if existing_registration:
@@ -114,26 +260,113 @@ class TournamentRegistration(models.Model):
                 f'Team {self.selected_team.name} is already selected by {existing_registration.player.username}'
             )
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'tournament_id', 'status'}.issubset(field_names):
+            instance._counted = (instance.tournament_id, instance.status)
+        return instance
+    
+    # Read-only views of the status for templates
+    @property
+    def is_paid(self):
+        return self.status in (self.SUBMITTED, self.CONFIRMED)
+    
+    @property
+    def payment_confirmed(self):
+        return self.status == self.CONFIRMED
+    
+    def _stored_counter_state(self):
+        """(tournament_id, status) this row is currently counted under, if any"""
+        if self._state.adding:
+            return None, None
+        counted = getattr(self, '_counted', None)
+        if counted is None:
+            counted = TournamentRegistration.objects.filter(pk=self.pk).values_list(
+                'tournament_id', 'status'
+            ).first() or (None, None)
+        return counted
+    
     def save(self, *args, **kwargs):
         self.clean()
-        super().save(*args, **kwargs)
+        old_tournament, old_status = self._stored_counter_state()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if old_tournament is not None and old_tournament != self.tournament_id:
+                shift_registration_counters(old_tournament, old_status, None)
+                old_status = None
+            shift_registration_counters(self.tournament_id, old_status, self.status)
+        self._counted = (self.tournament_id, self.status)
+    
+    def _transition(self, name, **fields):
+        """
+        Guarded status change as one conditional UPDATE: it only matches
+        while the row is still in the status this instance was loaded with,
+        so a concurrent change makes it fail instead of being overwritten.
+        """
+        sources, target = self.TRANSITIONS[name]
+        if self.status not in sources:
+            raise InvalidTransitionError(f"Cannot {name.replace('_', ' ')} a registration that is {self.status}.")
+        
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    updated = TournamentRegistration.objects.filter(pk=self.pk, status=self.status).update(
+                        status=target, **fields
+                    )
+            except IntegrityError:
+                # unique_team_per_tournament: someone else confirmed this team first
+                raise ValidationError(f'Team {self.selected_team.name} is already taken in this tournament.')
+            if not updated:
+                raise InvalidTransitionError("This registration was changed by someone else. Please reload.")
+            shift_registration_counters(self.tournament_id, self.status, target)
+        
+        self.status = target
+        for field, value in fields.items():
+            setattr(self, field, value)
+        self._counted = (self.tournament_id, target)
+    
+    def submit_payment(self, payment_method, transaction_id, mobile_number):
+        self._transition(
+            'submit_payment',
+            payment_method=payment_method,
+            transaction_id=transaction_id,
+            mobile_number=mobile_number,
+            payment_date=timezone.now(),
+        )
+    
+    def confirm(self, confirmed_by):
+        self._transition('confirm', confirmed_by=confirmed_by, confirmed_date=timezone.now())
+    
+    def reject(self):
+        self._transition(
+            'reject',
+            payment_method='',
+            transaction_id='',
+            mobile_number='',
+            payment_date=None,
+            confirmed_by=None,
+            confirmed_date=None,
+        )
+    
+    def expire(self):
+        self._transition('expire')
     
     def __str__(self):
         return f"{self.player.username} - {self.tournament.name} - {self.selected_team.name}"
     
-    def get_status_display(self):
-        if self.payment_confirmed:
-            return "Confirmed"
-        elif self.is_paid:
-            return "Pending"
-        else:
-            return "Not Paid"
-    
     def get_payment_info(self):
         if self.payment_method and self.transaction_id:
             return f"{self.payment_method} - {self.transaction_id}"
         return "No payment info"
 
+@receiver(post_delete, sender=TournamentRegistration)
+def release_registration_counter(sender, instance, **kwargs):
+    # post_delete also covers cascades (e.g. a deleted player), inside the same transaction
+    tournament_id, status = getattr(instance, '_counted', None) or (instance.tournament_id, instance.status)
+    shift_registration_counters(tournament_id, status, None)
+
+
 class Match(models.Model):
     STATUS_CHOICES = [
         ('scheduled', 'Scheduled'),
@@ -0,0 +1,51 @@
+# tournaments/notifications.py
+from django.db.models import Q
+from django.urls import reverse
+
+from accounts.models import User
+
+from core.notifications import notify
+
+from .models import Match
+
+
+def notify_payments_confirmed(registrations):
+    """One notification per confirmed player, written in one batch"""
+    by_tournament = {}
+    for registration in registrations:
+        by_tournament.setdefault(registration.tournament, []).append(registration.player_id)
+    for tournament, player_ids in by_tournament.items():
+        notify(
+            player_ids, 'payment_confirmed', f"Payment confirmed for {tournament.name}",
+            "You're now officially in the tournament!", reverse('home'),
+        )
+
+
+def notify_payment_needs_review(registration, reason):
+    """A card payment went through but could not confirm the registration"""
+    tournament = registration.tournament
+    notify(
+        [registration.player_id], 'payment_needs_review', f"Your payment for {tournament.name} needs a review",
+        f"We received your payment but could not confirm your registration ({reason}). "
+        "An admin will refund it or move you to another team.", reverse('home'),
+    )
+    admins = User.objects.filter(Q(is_superuser=True) | Q(is_admin=True)).values_list('pk', flat=True)
+    notify(
+        admins, 'payment_needs_review', f"Paid registration #{registration.pk} could not be confirmed",
+        f"{registration.player.username} paid for {registration.selected_team.name} in {tournament.name}: "
+        f"{reason}. Refund or move it.", reverse('admin:payments_payment_changelist') + '?status=needs_review',
+    )
+
+
+def notify_schedule_published(schedules):
+    """Tell every player with a match in the published rounds"""
+    players = {schedule.pk: set() for schedule in schedules}
+    matches = Match.objects.filter(schedule__in=players).values_list('schedule', 'player1_id', 'player2_id')
+    for schedule_id, player1, player2 in matches:
+        players[schedule_id].update((player1, player2))
+    for schedule in schedules:
+        notify(
+            players[schedule.pk], 'schedule_published',
+            f"{schedule.tournament.name}: round {schedule.round_number} is scheduled",
+            "Your next match is on the schedule.", reverse('schedule'),
+        )
@@ -0,0 +1,27 @@
+# tournaments/tasks.py
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+
+from core.taskqueue import task
+
+from .models import TournamentRegistration
+from .notifications import notify_payments_confirmed
+
+
+@task
+def confirm_registrations(registration_ids, confirmed_by_id):
+    """Admin bulk confirmation; each row keeps the guarded single-UPDATE transition"""
+    confirmed_by = get_user_model().objects.get(pk=confirmed_by_id)
+    registrations = TournamentRegistration.objects.filter(pk__in=registration_ids).select_related(
+        'player', 'selected_team', 'tournament'
+    )
+    confirmed, failed = [], []
+    for registration in registrations:
+        try:
+            registration.confirm(confirmed_by)
+        except ValidationError as e:
+            failed.append(f"{registration.selected_team.name} ({registration.player.username}): {e.messages[0]}")
+            continue
+        confirmed.append(registration)
+    notify_payments_confirmed(confirmed)
+    return {'confirmed': [registration.pk for registration in confirmed], 'failed': failed}
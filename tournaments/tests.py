@@ -1,3 +1,270 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import PlayerProfile, User
+from core.models import Notification, Task
+from .tasks import confirm_registrations
+from .models import (
+    InvalidTransitionError, Match, Schedule, Team, Tournament, TournamentFullError, TournamentRegistration,
+    get_active_tournament,
+)
+
+
+class RegistrationCounterTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            name='Cup', description='', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=150, max_teams=1,
+        )
+
+    def register(self, username, **fields):
+        return TournamentRegistration.objects.create(
+            player=User.objects.create_user(username, f'{username}@example.com', 'pass12345'),
+            tournament=self.tournament,
+            selected_team=Team.objects.create(name=username, country=username),
+            **fields,
+        )
+
+    def counts(self):
+        self.tournament.refresh_from_db()
+        return self.tournament.confirmed_count, self.tournament.pending_count, self.tournament.reserved_count
+
+    def test_counters_follow_registration_state(self):
+        registration = self.register('keeper')
+        self.assertEqual(self.counts(), (0, 0, 1))
+
+        registration.submit_payment('bkash', 'TX1', '01700000000')
+        self.assertEqual(self.counts(), (0, 1, 0))
+
+        registration = TournamentRegistration.objects.get(pk=registration.pk)
+        registration.confirm(registration.player)
+        self.assertEqual(self.counts(), (1, 0, 0))
+
+        registration.player.delete()  # cascades to the registration
+        self.assertEqual(self.counts(), (0, 0, 0))
+
+    def test_confirmation_never_exceeds_max_teams(self):
+        self.register('first', status=TournamentRegistration.CONFIRMED)
+        late = self.register('late', status=TournamentRegistration.SUBMITTED)
+
+        with self.assertRaises(TournamentFullError):
+            late.confirm(late.player)
+        self.assertEqual(self.counts(), (1, 1, 0))
+        self.assertEqual(TournamentRegistration.objects.get(pk=late.pk).status, TournamentRegistration.SUBMITTED)
+
+    def test_reconcile_fixes_drift(self):
+        self.register('keeper', status=TournamentRegistration.SUBMITTED)
+        Tournament.objects.filter(pk=self.tournament.pk).update(pending_count=7, reserved_count=2)
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('pending_count 7 -> 1', out.getvalue())
+        self.assertEqual(self.counts(), (0, 1, 0))
+
+
+class RegistrationStatusTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            name='Cup', description='', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=150,
+        )
+        self.team = Team.objects.create(name='Brazil', country='Brazil')
+        self.admin = User.objects.create_superuser('boss', 'boss@example.com', 'pass12345')
+
+    def register(self, username, **fields):
+        return TournamentRegistration.objects.create(
+            player=User.objects.create_user(username, f'{username}@example.com', 'pass12345'),
+            tournament=self.tournament, selected_team=self.team, **fields,
+        )
+
+    def registration_updates(self, queries):
+        return [q['sql'] for q in queries
+                if q['sql'].startswith('UPDATE "tournaments_tournamentregistration"')]
+
+    def test_each_transition_is_one_update(self):
+        registration = self.register('keeper')
+        steps = [
+            (lambda: registration.submit_payment('bkash', 'TX1', '01700000000'), 'submitted'),
+            (lambda: registration.submit_payment('bkash', 'TX1-fixed', '01700000000'), 'submitted'),
+            (registration.reject, 'rejected'),
+            (lambda: registration.submit_payment('nagad', 'TX2', '01700000000'), 'submitted'),
+            (lambda: registration.confirm(self.admin), 'confirmed'),
+        ]
+        for step, status in steps:
+            with CaptureQueriesContext(connection) as queries:
+                step()
+            self.assertEqual(len(self.registration_updates(queries)), 1)
+            self.assertEqual(TournamentRegistration.objects.get(pk=registration.pk).status, status)
+        self.assertEqual(TournamentRegistration.objects.get(pk=registration.pk).confirmed_by, self.admin)
+
+    def test_guard_rejects_invalid_and_stale_transitions(self):
+        registration = self.register('keeper')
+        with self.assertRaises(InvalidTransitionError):
+            registration.reject()
+
+        stale = TournamentRegistration.objects.get(pk=registration.pk)
+        registration.expire()
+        with self.assertRaises(InvalidTransitionError):
+            stale.submit_payment('bkash', 'TX1', '01700000000')
+        self.assertEqual(TournamentRegistration.objects.get(pk=registration.pk).status, 'expired')
+
+    def test_only_one_confirmed_registration_per_team(self):
+        second = self.register('second', status=TournamentRegistration.SUBMITTED)
+        self.register('first', status=TournamentRegistration.CONFIRMED)
+        with self.assertRaisesMessage(ValidationError, 'already taken'):
+            second.confirm(self.admin)
+        self.assertEqual(TournamentRegistration.objects.get(pk=second.pk).status, 'submitted')
+
+
+class ActiveTournamentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_home_never_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q for q in queries if q['sql'].startswith(('INSERT', 'UPDATE'))])
+        self.assertFalse(Tournament.objects.exists())
+
+    def test_bootstrap_is_idempotent(self):
+        for _ in range(2):
+            call_command('bootstrap_tournament', stdout=StringIO())
+        self.assertEqual(Tournament.objects.filter(name='WORLD CUP 2026').count(), 1)
+        self.assertEqual(get_active_tournament().name, 'WORLD CUP 2026')
+
+    def test_pointer_is_cached_until_tournaments_change(self):
+        call_command('bootstrap_tournament', stdout=StringIO())
+        get_active_tournament()
+        with self.assertNumQueries(1):  # the row itself, not the lookup
+            first = get_active_tournament()
+
+        first.status = 'ongoing'
+        first.save()
+        self.assertIsNone(get_active_tournament())
+
+        now = timezone.now()
+        later = Tournament.objects.create(
+            name='Club Cup', description='', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=150,
+        )
+        self.assertEqual(get_active_tournament(), later)
+
+
+class AdminChangelistQueryTests(TestCase):
+    changelists = [
+        'admin:tournaments_team_changelist',
+        'admin:tournaments_tournamentregistration_changelist',
+        'admin:tournaments_match_changelist',
+        'admin:tournaments_schedule_changelist',
+        'admin:accounts_playerprofile_changelist',
+    ]
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('boss', 'boss@example.com', 'pass12345')
+        self.client.force_login(self.admin)
+        self.client.get(reverse('admin:index'))  # warm the cached user
+        self.added = 0
+
+    def add_rows(self, count):
+        now = timezone.now()
+        for _ in range(count):
+            index = self.added = self.added + 1
+            tournament = Tournament.objects.create(
+                name=f'Cup {index}', description='', start_date=now, end_date=now,
+                registration_deadline=now, entry_fee=150,
+            )
+            players = [User.objects.create_user(f'p{index}{side}', f'p{index}{side}@example.com', 'pass')
+                       for side in 'ab']
+            teams = [Team.objects.create(name=f'T{index}{side}', country='X') for side in 'ab']
+            for player in players:
+                PlayerProfile.objects.create(user=player)
+            TournamentRegistration.objects.create(
+                player=players[0], tournament=tournament, selected_team=teams[0],
+                status=TournamentRegistration.CONFIRMED, confirmed_by=self.admin,
+            )
+            match = Match.objects.create(
+                tournament=tournament, player1=players[0], player2=players[1],
+                player1_team=teams[0], player2_team=teams[1], match_date=now,
+            )
+            Schedule.objects.create(tournament=tournament, round_number=index).matches.add(match)
+
+    def query_counts(self):
+        counts = {}
+        for name in self.changelists:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            counts[name] = len(queries)
+        return counts
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.add_rows(2)
+        small = self.query_counts()
+        self.add_rows(8)
+        self.assertEqual(self.query_counts(), small)
+
+    def test_taken_count_is_sortable(self):
+        self.add_rows(2)
+        response = self.client.get(reverse('admin:tournaments_team_changelist'), {'o': '-3'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([team.taken_count for team in response.context['cl'].result_list][:2], [1, 1])
+
+
+class NotificationFanOutTests(TestCase):
+    def setUp(self):
+        now = timezone.now()
+        self.tournament = Tournament.objects.create(
+            name='Cup', description='', start_date=now, end_date=now,
+            registration_deadline=now, entry_fee=150,
+        )
+        self.admin = User.objects.create_superuser('boss', 'boss@example.com', 'pass12345')
+        self.players = [User.objects.create_user(f'p{index}', f'p{index}@example.com', 'pass12345') for index in range(4)]
+
+    def test_bulk_confirmation_notifies_in_one_batch(self):
+        registrations = [
+            TournamentRegistration.objects.create(
+                player=player, tournament=self.tournament, status=TournamentRegistration.SUBMITTED,
+                selected_team=Team.objects.create(name=player.username, country=player.username),
+            )
+            for player in self.players
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            result = confirm_registrations([registration.pk for registration in registrations], self.admin.pk)
+        self.assertEqual(len(result['confirmed']), 4)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "core_notification"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            set(Notification.objects.filter(kind='payment_confirmed').values_list('user_id', flat=True)),
+            {player.pk for player in self.players},
+        )
+        self.assertEqual(Task.objects.filter(name='core.notifications.deliver_notification_emails').count(), 1)
 
-# Create your tests here.
+    def test_publishing_a_round_notifies_its_players(self):
+        team = Team.objects.create(name='Brazil', country='Brazil')
+        schedule = Schedule.objects.create(tournament=self.tournament, round_number=1)
+        schedule.matches.add(Match.objects.create(
+            tournament=self.tournament, player1=self.players[0], player2=self.players[1],
+            player1_team=team, player2_team=team, match_date=timezone.now(),
+        ))
+        self.client.force_login(self.admin)
+        self.client.post(reverse('admin:tournaments_schedule_changelist'), {
+            'action': 'publish_schedules', '_selected_action': [schedule.pk],
+        })
+        schedule.refresh_from_db()
+        self.assertTrue(schedule.is_published)
+        self.assertIsNotNone(schedule.published_date)
+        self.assertEqual(
+            sorted(Notification.objects.filter(kind='schedule_published').values_list('user__username', flat=True)),
+            ['p0', 'p1'],
+        )
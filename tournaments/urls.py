@@ -1,4 +1,5 @@
 # tournaments/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -7,7 +8,7 @@ urlpatterns = [
     # path('register/<int:tournament_id>/', views.tournament_register, name='tournament_register'),
     
     # Keep only these URLs
-    path('schedule/', views.schedule_view, name='schedule'),
+    path('schedule/', views.aschedule_view if settings.ASYNC_VIEWS else views.schedule_view, name='schedule'),
     path('my-matches/', views.my_matches, name='my_matches'),
     path('submit-screenshot/<int:match_id>/', views.submit_screenshot, name='submit_screenshot'),
     
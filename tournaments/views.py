@@ -4,6 +4,9 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q
 from .models import Tournament, TournamentRegistration, Team, Match, Schedule
+from core.async_helpers import arender
+from core.routers import read_from_replica
+from core.thumbnails import schedule_upload_processing
 
 # Add home_view to fix the import error
 def home_view(request):
@@ -33,7 +36,6 @@ def tournament_register(request, tournament_id):
             player=request.user,
             tournament=tournament,
             selected_team=team,
-            is_paid=False
         )
         
         messages.success(request, f"Successfully registered for {tournament.name}!")
@@ -68,6 +70,7 @@ def team_selection(request, registration_id):
     }
     return render(request, 'tournaments/team_selection.html', context)
 
+@read_from_replica
 def schedule_view(request):
     """View tournament schedule"""
     schedules = Schedule.objects.filter(is_published=True).select_related('tournament')
@@ -77,6 +80,16 @@ def schedule_view(request):
     }
     return render(request, 'tournaments/schedule.html', context)
 
+@read_from_replica
+async def aschedule_view(request):
+    """Async tournament schedule"""
+    schedules = Schedule.objects.filter(is_published=True).select_related('tournament')
+    
+    context = {
+        'schedules': [schedule async for schedule in schedules],
+    }
+    return await arender(request, 'tournaments/schedule.html', context)
+
 @login_required
 def my_matches(request):
     """View user's matches"""
@@ -107,6 +120,7 @@ def submit_screenshot(request, match_id):
     if request.method == 'POST' and request.FILES.get('screenshot'):
         match.screenshot = request.FILES['screenshot']
         match.save()
+        schedule_upload_processing(match.screenshot)
         messages.success(request, "Screenshot submitted successfully!")
         return redirect('my_matches')
     